@@ -0,0 +1,367 @@
+import threading
+import time
+from itertools import chain
+
+from sqlalchemy import event
+
+from cache import record_trip_write
+
+__all__ = ['AvailabilityIndex', 'record_vacancy_change', 'AVAILABILITY_TRACKED', 'FACETS']
+
+# Stateroom columns the index can filter on
+FACETS = ('stateroom_type', 'location', 'num_bed')
+
+# Execution option for bulk statements whose vacancy changes are reported with
+# record_vacancy_change(), so they don't invalidate the index
+AVAILABILITY_TRACKED = 'availability_tracked'
+
+# Tables whose changes can make the index wrong
+_INDEXED_TABLES = {'cyz_stateroom', 'cyz_stateroom_price', 'cyz_trip'}
+
+
+def _bits_to_ids(bits):
+    ids = []
+    while bits:
+        lowest = bits & -bits
+        ids.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return ids
+
+
+def record_vacancy_change(session, trip_id, stateroom_id, is_vacant):
+    """
+    Report a vacancy change made by a bulk statement, to be applied to the index when the
+    session commits (and dropped if it rolls back). The trip is also reported to the other
+    processes (see cache.record_trip_write()), if the statement runs with TRIP_SCOPED.
+
+    Args:
+        session: The session running the statement.
+        trip_id (int): The trip.
+        stateroom_id (int): The stateroom.
+        is_vacant (bool): The new vacancy.
+    """
+    session.info.setdefault('vacancy_changes', []).append((trip_id, stateroom_id, is_vacant))
+    record_trip_write(session, 'cyz_stateroom_price', trip_id)
+
+
+class AvailabilityIndex:
+    """
+    In-memory index of vacant staterooms, as bitsets over stateroom ids.
+
+    Each trip has a bitset of its vacant cabins, and each value of a stateroom facet
+    (type, location, number of beds) has a bitset of the cabins that have it, so a query
+    such as "vacant balcony cabins with 4 beds on trip X" is a few integer ANDs and a
+    popcount instead of a table scan.
+
+    The index is built from the database on first use and rebuilt after `ttl` seconds.
+    Bookings update it in place when they commit (see record_vacancy_change()); any other
+    committed write to staterooms, prices or trips drops the index, so it is rebuilt on the
+    next query. Commits of other processes, e.g. bookings taken by another gunicorn worker,
+    reach it through apply_changes() when cache.TableChangeLog notices them, which happens
+    before every availability query: the trips they wrote are reloaded on their own, and
+    only stateroom changes, or writes to unknown trips, drop the whole index.
+    """
+
+    def __init__(self, ttl=60):
+        """
+        Args:
+            ttl (float): The number of seconds before the index is rebuilt from the database.
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expires_at = 0
+        self._facets = {}       # facet -> value -> bitset of stateroom ids
+        self._vacant = {}       # trip_id -> bitset of vacant stateroom ids
+        self._generation = 0
+        self._building = 0
+        self._recent = []       # vacancy changes applied while a build is running
+        self._stale_trips = {}  # trip_id -> invalidation count, of the trips to reload
+        self.builds = 0
+        self.reloads = 0
+
+    def init_app(self, app):
+        """
+        Read the TTL from the AVAILABILITY_INDEX_TTL config.
+
+        Args:
+            app: The Flask application.
+        """
+        self.ttl = app.config.get('AVAILABILITY_INDEX_TTL', self.ttl)
+        self.invalidate()
+
+    def _load(self):
+        """Build the index from the database unless it is still fresh, then reload the stale trips."""
+        with self._lock:
+            fresh = self._expires_at > time.monotonic()
+        if fresh:
+            self._reload_trips()
+        else:
+            self._build()
+
+    def _begin(self):
+        # Under the lock: start recording the vacancy changes applied during a query
+        self._building += 1
+        return self._generation, len(self._recent)
+
+    def _end(self, vacant, start):
+        with self._lock:
+            self._building -= 1
+            # Bookings committed during the query may or may not be in its results;
+            # replaying them in order gives the latest state either way
+            replay = self._recent[start:]
+            if not self._building:
+                self._recent = []
+
+        for trip_id, stateroom_id, is_vacant in replay:
+            bits = vacant.get(trip_id)
+            if bits is not None:
+                bit = 1 << stateroom_id
+                vacant[trip_id] = bits | bit if is_vacant else bits & ~bit
+
+    def _build(self):
+        """Build the facet and vacancy bitsets from the database."""
+        with self._lock:
+            if self._expires_at > time.monotonic():
+                return
+            generation, start = self._begin()
+            stale = dict(self._stale_trips)
+
+        vacant = {}
+        try:
+            facets, vacant = self._query_facets(), self._query_vacancy()
+        finally:
+            self._end(vacant, start)
+
+        with self._lock:
+            # Don't install data that an invalidation has overtaken while it was loading
+            if generation == self._generation:
+                self._facets = facets
+                self._vacant = vacant
+                self._expires_at = time.monotonic() + self.ttl
+                self.builds += 1
+                self._forget_stale(stale)
+
+    def _reload_trips(self):
+        """Reload the vacancy bitsets of the trips dropped by invalidate_trips()."""
+        with self._lock:
+            if not self._stale_trips:
+                return
+            generation, start = self._begin()
+            stale = dict(self._stale_trips)
+
+        vacant = {}
+        try:
+            vacant = self._query_vacancy(stale)
+        finally:
+            self._end(vacant, start)
+
+        with self._lock:
+            if generation == self._generation:
+                for trip_id in self._forget_stale(stale):
+                    if trip_id in vacant:
+                        self._vacant[trip_id] = vacant[trip_id]
+                    else:
+                        self._vacant.pop(trip_id, None)
+                self.reloads += 1
+
+    def _forget_stale(self, stale):
+        # Under the lock: the trips loaded since, except those invalidated again meanwhile
+        loaded = [trip_id for trip_id, count in stale.items() if self._stale_trips.get(trip_id) == count]
+        for trip_id in loaded:
+            del self._stale_trips[trip_id]
+        return loaded
+
+    @staticmethod
+    def _query_facets():
+        from extensions import db
+        from models import Stateroom
+
+        facets = {facet: {} for facet in FACETS}
+        for row in db.session.query(Stateroom.stateroom_id, *(getattr(Stateroom, f) for f in FACETS)):
+            bit = 1 << row.stateroom_id
+            for facet in FACETS:
+                value = getattr(row, facet)
+                facets[facet][value] = facets[facet].get(value, 0) | bit
+        return facets
+
+    @staticmethod
+    def _query_vacancy(trip_ids=None):
+        """trip_id -> bitset of vacant stateroom ids, of every trip or the given ones."""
+        from extensions import db
+        from models import StateroomPrice
+
+        query = db.session.query(StateroomPrice.trip_id, StateroomPrice.stateroom_id, StateroomPrice.is_vacant)
+        if trip_ids is not None:
+            query = query.filter(StateroomPrice.trip_id.in_(list(trip_ids)))
+        vacant = {}
+        for trip_id, stateroom_id, is_vacant in query:
+            bits = vacant.get(trip_id, 0)
+            vacant[trip_id] = bits | (1 << stateroom_id) if is_vacant else bits
+        return vacant
+
+    def _filter_bits(self, filters):
+        """AND of the facet filters, each an OR of its values; None if there are no filters."""
+        mask = None
+        for facet, values in filters.items():
+            if facet not in FACETS:
+                raise ValueError(f"Unknown availability filter: {facet}")
+            if not values:
+                continue
+            bits = 0
+            for value in values:
+                bits |= self._facets[facet].get(value, 0)
+            mask = bits if mask is None else mask & bits
+        return mask
+
+    def _vacant_bits(self, trip_id, filters):
+        self._load()
+        with self._lock:
+            bits = self._vacant.get(trip_id)
+            if bits is None:
+                return None
+            mask = self._filter_bits(filters)
+        return bits if mask is None else bits & mask
+
+    def count(self, trip_id, **filters):
+        """
+        Count the vacant staterooms of a trip.
+
+        Args:
+            trip_id (int): The trip.
+            **filters: Facet values to match, e.g. num_bed=[4] or stateroom_type=['Family Balcony'].
+
+        Returns:
+            int: The number of vacant staterooms, or None if the trip has no priced staterooms.
+        """
+        bits = self._vacant_bits(trip_id, filters)
+        return None if bits is None else bits.bit_count()
+
+    def vacant_ids(self, trip_id, **filters):
+        """
+        Returns:
+            list: The ids of the vacant staterooms of a trip matching the filters, in order,
+            or None if the trip has no priced staterooms.
+        """
+        bits = self._vacant_bits(trip_id, filters)
+        return None if bits is None else _bits_to_ids(bits)
+
+    def trips_with_vacancy(self, **filters):
+        """
+        Returns:
+            dict: trip_id -> number of vacant staterooms matching the filters, for every trip
+            with at least one.
+        """
+        self._load()
+        with self._lock:
+            mask = self._filter_bits(filters)
+            counts = {
+                trip_id: (bits if mask is None else bits & mask).bit_count()
+                for trip_id, bits in self._vacant.items()
+            }
+        return {trip_id: count for trip_id, count in counts.items() if count}
+
+    def set_vacancy(self, trip_id, stateroom_id, is_vacant):
+        """
+        Update one stateroom of a trip in place. Trips that aren't loaded are left alone.
+        """
+        with self._lock:
+            if self._building:
+                self._recent.append((trip_id, stateroom_id, is_vacant))
+            bits = self._vacant.get(trip_id)
+            if bits is None:
+                return
+            bit = 1 << stateroom_id
+            self._vacant[trip_id] = bits | bit if is_vacant else bits & ~bit
+
+    def invalidate(self):
+        """
+        Drop the index so it is rebuilt on the next query.
+        """
+        with self._lock:
+            self._generation += 1
+            self._expires_at = 0
+            self._facets = {}
+            self._vacant = {}
+            self._stale_trips = {}
+
+    def invalidate_trips(self, trip_ids):
+        """
+        Reload the vacancy of the given trips on the next query, keeping the rest of the index.
+
+        Args:
+            trip_ids (iterable): The trips.
+        """
+        with self._lock:
+            for trip_id in trip_ids:
+                self._stale_trips[trip_id] = self._stale_trips.get(trip_id, 0) + 1
+
+    def apply_changes(self, changes):
+        """
+        Drop what the writes of another process made stale: the trips written to, or the
+        whole index if staterooms, or prices and trips of unknown trips, were written.
+
+        Args:
+            changes (dict): Table name -> set of trip ids written, or None for the whole table
+                (see cache.TableChangeLog).
+        """
+        trip_ids = set()
+        for table_name in _INDEXED_TABLES.intersection(changes):
+            if changes[table_name] is None or table_name == 'cyz_stateroom':
+                self.invalidate()
+                return
+            trip_ids |= changes[table_name]
+        if trip_ids:
+            self.invalidate_trips(trip_ids)
+
+    def stats(self):
+        """
+        Returns:
+            dict: The index size and number of builds, for monitoring.
+        """
+        with self._lock:
+            return {
+                "trips": len(self._vacant),
+                "builds": self.builds,
+                "reloads": self.reloads,
+                "stale_trips": len(self._stale_trips),
+                "ttl": self.ttl,
+                "fresh": self._expires_at > time.monotonic(),
+            }
+
+    def track_writes(self, session):
+        """
+        Keep the index consistent with the commits of a session: apply the recorded vacancy
+        changes and invalidate the index when staterooms, prices or trips are written
+        any other way.
+
+        Args:
+            session: The session, session class or scoped session to listen on (e.g. db.session).
+        """
+        @event.listens_for(session, 'after_flush')
+        def _after_flush(session, flush_context):
+            for obj in chain(session.new, session.dirty, session.deleted):
+                if obj.__table__.name in _INDEXED_TABLES:
+                    session.info['vacancy_stale'] = True
+
+        @event.listens_for(session, 'do_orm_execute')
+        def _do_orm_execute(orm_execute_state):
+            if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+                return
+            table = getattr(orm_execute_state.statement, 'table', None)
+            if table is not None and table.name in _INDEXED_TABLES \
+                    and not orm_execute_state.execution_options.get(AVAILABILITY_TRACKED):
+                orm_execute_state.session.info['vacancy_stale'] = True
+
+        @event.listens_for(session, 'after_commit')
+        def _after_commit(session):
+            changes = session.info.pop('vacancy_changes', ())
+            if session.info.pop('vacancy_stale', False):
+                self.invalidate()
+                return
+            for trip_id, stateroom_id, is_vacant in changes:
+                self.set_vacancy(trip_id, stateroom_id, is_vacant)
+
+        @event.listens_for(session, 'after_rollback')
+        def _after_rollback(session):
+            session.info.pop('vacancy_changes', None)
+            session.info.pop('vacancy_stale', None)
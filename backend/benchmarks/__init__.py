@@ -0,0 +1,8 @@
+"""
+Benchmarks for the backend. Run them from the backend/ directory, e.g.
+
+    python -m benchmarks.bench_login
+
+fleet.py generates synthetic data at any scale, and load.py drives every route on it,
+saving per-endpoint latency percentiles as JSON to compare between commits.
+"""
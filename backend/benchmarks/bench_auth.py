@@ -0,0 +1,107 @@
+"""
+Per-request authentication overhead: login session cookie vs bearer token claims.
+
+Seeds a scratch database with --passengers users and passengers, then times a minimal
+view that needs the caller's group (as the booking and package routes do) through the
+test client, authenticated three ways:
+
+- none: the same view without authentication, as the baseline to subtract;
+- session: the login session cookie, with the Passenger lookup by user_id it implies;
+- token: an `Authorization: Bearer` token, resolved from its verified claims alone.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth --passengers 100000 --requests 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--passengers', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    # A key long enough for HS256, so PyJWT doesn't warn on every request
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-' + 'x' * 32)
+    # Imported after DATABASE_URL is set so the app uses the scratch database
+    from flask import jsonify
+    from app import create_app
+    from extensions import db
+    from identity import current_identity, issue_token, login_required
+    from models import Passenger, User
+    app = create_app()
+
+    def whoami():
+        return jsonify({"group_id": current_identity().group_id})
+
+    def anonymous():
+        return jsonify({"group_id": None})
+
+    app.add_url_rule('/bench/whoami', 'bench_whoami', login_required(whoami))
+    app.add_url_rule('/bench/anonymous', 'bench_anonymous', anonymous)
+
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.execute(db.insert(User), [
+                {"user_id": i, "username": f"user{i}", "password": "-",
+                 "email": f"user{i}@example.com", "user_type": "passenger"}
+                for i in range(1, args.passengers + 1)
+            ])
+            db.session.execute(db.insert(Passenger), [
+                {"passenger_id": i, "user_id": i, "group_id": i // 4 + 1, "passenger_fname": "Bench",
+                 "passenger_lname": str(i), "birth_date": 0, "gender": "other", "nationality": "-",
+                 "phone": "-", "addr_id": 1}
+                for i in range(1, args.passengers + 1)
+            ])
+            db.session.commit()
+            user_id = args.passengers // 2
+            with app.test_request_context():
+                token = issue_token(db.session.get(User, user_id),
+                                    db.session.get(Passenger, user_id))
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['user_type'] = 'passenger'
+        cookie_client = client
+        token_client = app.test_client()
+        bearer = {'Authorization': f'Bearer {token}'}
+
+        runs = {
+            "none": lambda: token_client.get('/bench/anonymous'),
+            "session": lambda: cookie_client.get('/bench/whoami'),
+            "token": lambda: token_client.get('/bench/whoami', headers=bearer),
+        }
+        results = {}
+        for name, send in runs.items():
+            for _ in range(50):  # warm up
+                send()
+            latencies = []
+            for _ in range(args.requests):
+                began = time.perf_counter()
+                response = send()
+                latencies.append((time.perf_counter() - began) * 1000)
+                assert response.status_code == 200, (name, response.status_code, response.get_json())
+            results[name] = latencies
+
+        baseline = statistics.median(results["none"])
+        print(f"{args.passengers} passengers, {args.requests} requests each")
+        for name, latencies in results.items():
+            median = statistics.median(latencies)
+            print(f"  {name:<8} p50 {median:7.3f} ms   p95 {statistics.quantiles(latencies, n=20)[-1]:7.3f} ms"
+                  f"   auth overhead {median - baseline:7.3f} ms")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Concurrent stateroom booking load test.
+
+Many clients race to book the cabins of one trip through POST /Passenger/RoomOrder, each
+picking cabins at random so most attempts collide with another client. At the end the
+booking table is checked for double bookings and the throughput is reported.
+
+Usage (from backend/):
+    python -m benchmarks.bench_booking --clients 50 --cabins 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+
+def seed(db, models, cabins, clients):
+    """Create one trip with `cabins` vacant staterooms and one passenger group per client."""
+    db.session.add(models.Address(addr_id=1, street='1 Harbour Rd', city='Miami',
+                                  state_province='FL', postal_code='33101', country='USA'))
+    db.session.add(models.Port(port_id=1, port_name='Miami Port', num_parking_spots=100, addr_id=1))
+    db.session.add(models.Trip(trip_id=1, start_date=1735689600, end_date=1735689600 + 5 * DAY,
+                               start_port_id=1, end_port_id=1, length_days=5))
+    db.session.execute(db.insert(models.Stateroom), [
+        {"stateroom_id": i, "stateroom_type": "Inside", "location": "forward", "num_bed": 2,
+         "num_bathroom": 1, "num_balcony": 0, "size_sqft": 200, "room_number": i}
+        for i in range(1, cabins + 1)
+    ])
+    db.session.execute(db.insert(models.StateroomPrice), [
+        {"stateroom_id": i, "price_per_night": 100.0, "total_price": 500.0, "trip_id": 1, "is_vacant": True}
+        for i in range(1, cabins + 1)
+    ])
+    for i in range(1, clients + 1):
+        db.session.add(models.Group(group_id=i))
+        db.session.add(models.User(user_id=i, username=f"client{i}", password='-',
+                                   email=f"client{i}@example.com", user_type='passenger'))
+        db.session.add(models.Passenger(birth_date=0, gender='other', nationality='-', phone='-',
+                                        addr_id=1, group_id=i, passenger_fname='Load',
+                                        passenger_lname=str(i), user_id=i))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--cabins', type=int, default=500)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    # Imported after DATABASE_URL is set so the app uses the scratch database
+    import models
+    from app import create_app
+    from extensions import db
+    app = create_app()
+
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(db, models, args.cabins, args.clients)
+
+        counts = {"booked": 0, "taken": 0, "errors": 0}
+        lock = threading.Lock()
+        start_gate = threading.Barrier(args.clients)
+
+        def client(user_id):
+            rng = random.Random(user_id)
+            http = app.test_client()
+            with http.session_transaction() as session:
+                session['user_id'] = user_id
+                session['user_type'] = 'passenger'
+            start_gate.wait()
+            for _ in range(args.cabins * 2 // args.clients):
+                response = http.post('/Passenger/RoomOrder', json={
+                    "stateroomId": rng.randint(1, args.cabins), "tripId": 1,
+                    "pay_amount": 500.0, "payment_method": "card"})
+                outcome = ("booked" if response.status_code == 200
+                           else "taken" if response.status_code == 400 else "errors")
+                with lock:
+                    counts[outcome] += 1
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(1, args.clients + 1)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            double_booked = db.session.execute(db.text(
+                "SELECT COUNT(*) FROM (SELECT price_id FROM cyz_stateroom_booking "
+                "GROUP BY price_id HAVING COUNT(*) > 1)")).scalar()
+            bookings = db.session.execute(db.text("SELECT COUNT(*) FROM cyz_stateroom_booking")).scalar()
+            occupied = db.session.execute(db.text(
+                "SELECT COUNT(*) FROM cyz_stateroom_price WHERE is_vacant = 0")).scalar()
+
+        print(f"{args.clients} clients, {args.cabins} cabins, {sum(counts.values())} attempts in {elapsed:.2f}s")
+        print(f"  booked {counts['booked']}, already taken {counts['taken']}, errors {counts['errors']}")
+        print(f"  bookings/sec {counts['booked'] / elapsed:.1f}")
+        print(f"  rows: {bookings} bookings, {occupied} occupied cabins, {double_booked} double-booked cabins")
+        return 1 if double_booked or bookings != counts['booked'] or occupied != bookings else 0
+    finally:
+        os.unlink(db_file)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Mixed read/write throughput of SQLite with the default settings vs the configured pragmas.
+
+Reader threads repeatedly run the RoomDetail query (vacant cabins of a trip) while writer
+threads flip is_vacant on random cabins, one transaction per write, for a fixed time.
+Each mode runs against its own fresh database file, since journal_mode=WAL sticks to the
+file once set.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_concurrency --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+ROOMS_QUERY = text(
+    "SELECT s.stateroom_id, s.stateroom_type, sp.price_per_night, sp.total_price "
+    "FROM cyz_stateroom_price sp JOIN cyz_stateroom s ON s.stateroom_id = sp.stateroom_id "
+    "WHERE sp.trip_id = :trip_id AND sp.is_vacant = 1")
+TOGGLE_QUERY = text(
+    "UPDATE cyz_stateroom_price SET is_vacant = NOT is_vacant WHERE price_id = :price_id")
+
+
+def seed(engine, db, trips, cabins):
+    """Create the schema with `trips` trips of `cabins` priced staterooms each."""
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO cyz_stateroom (stateroom_id, stateroom_type, location, num_bed, num_bathroom, "
+            "num_balcony, size_sqft, room_number) VALUES (:id, 'Inside', 'forward', 2, 1, 0, 200, :id)"),
+            [{"id": i} for i in range(1, cabins + 1)])
+        conn.execute(text(
+            "INSERT INTO cyz_stateroom_price (stateroom_id, price_per_night, total_price, trip_id, is_vacant) "
+            "VALUES (:stateroom_id, 100.0, 500.0, :trip_id, 1)"),
+            [{"stateroom_id": s, "trip_id": t} for t in range(1, trips + 1) for s in range(1, cabins + 1)])
+
+
+def run(engine, args, max_price_id):
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def reader():
+        done = 0
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                conn.execute(ROOMS_QUERY, {"trip_id": random.randint(1, args.trips)}).fetchall()
+                conn.rollback()  # end the read transaction so writers can checkpoint
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(TOGGLE_QUERY, {"price_id": random.randint(1, max_price_id)})
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--trips', type=int, default=20)
+    parser.add_argument('--cabins', type=int, default=200)
+    parser.add_argument('--env', default='production', help="config whose SQLITE_PRAGMAS are used")
+    args = parser.parse_args()
+
+    from config import get_config
+    from database import install_sqlite_pragmas
+    # Through the models module, which registers the tables on db.metadata
+    from models import db
+
+    config = get_config(args.env)
+    pool_options = {"pool_size": args.readers + args.writers, "max_overflow": 0}
+    modes = [("default", {}), (f"tuned ({args.env})", config.SQLITE_PRAGMAS)]
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per mode")
+    for label, pragmas in modes:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        engine = create_engine(f'sqlite:///{db_file}', **pool_options)
+        install_sqlite_pragmas(engine, pragmas)
+        try:
+            seed(engine, db, args.trips, args.cabins)
+            counts = run(engine, args, args.trips * args.cabins)
+        finally:
+            engine.dispose()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_file + suffix):
+                    os.remove(db_file + suffix)
+        print(f"{label:>22}: {counts['reads'] / args.seconds:9.1f} reads/s  "
+              f"{counts['writes'] / args.seconds:8.1f} writes/s  {counts['errors']} lock errors")
+
+
+if __name__ == '__main__':
+    main()
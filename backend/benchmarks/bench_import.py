@@ -0,0 +1,104 @@
+"""
+Throughput of POST /Admin/Import against one POST /Admin/ManageItinerary per stop.
+
+A scratch copy of cruise.db gets --trips new trips with --stops port calls each, first
+through the bulk import (JSON, or CSV with --csv) in a single request, then a sample of
+--sample stops through the per-row endpoint, whose time is extrapolated to the same
+number of rows.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import --trips 1000 --stops 100
+"""
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEASON_START = datetime(2030, 1, 1)
+
+
+def season(trips, stops):
+    """Trips of `stops` days back to back, each with one 10-hour port call a day."""
+    trip_rows, itinerary_rows = [], []
+    for t in range(trips):
+        start = SEASON_START + timedelta(days=t * (stops + 1))
+        trip_rows.append({"ref": f"t{t}", "start_date": start.strftime('%Y-%m-%d'),
+                          "end_date": (start + timedelta(days=stops + 1)).strftime('%Y-%m-%d'),
+                          "start_port_id": 1, "end_port_id": 2})
+        for s in range(stops):
+            arrival = start + timedelta(days=s + 1, hours=8)
+            itinerary_rows.append({"trip_ref": f"t{t}", "port_id": 1 + s % 2,
+                                   "arrival_date_time": arrival.strftime('%Y-%m-%d %H:%M:%S'),
+                                   "leaving_date_time": (arrival + timedelta(hours=10)).strftime('%Y-%m-%d %H:%M:%S')})
+    return trip_rows, itinerary_rows
+
+
+def to_csv(rows):
+    fields = list(rows[0])
+    lines = [','.join(fields)] + [','.join(str(row[f]) for f in fields) for row in rows]
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--trips', type=int, default=1000)
+    parser.add_argument('--stops', type=int, default=100)
+    parser.add_argument('--sample', type=int, default=200, help="stops sent one at a time for comparison")
+    parser.add_argument('--csv', action='store_true', help="upload CSV files instead of JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        db_file = os.path.join(directory, 'cruise.db')
+        shutil.copy(os.path.join(BACKEND, 'cruise.db'), db_file)
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+        # Imported after DATABASE_URL is set so the app uses the scratch database
+        from app import create_app
+        app = create_app()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+            session['user_type'] = 'admin'
+
+        trip_rows, itinerary_rows = season(args.trips, args.stops)
+        # An empty trip after the season for the one-at-a-time comparison
+        sample_start = SEASON_START + timedelta(days=args.trips * (args.stops + 1))
+        trip_rows.append({"ref": "sample", "start_date": sample_start.strftime('%Y-%m-%d'),
+                          "end_date": (sample_start + timedelta(days=args.sample)).strftime('%Y-%m-%d'),
+                          "start_port_id": 1, "end_port_id": 1})
+        began = time.perf_counter()
+        if args.csv:
+            response = client.post('/Admin/Import', content_type='multipart/form-data', data={
+                'trips': (to_csv(trip_rows), 'trips.csv'),
+                'itineraries': (to_csv(itinerary_rows), 'itineraries.csv'),
+            })
+        else:
+            response = client.post('/Admin/Import', json={"trips": trip_rows, "itineraries": itinerary_rows})
+        bulk = time.perf_counter() - began
+        assert response.status_code == 201, response.get_json()
+        print(f"bulk import ({'CSV' if args.csv else 'JSON'}): {len(trip_rows)} trips, {len(itinerary_rows)} itineraries "
+              f"in {bulk:.2f}s ({len(itinerary_rows) / bulk:,.0f} rows/s)")
+
+        # The same kind of stops one request at a time, on the sample trip
+        trip_id = response.get_json()["trip_ids"][-1]
+        began = time.perf_counter()
+        for s in range(args.sample):
+            arrival = sample_start + timedelta(hours=s * 12)
+            response = client.post('/Admin/ManageItinerary', json={
+                "trip_id": trip_id, "port_id": 1,
+                "arrival_date_time": arrival.strftime('%Y-%m-%d %H:%M:%S'),
+                "leaving_date_time": (arrival + timedelta(hours=10)).strftime('%Y-%m-%d %H:%M:%S')})
+            assert response.status_code == 201, response.get_json()
+        single = (time.perf_counter() - began) / args.sample
+        print(f"one at a time: {single * 1000:.2f} ms per itinerary, "
+              f"~{single * len(itinerary_rows):.0f}s for {len(itinerary_rows)} itineraries")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
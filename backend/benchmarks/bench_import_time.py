@@ -0,0 +1,82 @@
+"""
+Cold-start cost of importing the app and building it with create_app().
+
+Each run starts a fresh interpreter with `python -X importtime`, so nothing is cached
+between runs, and reports the median of:
+- `import app` alone, which should stay cheap (no models, views or Alembic)
+- `import app` + create_app('testing'), i.e. what every worker and test pays
+along with the slowest modules. Modules that must not be imported at all are checked
+too: the script exits with status 1 when a budget is exceeded or a deferred module is
+imported eagerly. tests/test_import_time.py runs the same checks in the test suite.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import_time --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'import app': "import app",
+    'create_app()': "import app; app.create_app('testing')",
+}
+# Modules each scenario must not import; they are deferred until first use
+DEFERRED = {
+    'import app': ('models', 'blueprints.auth', 'blueprints.passenger', 'blueprints.admin',
+                   'flask_migrate', 'alembic', 'flask_talisman', 'numpy'),
+    'create_app()': ('flask_migrate', 'alembic', 'flask_talisman', 'numpy'),
+}
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def measure(code):
+    """
+    Returns:
+        tuple: Wall time in seconds and {module: cumulative microseconds} of one fresh run.
+    """
+    began = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND,
+                            env={**os.environ, 'PYTHONPATH': BACKEND},
+                            capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - began
+    modules = {}
+    for match in LINE.finditer(result.stderr):
+        modules[match.group(4)] = int(match.group(2))
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="number of slowest modules to list")
+    parser.add_argument('--budget-ms', type=float, help="fail if create_app() takes longer (median wall time)")
+    args = parser.parse_args()
+
+    failed = False
+    for label, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(args.runs)]
+        wall = statistics.median(elapsed for elapsed, _ in runs) * 1000
+        modules = runs[-1][1]
+        print(f"{label}: median {wall:.0f} ms wall over {args.runs} runs, {len(modules)} modules")
+        for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        eager = [name for name in DEFERRED[label] if name in modules]
+        if eager:
+            print(f"  FAIL: imported eagerly: {', '.join(eager)}")
+            failed = True
+        if args.budget_ms and label == 'create_app()' and wall > args.budget_ms:
+            print(f"  FAIL: over the {args.budget_ms:.0f} ms budget")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Itinerary conflict checks: the interval tree against a brute-force scan.
+
+Times single-stop checks with ItinerarySchedule and whole-schedule validation with
+find_schedule_conflicts() against a pairwise scan at growing schedule sizes. Their
+correctness against the brute-force oracle is checked by tests/test_itinerary_conflicts.py.
+
+Usage (from backend/):
+    python -m benchmarks.bench_itinerary_conflicts --sizes 100 1000 10000
+"""
+import argparse
+import random
+import time
+
+from itinerary import ItinerarySchedule, find_schedule_conflicts
+
+HOUR = 60 * 60
+
+
+def random_interval(rng, horizon):
+    start = rng.randrange(horizon)
+    # Mostly short port calls, some long enough to enclose others, some empty or reversed
+    return start, start + rng.choice([rng.randint(1, 12), rng.randint(12, 120), rng.randint(-2, 0)]) * HOUR
+
+
+def brute_conflicts(intervals, start, end):
+    return sorted(interval for interval in intervals if start < interval[1] and interval[0] < end)
+
+
+def timed(function, repeat):
+    began = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - began) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        # A realistic schedule: back-to-back non-overlapping stops
+        stops = [(i * 24 * HOUR, i * 24 * HOUR + 10 * HOUR) for i in range(size)]
+        schedule = ItinerarySchedule(stops)
+        probes = [random_interval(rng, size * 24 * HOUR) for _ in range(200)]
+        probe = iter(probes * 1000)
+        tree = timed(lambda: schedule.has_conflict(*next(probe)), 1000)
+        scan = timed(lambda: brute_conflicts(stops, *next(probe)), 200)
+        bulk = timed(lambda: find_schedule_conflicts(stops, 0, size * 24 * HOUR), 3)
+        print(f"  {size:6d} stops: check one stop {tree * 1e6:8.1f} us (scan {scan * 1e6:9.1f} us)  "
+              f"validate whole schedule {bulk * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Login latency with and without the per-request debug dump of the user table.
+
+`login` used to call `print(User.query.all())` on every attempt. This benchmark fills a
+scratch database with many users and times POST /login as it is now, then again with
+that dump re-added, so the cost of leaving debug output on a hot path is visible.
+
+Bench users get a single-iteration password hash so the database work is not hidden
+behind the hash cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login --users 100000 --requests 200
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    # Match the bench users' hashes so logins don't trigger a rehash
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1'
+    # Imported after DATABASE_URL is set so the app uses the scratch database
+    from flask import request
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from extensions import db
+    app = create_app()
+    from models import User
+
+    try:
+        with app.app_context():
+            db.create_all()
+            password = generate_password_hash('bench', method='pbkdf2:sha256:1')
+            db.session.execute(db.insert(User), [
+                {"username": f"user{i}", "password": password,
+                 "email": f"user{i}@example.com", "user_type": "passenger"}
+                for i in range(args.users)
+            ])
+            db.session.commit()
+
+        # The old debug dump, switched on for the second run only
+        legacy_dump = {"enabled": False}
+
+        @app.before_request
+        def dump_users():
+            if legacy_dump["enabled"] and request.endpoint == 'auth.login':
+                print(User.query.all())
+
+        client = app.test_client()
+
+        def run():
+            timings = []
+            for i in range(args.requests):
+                username = f"user{i * 7919 % args.users}"
+                start = time.perf_counter()
+                response = client.post('/login', json={"username": username, "password": "bench"})
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.get_json()
+            return timings
+
+        current = run()
+        legacy_dump["enabled"] = True
+        with redirect_stdout(io.StringIO()):
+            legacy = run()
+
+        print(f"{args.users} users, {args.requests} logins")
+        for name, timings in (("without debug dump", current), ("with debug dump", legacy)):
+            print(f"  {name:<20} mean {statistics.mean(timings):8.2f} ms"
+                  f"   p95 {statistics.quantiles(timings, n=20)[-1]:8.2f} ms")
+    finally:
+        os.unlink(db_file)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
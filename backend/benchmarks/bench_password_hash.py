@@ -0,0 +1,71 @@
+"""
+Login throughput per core for each password hash setting.
+
+Verifying the password is by far the most expensive part of POST /login, so the number
+of hash verifications one core can do per second is the ceiling for logins/sec per core.
+The same numbers are measured through PasswordHasher with all workers busy, to show how
+throughput scales with PASSWORD_HASH_WORKERS.
+
+Usage (from backend/):
+    python -m benchmarks.bench_password_hash --seconds 3
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from passwords import PasswordHasher
+
+METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def verifications_per_second(stored_hash, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        check_password_hash(stored_hash, 'benchmark-password')
+        count += 1
+    return count / seconds
+
+
+def pooled_verifications_per_second(hasher, stored_hash, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        nonlocal count
+        while time.perf_counter() < deadline:
+            hasher.verify(stored_hash, 'benchmark-password')
+            count += 1
+
+    with ThreadPoolExecutor(hasher.workers) as clients:
+        for _ in range(hasher.workers):
+            clients.submit(client)
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print(f"{'method':<24}{'logins/s/core':>15}{f'pool x{args.workers}':>15}")
+    for method in METHODS:
+        stored_hash = generate_password_hash('benchmark-password', method=method)
+        single = verifications_per_second(stored_hash, args.seconds)
+        pooled = pooled_verifications_per_second(
+            PasswordHasher(method, workers=args.workers), stored_hash, args.seconds)
+        print(f"{method:<24}{single:>15.1f}{pooled:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
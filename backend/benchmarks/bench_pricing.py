@@ -0,0 +1,93 @@
+"""
+Latency of opening a trip with POST /Admin/PricingTemplate on a large ship.
+
+Seeds a scratch database with --cabins staterooms and an unpriced trip, then times a
+dry run and the real generation of all its prices in one request, and, for comparison,
+--sample cabins priced one POST /Admin/RoomPriceManage at a time, extrapolated to the
+whole ship.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pricing --cabins 3000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_room_search import LOCATIONS, TYPES
+
+RULES = {
+    "base_prices": dict(zip(TYPES, (90, 130, 210, 260, 420, 900))),
+    "location_multipliers": {"forward": 0.95, "aft": 1.1},
+    "balcony_multipliers": {"0": 1, "1": 1.1, "2": 1.2},
+    "sqft_tiers": [[0, 1], [400, 1.1], [800, 1.25]],
+}
+
+
+def seed(db, models, cabins):
+    """Create `cabins` staterooms with random attributes and two unpriced 7-day trips."""
+    rng = random.Random(42)
+    db.session.add(models.Address(addr_id=1, street='1 Harbour Rd', city='Miami',
+                                  state_province='FL', postal_code='33101', country='USA'))
+    db.session.add(models.Port(port_id=1, port_name='Miami Port', num_parking_spots=100, addr_id=1))
+    for trip_id in (1, 2):
+        trip = models.Trip(trip_id=trip_id, start_date=1735689600, end_date=1735689600 + 7 * 24 * 60 * 60,
+                           start_port_id=1, end_port_id=1)
+        trip.update_length()
+        db.session.add(trip)
+    db.session.execute(db.insert(models.Stateroom), [
+        {"stateroom_id": i, "stateroom_type": rng.choice(TYPES), "location": rng.choice(LOCATIONS),
+         "num_bed": rng.choice([1, 2, 4, 6]), "num_bathroom": rng.choice([1, 2]),
+         "num_balcony": rng.choice([0, 1, 2]), "size_sqft": rng.randint(150, 1200), "room_number": i}
+        for i in range(1, cabins + 1)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cabins', type=int, default=3000)
+    parser.add_argument('--sample', type=int, default=200, help="cabins priced one request at a time")
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    # Imported after DATABASE_URL is set so the app uses the scratch database
+    import models
+    from app import create_app
+    from extensions import db
+    app = create_app()
+
+    try:
+        with app.app_context():
+            db.create_all()
+            seed(db, models, args.cabins)
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+            session['user_type'] = 'admin'
+
+        for label, dry_run in (('dry run', True), ('generate', False)):
+            began = time.perf_counter()
+            response = client.post('/Admin/PricingTemplate', json={"trip_id": 1, "rules": RULES, "dry_run": dry_run})
+            elapsed = time.perf_counter() - began
+            assert response.status_code in (200, 201), response.get_json()
+            print(f"{label:9s}: {args.cabins} cabins in {elapsed * 1000:7.1f} ms")
+
+        began = time.perf_counter()
+        for stateroom_id in range(1, args.sample + 1):
+            response = client.post('/Admin/RoomPriceManage', json={
+                "trip_id": 2, "stateroom_id": stateroom_id, "price_per_night": 100, "is_vacant": True})
+            assert response.status_code == 201, response.get_json()
+        single = (time.perf_counter() - began) / args.sample
+        print(f"one at a time: {single * 1000:.2f} ms per cabin, ~{single * args.cabins:.1f}s for {args.cabins} cabins")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+
+
+if __name__ == '__main__':
+    main()
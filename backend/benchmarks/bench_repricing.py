@@ -0,0 +1,90 @@
+"""
+Dynamic repricing of a whole fleet: 5,000 cabins x 200 trips = 1M price rows by default.
+
+Seeds a scratch database (see bench_room_search.seed()), then times repricing() as a dry
+run (load + compute) and for real (+ bulk UPDATE of the changed rows). The vectorized
+prices are also checked against a plain per-row Python version of the same policy, which
+is timed for comparison.
+
+Usage (from backend/, needs numpy):
+    python -m benchmarks.bench_repricing --cabins 5000 --trips 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_room_search import seed
+
+DAY = 24 * 60 * 60
+# The seeded trips depart daily from this time on
+FIRST_DEPARTURE = 1735689600
+
+
+def python_prices(policy, base, occupancy, days_left, size_ratio):
+    """The same policy one row at a time, as the reference for the vectorized version."""
+    prices = []
+    for b, occ, days, size in zip(base, occupancy, days_left, size_ratio):
+        price = b * (1 + policy.occupancy_weight * (occ - policy.target_occupancy))
+        ramp = min(max(1 - days / policy.late_window_days, 0), 1)
+        price *= 1 + ramp * (policy.late_premium if occ >= policy.target_occupancy else -policy.late_discount)
+        if policy.size_elasticity:
+            price *= size ** policy.size_elasticity
+        prices.append(round(min(max(price, b * policy.min_ratio), b * policy.max_ratio), 2))
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cabins', type=int, default=5000)
+    parser.add_argument('--trips', type=int, default=200)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    # Imported after DATABASE_URL is set so the app uses the scratch database
+    import numpy as np
+    import models
+    from app import create_app
+    from extensions import db
+    from repricing import RepricingPolicy, reprice
+    app = create_app()
+
+    try:
+        with app.app_context():
+            db.create_all()
+            began = time.perf_counter()
+            seed(db, models, args.cabins, args.trips)
+            print(f"seeded {args.cabins * args.trips:,} price rows in {time.perf_counter() - began:.1f}s")
+
+            # Every trip is still to depart, the first 30 within the late window
+            now = FIRST_DEPARTURE - DAY
+            policy = RepricingPolicy(size_elasticity=0.1)
+            for label, dry_run in (('dry run', True), ('reprice', False)):
+                began = time.perf_counter()
+                result = reprice(policy=policy, dry_run=dry_run, now=now)
+                print(f"{label:8s}: {result['rows']:,} rows of {result['trips']} trips, {result['changed']:,} changed "
+                      f"in {time.perf_counter() - began:.2f}s")
+
+            # The vectorized computation against the per-row reference, on the same inputs
+            rng = np.random.default_rng(0)
+            n = 200000
+            inputs = (rng.uniform(50, 1000, n).round(2), rng.uniform(0, 1, n),
+                      rng.uniform(-5, 120, n), rng.uniform(0.5, 2, n))
+            began = time.perf_counter()
+            vectorized = policy.prices(*inputs)
+            vector_time = time.perf_counter() - began
+            began = time.perf_counter()
+            reference = python_prices(policy, *(array.tolist() for array in inputs))
+            python_time = time.perf_counter() - began
+            mismatches = int(np.sum(np.abs(vectorized - np.array(reference)) > 0.011))
+            print(f"compute {n:,} prices: numpy {vector_time * 1000:.1f} ms, per-row python "
+                  f"{python_time * 1000:.1f} ms, {mismatches} mismatches")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+
+
+if __name__ == '__main__':
+    main()
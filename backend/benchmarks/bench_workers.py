@@ -0,0 +1,162 @@
+"""
+HTTP throughput of the gunicorn deployment at different worker counts.
+
+For each worker count a gunicorn server (gunicorn.conf.py, wsgi:app) is started on a
+scratch copy of cruise.db, and a pool of client threads logs in once each and then
+requests the given paths round-robin for a fixed time over keep-alive connections.
+Requests/sec and latency percentiles are printed per worker count.
+
+Requests carry `X-Forwarded-Proto: https` as a TLS-terminating proxy would, since the
+production config redirects plain HTTP. Client threads share this process's GIL, so on
+small machines the client itself may be the bottleneck; run it on a box with spare cores
+(or point --clients at a higher number) before drawing conclusions.
+
+Usage (from backend/, needs gunicorn installed):
+    python -m benchmarks.bench_workers --workers 1 4 8 --clients 32 --seconds 10
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATHS = [
+    '/',
+    '/Passenger/Trip?start_date=2025-01-01&end_date=2026-12-31',
+    '/Passenger/Restaurant',
+    '/Passenger/RoomDetail?trip_id=1',
+]
+HEADERS = {'X-Forwarded-Proto': 'https', 'Content-Type': 'application/json'}
+BENCH_USER_ID = 3
+BENCH_PASSWORD = 'bench'
+
+
+def prepare_database(directory):
+    """Copy cruise.db and give the bench user a cheap-to-verify password."""
+    from werkzeug.security import generate_password_hash
+    import sqlite3
+
+    db_file = os.path.join(directory, 'cruise.db')
+    shutil.copy(os.path.join(BACKEND, 'cruise.db'), db_file)
+    with sqlite3.connect(db_file) as conn:
+        username = conn.execute('SELECT username FROM cyz_user WHERE user_id = ?',
+                                (BENCH_USER_ID,)).fetchone()[0]
+        conn.execute('UPDATE cyz_user SET password = ? WHERE user_id = ?',
+                     (generate_password_hash(BENCH_PASSWORD, 'pbkdf2:sha256:1'), BENCH_USER_ID))
+    return db_file, username
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not start listening on port {port}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def login(port, username):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/login', json.dumps({'username': username, 'password': BENCH_PASSWORD}), HEADERS)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"bench login failed with {response.status}")
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def drive(port, username, paths, clients, seconds):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client():
+        headers = {**HEADERS, 'Cookie': login(port, username)}
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own, failed, i = [], 0, 0
+        start.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            try:
+                conn.request('GET', paths[i % len(paths)], headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+            own.append(time.perf_counter() - began)
+            i += 1
+        conn.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    start.wait()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--path', action='append', dest='paths', help="path to request (repeatable)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    directory = tempfile.mkdtemp()
+    try:
+        db_file, username = prepare_database(directory)
+        env = {**os.environ, 'CRUISE_ENV': 'production', 'DATABASE_URL': f'sqlite:///{db_file}',
+               'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1'}
+        print(f"{args.clients} clients, {args.seconds:.0f}s per run, {os.cpu_count()} CPUs")
+        for workers in args.workers:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(workers),
+                 '--bind', f'127.0.0.1:{port}', 'wsgi:app'],
+                cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_port(port)
+                latencies, errors = drive(port, username, paths, args.clients, args.seconds)
+            finally:
+                server.terminate()
+                server.wait()
+            cuts = statistics.quantiles(latencies, n=100)
+            print(f"  {workers:2d} workers: {len(latencies) / args.seconds:8.1f} req/s  "
+                  f"p50 {cuts[49] * 1000:7.2f} ms  p95 {cuts[94] * 1000:7.2f} ms  "
+                  f"p99 {cuts[98] * 1000:7.2f} ms  errors {errors}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
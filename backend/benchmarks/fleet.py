@@ -0,0 +1,230 @@
+"""
+Synthetic fleet data for load tests, generated into a SQLite file.
+
+Creates the schema with the app's models and fills it, from a fixed seed, with ports,
+one ship's staterooms, trips with itineraries, each stateroom priced on every trip,
+passengers in groups (with their users and addresses), stateroom bookings with their
+invoices and payments, package sales, restaurants and entertainments.
+
+Every user's password is BENCH_PASSWORD, hashed with a single pbkdf2 iteration so logins
+measure the app rather than the hash; run the app with PASSWORD_HASH_METHOD=pbkdf2:sha256:1
+to keep it from rehashing. The admin is `admin0`, the passengers `passenger<N>`.
+
+Usage (from backend/):
+    python -m benchmarks.fleet /tmp/fleet.db --scale medium
+    python -m benchmarks.fleet /tmp/fleet.db --scale small --trips 500
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.bench_room_search import LOCATIONS, TYPES
+
+BENCH_PASSWORD = 'bench'
+BENCH_JWT_SECRET_KEY = 'bench-jwt-secret-key-' + 'x' * 32
+DAY = 24 * 60 * 60
+# First departure; trips then leave every other day
+EPOCH = 1767225600  # 2026-01-01
+
+# Row counts per preset; any of them can be overridden on the command line
+SCALES = {
+    'small': dict(ports=10, staterooms=300, trips=20, stops=4, passengers=2000, group_size=4,
+                  booked=0.5, packages=10, restaurants=10, entertainments=10),
+    'medium': dict(ports=50, staterooms=2000, trips=100, stops=6, passengers=20000, group_size=4,
+                   booked=0.5, packages=20, restaurants=20, entertainments=20),
+    'large': dict(ports=200, staterooms=5000, trips=400, stops=8, passengers=200000, group_size=4,
+                  booked=0.5, packages=40, restaurants=40, entertainments=40),
+}
+
+
+def _insert(db, model, rows, batch=50000):
+    for start in range(0, len(rows), batch):
+        db.session.execute(db.insert(model), rows[start:start + batch])
+
+
+def generate(db, models, seed=42, **scale):
+    """
+    Fill an empty database with a synthetic fleet.
+
+    Args:
+        db: The Flask-SQLAlchemy extension, inside an app context.
+        models: The models module.
+        seed (int): The random seed; the same seed and scale give the same data.
+        **scale: The row counts, as in SCALES.
+
+    Returns:
+        dict: The number of rows written per table.
+    """
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    trips, staterooms = scale['trips'], scale['staterooms']
+    trip_length = scale['stops'] + 2
+
+    addresses = [{"addr_id": i, "street": f"{i} Harbour Rd", "city": f"City {i % 97}",
+                  "state_province": "FL", "postal_code": f"{10000 + i}", "country": "USA"}
+                 for i in range(1, scale['ports'] + scale['passengers'] + 1)]
+    _insert(db, models.Address, addresses)
+    _insert(db, models.Port, [
+        {"port_id": i, "port_name": f"Port {i}", "num_parking_spots": rng.randint(50, 500), "addr_id": i}
+        for i in range(1, scale['ports'] + 1)
+    ])
+
+    trip_rows, stops = [], []
+    for t in range(1, trips + 1):
+        start = EPOCH + (t - 1) * 2 * DAY
+        ports = rng.sample(range(1, scale['ports'] + 1), min(scale['stops'] + 2, scale['ports']))
+        trip_rows.append({"trip_id": t, "start_date": start, "end_date": start + trip_length * DAY,
+                          "start_port_id": ports[0], "end_port_id": ports[-1], "length_days": trip_length})
+        for s in range(scale['stops']):
+            arrival = start + (s + 1) * DAY + 8 * 60 * 60
+            stops.append({"trip_id": t, "port_id": ports[(s + 1) % len(ports)],
+                          "arrival_date_time": arrival, "leaving_date_time": arrival + 10 * 60 * 60})
+    _insert(db, models.Trip, trip_rows)
+    _insert(db, models.Itinerary, stops)
+
+    rooms = [{"stateroom_id": i, "stateroom_type": rng.choice(TYPES), "location": rng.choice(LOCATIONS),
+              "num_bed": rng.choice([1, 2, 4, 6]), "num_bathroom": rng.choice([1, 2]),
+              "num_balcony": rng.choice([0, 1, 2]), "size_sqft": rng.randint(150, 1200), "room_number": i}
+             for i in range(1, staterooms + 1)]
+    _insert(db, models.Stateroom, rooms)
+    prices = []
+    for t in range(1, trips + 1):
+        for room in rooms:
+            per_night = round(room["size_sqft"] * rng.uniform(0.3, 0.6), 2)
+            prices.append({"price_id": len(prices) + 1, "stateroom_id": room["stateroom_id"], "trip_id": t,
+                           "price_per_night": per_night, "base_price_per_night": per_night,
+                           "total_price": per_night * trip_length, "is_vacant": True})
+
+    password = generate_password_hash(BENCH_PASSWORD, method='pbkdf2:sha256:1')
+    users = [{"user_id": 1, "username": "admin0", "password": password,
+              "email": "admin0@example.com", "user_type": "admin"}]
+    passengers = []
+    for i in range(1, scale['passengers'] + 1):
+        users.append({"user_id": i + 1, "username": f"passenger{i}", "password": password,
+                      "email": f"passenger{i}@example.com", "user_type": "passenger"})
+        passengers.append({"passenger_id": i, "user_id": i + 1, "group_id": (i - 1) // scale['group_size'] + 1,
+                           "passenger_fname": f"First{i}", "passenger_lname": f"Last{i}",
+                           "birth_date": EPOCH - rng.randint(18, 80) * 365 * DAY,
+                           "gender": rng.choice(['female', 'male', 'other']), "nationality": "USA",
+                           "phone": f"555-{i:07d}", "addr_id": scale['ports'] + i})
+    groups = passengers[-1]["group_id"] if passengers else 0
+    _insert(db, models.User, users)
+    _insert(db, models.Admin, [{"admin_id": 1, "user_id": 1, "admin_phone": "555-0000000",
+                                "admin_fname": "Bench", "admin_lname": "Admin"}])
+    _insert(db, models.Group, [{"group_id": g} for g in range(1, groups + 1)])
+    _insert(db, models.Passenger, passengers)
+
+    # A share of the groups books one vacant stateroom on a random trip
+    invoices, bookings, payments = [], [], []
+    booked = rng.sample(range(len(prices)), min(int(groups * scale['booked']), len(prices)))
+    for group_id, price_index in zip(rng.sample(range(1, groups + 1), len(booked)), booked):
+        price = prices[price_index]
+        price["is_vacant"] = False
+        invoice_id = len(invoices) + 1
+        billed = trip_rows[price["trip_id"] - 1]["start_date"] - rng.randint(10, 200) * DAY
+        invoices.append({"invoice_id": invoice_id, "payment_due": price["total_price"], "billing_date_time": billed})
+        bookings.append({"group_id": group_id, "invoice_id": invoice_id, "price_id": price["price_id"]})
+        payments.append({"payment_date": billed, "pay_amount": price["total_price"], "payment_method": "card",
+                         "trip_id": price["trip_id"], "group_id": group_id, "invoice_id": invoice_id})
+    _insert(db, models.StateroomPrice, prices)
+
+    package_rows = [{"package_id": i, "pkg_name": f"Package {i}", "pkg_price": rng.randint(20, 400),
+                     "pkg_charge_type": rng.choice(['per night', 'per trip'])}
+                    for i in range(1, scale['packages'] + 1)]
+    _insert(db, models.Package, package_rows)
+    sales = []
+    for booking in bookings[::3]:
+        package = rng.choice(package_rows)
+        invoice_id = len(invoices) + 1
+        invoices.append({"invoice_id": invoice_id, "payment_due": package["pkg_price"],
+                         "billing_date_time": EPOCH - DAY})
+        sales.append({"package_id": package["package_id"], "group_id": booking["group_id"], "invoice_id": invoice_id})
+    _insert(db, models.Invoice, invoices)
+    _insert(db, models.StateroomBooking, bookings)
+    _insert(db, models.Payment, payments)
+    _insert(db, models.PackageSale, sales)
+
+    _insert(db, models.Restaurant, [
+        {"restaurant_id": i, "restaurant_name": f"Restaurant {i}", "serve_type": rng.choice(['buffet', 'a la carte']),
+         "opening_time": "07:00", "closing_time": "22:00", "at_floor": rng.randint(1, 15)}
+        for i in range(1, scale['restaurants'] + 1)
+    ])
+    _insert(db, models.Entertainment, [
+        {"entertain_id": i, "entertain_name": f"Show {i}", "num_units": rng.randint(1, 5), "at_floor": rng.randint(1, 15)}
+        for i in range(1, scale['entertainments'] + 1)
+    ])
+    db.session.commit()
+    # As the migrations do, so the planner has statistics to choose indexes with
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+    return {"ports": scale['ports'], "trips": trips, "itineraries": len(stops), "staterooms": staterooms,
+            "stateroom_prices": len(prices), "passengers": len(passengers), "groups": groups,
+            "bookings": len(bookings), "payments": len(payments), "package_sales": len(sales)}
+
+
+def app_config(path, base='testing'):
+    """
+    A config class for an app on the SQLite file at `path`, with the bench users'
+    password hash method. (Config reads DATABASE_URL once, when it is first imported.)
+    """
+    from config import get_config
+    return type('FleetConfig', (get_config(base),), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
+        # Long enough for HS256, so PyJWT doesn't warn on every token
+        'JWT_SECRET_KEY': BENCH_JWT_SECRET_KEY,
+    })
+
+
+def create(path, seed=42, **scale):
+    """
+    Generate a fleet into a new SQLite file at `path`, replacing any existing one.
+
+    Returns:
+        dict: The number of rows written per table.
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    import models
+    from app import create_app
+    from extensions import db
+    app = create_app(app_config(path))
+    with app.app_context():
+        db.create_all()
+        counts = generate(db, models, seed, **scale)
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    return counts
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    for name in SCALES['small']:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float if name == 'booked' else int, dest=name)
+
+
+def scale_from_arguments(args):
+    return {name: getattr(args, name) if getattr(args, name) is not None else value
+            for name, value in SCALES[args.scale].items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help="the SQLite file to create")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    counts = create(os.path.abspath(args.path), args.seed, **scale_from_arguments(args))
+    print(f"generated {args.path} in {time.perf_counter() - began:.1f}s: "
+          + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
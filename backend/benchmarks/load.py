@@ -0,0 +1,487 @@
+"""
+Load test of every route on a synthetic fleet, with latency percentiles per endpoint.
+
+Generates a fleet (see fleet.py) or uses an existing one, copies it to a scratch file and
+drives every route with randomized, seeded requests, through one of two drivers:
+
+- client: the Flask test client in this process, --requests per endpoint in turn;
+- http: a gunicorn server on the scratch copy (or --url, a server you started yourself on
+  a copy of the same fleet), hit by --threads client threads over keep-alive connections
+  for --seconds, every thread cycling through all endpoints.
+
+Passengers and the admin log in through /login and send their token as a bearer header.
+Routes that write (bookings, package purchases, profile edits, registrations) only run
+with --writes. p50/p95/p99/mean latency, errors and throughput are printed per endpoint
+and, with --json, saved together with the commit, scale and driver. --compare reads such
+a file and flags every endpoint whose p95 grew by more than --threshold; the exit status
+is 1 if any did, so the comparison can gate a CI job.
+
+Usage (from backend/):
+    python -m benchmarks.load --scale small --requests 200 --json before.json
+    python -m benchmarks.load --scale small --requests 200 --compare before.json
+    python -m benchmarks.load --fleet /tmp/fleet.db --driver http --threads 16 --seconds 30 --writes
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmarks.bench_room_search import random_query, TYPES, LOCATIONS
+from benchmarks.bench_workers import BACKEND, free_port, wait_for_port
+from benchmarks.fleet import (BENCH_JWT_SECRET_KEY, BENCH_PASSWORD, DAY, add_scale_arguments, app_config, create,
+                              scale_from_arguments)
+
+# Sent with every request, as the TLS-terminating proxy in front of gunicorn would
+HEADERS = {'X-Forwarded-Proto': 'https', 'Content-Type': 'application/json'}
+# Passengers of booked groups that log in and share the passenger traffic
+PASSENGER_POOL = 20
+
+
+class Fleet:
+    """The ids the scenarios pick from, read once from the fleet database."""
+
+    def __init__(self, path):
+        with sqlite3.connect(path) as conn:
+            self.trips = conn.execute('SELECT count(*) FROM cyz_trip').fetchone()[0]
+            self.staterooms = conn.execute('SELECT count(*) FROM cyz_stateroom').fetchone()[0]
+            self.packages = conn.execute('SELECT count(*) FROM cyz_package').fetchone()[0]
+            self.first_departure = conn.execute('SELECT min(start_date) FROM cyz_trip').fetchone()[0]
+            self.usernames = [row[0] for row in conn.execute(
+                "SELECT username FROM cyz_user WHERE user_type = 'passenger' ORDER BY user_id LIMIT 1000")]
+            # Passengers whose group has a booking, so MyTrip and package purchases have data
+            self.booked_usernames = [row[0] for row in conn.execute(
+                'SELECT u.username FROM cyz_user u JOIN cyz_passenger p ON p.user_id = u.user_id '
+                'WHERE p.group_id IN (SELECT group_id FROM cyz_stateroom_booking) '
+                'ORDER BY u.user_id LIMIT ?', (PASSENGER_POOL,))]
+            vacant = conn.execute('SELECT trip_id, stateroom_id, total_price FROM cyz_stateroom_price '
+                                  'WHERE is_vacant = 1 ORDER BY price_id').fetchall()
+        # Rooms left for the booking scenario, shuffled once and handed out one per booking
+        random.Random(0).shuffle(vacant)
+        self._vacant = vacant
+        self._lock = threading.Lock()
+        self._registrations = 0
+
+    def take_vacant_room(self):
+        with self._lock:
+            return self._vacant.pop() if self._vacant else None
+
+    def next_registration(self):
+        with self._lock:
+            self._registrations += 1
+            return self._registrations
+
+
+class Scenario:
+    """
+    One endpoint to drive.
+
+    Args:
+        method (str): The HTTP method.
+        rule (str): The route, which also names the endpoint in the results.
+        role (str): None, 'passenger' or 'admin': whose token to send.
+        build (callable): build(rng, fleet) -> (path with query string, JSON body or None).
+        writes (bool): Whether the route writes to the database.
+    """
+
+    def __init__(self, method, rule, role, build=None, writes=False):
+        self.method = method
+        self.rule = rule
+        self.role = role
+        self.build = build or (lambda rng, fleet: (rule, None))
+        self.writes = writes
+
+    @property
+    def name(self):
+        return f"{self.method} {self.rule}"
+
+
+def _date(fleet, days):
+    return time.strftime('%Y-%m-%d', time.gmtime(fleet.first_departure + days * DAY))
+
+
+def _trip_window(rng, fleet):
+    start = rng.randint(0, max(fleet.trips * 2 - 30, 0))
+    return f"/Passenger/Trip?start_date={_date(fleet, start)}&end_date={_date(fleet, start + 30)}&limit=50", None
+
+
+def _room_detail(rng, fleet):
+    sort = rng.choice(['total_price', '-total_price', 'size_sqft', 'room_number'])
+    return f"/Passenger/RoomDetail?trip_id={rng.randint(1, fleet.trips)}&sort={sort}", None
+
+
+def _availability(rng, fleet):
+    path = f"/Passenger/Availability?stateroom_type={rng.choice(TYPES)}&location={rng.choice(LOCATIONS)}"
+    if rng.random() < 0.7:
+        path += f"&trip_id={rng.randint(1, fleet.trips)}"
+    return path, None
+
+
+def _book_room(rng, fleet):
+    room = fleet.take_vacant_room()
+    if room is None:
+        raise RuntimeError("no vacant staterooms left to book; generate a larger fleet")
+    trip_id, stateroom_id, total_price = room
+    return '/Passenger/RoomOrder', {"tripId": trip_id, "stateroomId": stateroom_id,
+                                    "pay_amount": total_price, "payment_method": "card"}
+
+
+def _register(rng, fleet):
+    n = fleet.next_registration()
+    name = f"load{os.getpid()}x{threading.get_ident()}x{n}"
+    return '/register', {
+        "username": name, "email": f"{name}@example.com", "password": BENCH_PASSWORD,
+        "confirm_password": BENCH_PASSWORD, "first_name": "Load", "last_name": "Test",
+        "birth_date": "1990-01-01", "gender": "other", "nationality": "USA", "phone": "555-0100",
+        "street": "1 Harbour Rd", "city": "Miami", "state_province": "FL", "postal_code": "33101",
+        "country": "USA",
+    }
+
+
+SCENARIOS = [
+    Scenario('GET', '/', None),
+    Scenario('POST', '/login', None, lambda rng, fleet: (
+        '/login', {"username": rng.choice(fleet.usernames), "password": BENCH_PASSWORD})),
+    Scenario('GET', '/Passenger/Self', 'passenger'),
+    Scenario('GET', '/Passenger/MyTrip', 'passenger'),
+    Scenario('GET', '/Passenger/Trip', 'passenger', _trip_window),
+    Scenario('GET', '/Passenger/Package', 'passenger'),
+    Scenario('GET', '/Passenger/Entertainment', 'passenger'),
+    Scenario('GET', '/Passenger/Restaurant', 'passenger'),
+    Scenario('GET', '/Passenger/RoomDetail', 'passenger', _room_detail),
+    Scenario('GET', '/Passenger/RoomSearch', 'passenger', lambda rng, fleet: (random_query(rng, fleet.trips), None)),
+    Scenario('GET', '/Passenger/Availability', 'passenger', _availability),
+    Scenario('GET', '/Passenger/PurchasePackage', 'passenger', lambda rng, fleet: (
+        f"/Passenger/PurchasePackage?package_id={rng.randint(1, fleet.packages)}", None)),
+    Scenario('GET', '/Passenger/RoomOrder', 'passenger', lambda rng, fleet: (
+        f"/Passenger/RoomOrder?tripId={rng.randint(1, fleet.trips)}"
+        f"&stateroomId={rng.randint(1, fleet.staterooms)}", None)),
+    Scenario('GET', '/Admin/Board', 'admin'),
+    Scenario('GET', '/Admin/CacheStats', 'admin'),
+    Scenario('GET', '/Admin/UserManage', 'admin', lambda rng, fleet: (
+        f"/Admin/UserManage?limit=100&cursor={rng.randint(0, len(fleet.usernames))}", None)),
+    Scenario('GET', '/Admin/RoomPriceManage', 'admin', lambda rng, fleet: (
+        f"/Admin/RoomPriceManage?limit=100&cursor={rng.randint(0, fleet.trips * fleet.staterooms)}", None)),
+    Scenario('GET', '/Admin/ManageTrip', 'admin', lambda rng, fleet: ('/Admin/ManageTrip?limit=100', None)),
+    Scenario('GET', '/Admin/ManageItinerary', 'admin', lambda rng, fleet: ('/Admin/ManageItinerary?limit=100', None)),
+    Scenario('POST', '/Admin/Reprice', 'admin', lambda rng, fleet: (
+        '/Admin/Reprice', {"trip_ids": [rng.randint(1, fleet.trips)], "dry_run": True, "preview_limit": 0})),
+    Scenario('GET', '/metrics', 'admin'),
+    # Writes
+    Scenario('POST', '/Passenger/RoomOrder', 'passenger', _book_room, writes=True),
+    Scenario('POST', '/Passenger/PurchasePackage', 'passenger', lambda rng, fleet: (
+        '/Passenger/PurchasePackage', {"package_id": rng.randint(1, fleet.packages), "payment_method": "card"}),
+        writes=True),
+    Scenario('PUT', '/Passenger/Self', 'passenger', lambda rng, fleet: (
+        '/Passenger/Self', {"phone": f"555-{rng.randint(0, 9999999):07d}", "street": "1 Harbour Rd",
+                            "city": "Miami", "state_province": "FL", "postal_code": "33101", "country": "USA"}),
+        writes=True),
+    Scenario('POST', '/register', None, _register, writes=True),
+]
+
+
+class ClientTransport:
+    """Sends requests through the Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    """Sends requests over one keep-alive HTTP connection."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def send(self, method, path, headers, body):
+        try:
+            # The test client takes paths as written; a raw request line needs spaces escaped
+            self.conn.request(method, quote(path, safe="/?&=%+-._~"), json.dumps(body) if body is not None else None, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            if response.getheader('Connection', '').lower() == 'close':
+                self.conn.close()
+            return response.status, data
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            return 599, b''
+
+    def close(self):
+        self.conn.close()
+
+
+def log_in(transport, username):
+    status, body = transport.send('POST', '/login', HEADERS, {"username": username, "password": BENCH_PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login of {username} failed with {status}: {body[:200]!r}")
+    return {**HEADERS, 'Authorization': f"Bearer {json.loads(body)['token']}"}
+
+
+class Session:
+    """The logged-in headers of the admin and the passenger pool, for one transport."""
+
+    def __init__(self, transport, fleet):
+        self.admin = log_in(transport, 'admin0')
+        self.passengers = [log_in(transport, username) for username in fleet.booked_usernames]
+        if not self.passengers:
+            raise RuntimeError("the fleet has no booked passengers")
+
+    def headers(self, role, rng):
+        if role == 'admin':
+            return self.admin
+        if role == 'passenger':
+            return rng.choice(self.passengers)
+        return HEADERS
+
+
+def _request(transport, session, scenario, rng, fleet):
+    path, body = scenario.build(rng, fleet)
+    began = time.perf_counter()
+    status, _ = transport.send(scenario.method, path, session.headers(scenario.role, rng), body)
+    return time.perf_counter() - began, status
+
+
+def run_sequential(transport, fleet, scenarios, requests, seed):
+    """Send `requests` requests to each scenario in turn. Returns {name: (latencies, errors, seconds)}."""
+    session = Session(transport, fleet)
+    results = {}
+    for index, scenario in enumerate(scenarios):
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(min(10, requests)):  # warm up
+            _request(transport, session, scenario, rng, fleet)
+        latencies, errors = [], 0
+        began = time.perf_counter()
+        for _ in range(requests):
+            latency, status = _request(transport, session, scenario, rng, fleet)
+            latencies.append(latency)
+            errors += status >= 400
+        results[scenario.name] = (latencies, errors, time.perf_counter() - began)
+    return results
+
+
+def run_concurrent(make_transport, fleet, scenarios, threads, seconds, seed):
+    """
+    Have `threads` threads cycle through the scenarios for `seconds`.
+    Returns {name: (latencies, errors, seconds)}.
+    """
+    latencies = {scenario.name: [] for scenario in scenarios}
+    errors = {scenario.name: 0 for scenario in scenarios}
+    lock = threading.Lock()
+    ready = threading.Barrier(threads + 1)
+    failures = []
+
+    def client(number):
+        transport = make_transport()
+        try:
+            session = Session(transport, fleet)
+        except Exception as e:
+            failures.append(e)
+            ready.abort()
+            return
+        rng = random.Random(seed * 1000 + number)
+        own = {scenario.name: [] for scenario in scenarios}
+        own_errors = dict.fromkeys(own, 0)
+        ready.wait()
+        deadline = time.perf_counter() + seconds
+        i = number  # threads start at different scenarios
+        while time.perf_counter() < deadline:
+            scenario = scenarios[i % len(scenarios)]
+            latency, status = _request(transport, session, scenario, rng, fleet)
+            own[scenario.name].append(latency)
+            own_errors[scenario.name] += status >= 400
+            i += 1
+        transport.close()
+        with lock:
+            for name in own:
+                latencies[name].extend(own[name])
+                errors[name] += own_errors[name]
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        pass
+    for worker in workers:
+        worker.join()
+    if failures:
+        raise failures[0]
+    return {name: (latencies[name], errors[name], seconds) for name in latencies}
+
+
+def summarize(results):
+    """Per-endpoint statistics, in milliseconds and requests per second."""
+    summary = {}
+    for name, (latencies, errors, seconds) in results.items():
+        if not latencies:
+            continue
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0]] * 99
+        summary[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "throughput_rps": round(len(latencies) / seconds, 1) if seconds else None,
+        }
+    return summary
+
+
+def compare(baseline, current, threshold):
+    """
+    Print the p95 change of every endpoint against a baseline run.
+
+    Returns:
+        list: The names of the endpoints whose p95 grew by more than `threshold` (a fraction).
+    """
+    regressions = []
+    print(f"p95 against {baseline['meta'].get('commit') or 'baseline'}:")
+    for name, stats in current.items():
+        before = baseline['endpoints'].get(name)
+        if before is None or not before['p95_ms']:
+            print(f"  {name:<36} new")
+            continue
+        change = stats['p95_ms'] / before['p95_ms'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:<36} {before['p95_ms']:9.2f} -> {stats['p95_ms']:9.2f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _start_gunicorn(db_file, workers):
+    port = free_port()
+    env = {**os.environ, 'CRUISE_ENV': 'production', 'DATABASE_URL': f'sqlite:///{db_file}',
+           'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1', 'LOG_LEVEL': 'ERROR',
+           'JWT_SECRET_KEY': BENCH_JWT_SECRET_KEY}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', 'wsgi:app'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+    except RuntimeError:
+        server.terminate()
+        raise
+    return server, f'http://127.0.0.1:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fleet', help="an existing fleet database (default: generate one with the scale options)")
+    add_scale_arguments(parser)
+    parser.add_argument('--driver', choices=['client', 'http'], default='client')
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint (client driver)")
+    parser.add_argument('--threads', type=int, default=8, help="client threads (http driver)")
+    parser.add_argument('--seconds', type=float, default=20, help="duration (http driver)")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers (http driver)")
+    parser.add_argument('--url', help="drive this server instead of starting gunicorn (http driver)")
+    parser.add_argument('--writes', action='store_true', help="also drive the routes that write")
+    parser.add_argument('--endpoint', action='append', help="only drive these endpoints, e.g. 'GET /Passenger/MyTrip'")
+    parser.add_argument('--json', help="save the results to this file")
+    parser.add_argument('--compare', help="compare with the results saved in this file")
+    parser.add_argument('--threshold', type=float, default=0.10, help="p95 growth that counts as a regression")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    server = None
+    try:
+        scale = scale_from_arguments(args)
+        fleet_file = args.fleet
+        if fleet_file is None:
+            fleet_file = os.path.join(directory, 'fleet.db')
+            began = time.perf_counter()
+            create(fleet_file, args.seed, **scale)
+            print(f"generated a {args.scale} fleet in {time.perf_counter() - began:.1f}s")
+        # Runs never change the fleet itself, so repeated runs start from the same data
+        db_file = os.path.join(directory, 'load.db')
+        shutil.copy(fleet_file, db_file)
+        fleet = Fleet(db_file)
+
+        scenarios = [scenario for scenario in SCENARIOS if args.writes or not scenario.writes]
+        if args.endpoint:
+            scenarios = [scenario for scenario in scenarios if scenario.name in args.endpoint]
+
+        if args.driver == 'client':
+            from app import create_app
+            # Over-budget warnings for every request would drown the report
+            app = create_app(type('LoadConfig', (app_config(db_file, 'development'),), {'LOG_LEVEL': 'ERROR'}))
+            results = run_sequential(ClientTransport(app), fleet, scenarios, args.requests, args.seed)
+        else:
+            url = args.url
+            if url is None:
+                server, url = _start_gunicorn(db_file, args.workers)
+            results = run_concurrent(lambda: HTTPTransport(url), fleet, scenarios, args.threads,
+                                     args.seconds, args.seed)
+
+        summary = summarize(results)
+        total = sum(stats["requests"] for stats in summary.values())
+        print(f"{args.driver} driver, {len(summary)} endpoints, {total} requests")
+        print(f"  {'endpoint':<36} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+        for name, stats in summary.items():
+            print(f"  {name:<36} {stats['requests']:8d} {stats['errors']:6d} {stats['p50_ms']:8.2f} "
+                  f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} {stats['throughput_rps'] or 0:8.1f}")
+        if args.driver == 'http':
+            print(f"  overall throughput {total / args.seconds:.1f} req/s")
+
+        report = {
+            "meta": {
+                "commit": _git_commit(), "date": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                "driver": args.driver, "fleet": args.fleet, "scale": args.scale if args.fleet is None else None,
+                "counts": scale if args.fleet is None else None, "seed": args.seed, "writes": args.writes,
+                "requests": args.requests if args.driver == 'client' else None,
+                "threads": args.threads if args.driver == 'http' else None,
+                "seconds": args.seconds if args.driver == 'http' else None,
+                "python": platform.python_version(), "cpus": os.cpu_count(),
+            },
+            "endpoints": summary,
+        }
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"saved {args.json}")
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            if compare(baseline, summary, args.threshold):
+                return 1
+        return 0
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
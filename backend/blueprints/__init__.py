@@ -0,0 +1,26 @@
+"""
+Route blueprints, split by audience: auth (login, register, logout), passenger and admin.
+
+The modules are imported by register_blueprints() rather than here, so importing the
+package (or app.py) doesn't pull in the models and every view until an app is created.
+"""
+import importlib
+
+__all__ = ['BLUEPRINTS', 'register_blueprints']
+
+# Modules whose `bp` is registered, in order
+BLUEPRINTS = ('blueprints.auth', 'blueprints.passenger', 'blueprints.admin')
+
+
+def register_blueprints(app):
+    """
+    Import the blueprint modules and register them, together with the app-wide response hooks.
+
+    Args:
+        app: The Flask application.
+    """
+    from blueprints.common import add_conditional_get
+
+    for name in BLUEPRINTS:
+        app.register_blueprint(importlib.import_module(name).bp)
+    app.after_request(add_conditional_get)
@@ -0,0 +1,555 @@
+import math
+
+from flask import Blueprint, request, jsonify
+
+from extensions import db, catalog_cache, identity_cache, availability_index
+from database import read_only
+from identity import admin_required
+from importer import import_schedule, read_csv_rows
+from pricing import PricingError, PricingRules, generate_trip_prices
+from repricing import RepricingPolicy, reprice
+from itinerary import ItinerarySchedule, check_itinerary_times
+from models import *
+from utils import *
+from blueprints.common import MAX_PAGE_SIZE, list_response
+
+bp = Blueprint('admin', __name__)
+
+
+def _itinerary_conflict_response(start, end, trip, existing_times):
+    """
+    Check a stop's times against its trip and the trip's other stops.
+
+    Args:
+        start (int): The arrival time.
+        end (int): The leaving time.
+        trip (Trip): The trip.
+        existing_times: The (arrival, leaving) times of the trip's other stops.
+
+    Returns:
+        The 400 response listing what is wrong, or None if the times are valid.
+    """
+    error = check_itinerary_times(start, end, trip.start_date, trip.end_date)
+    conflicts = [] if error else ItinerarySchedule(existing_times).conflicts(start, end)
+    if not error and not conflicts:
+        return None
+    return jsonify({
+        "error": "Invalid itinerary times: Time conflict(s) with existing itineraries found!",
+        "reason": error,
+        "conflicts": [
+            {"arrival_date_time": unix_to_datetime(arrival, True), "leaving_date_time": unix_to_datetime(leaving, True)}
+            for arrival, leaving in conflicts
+        ],
+    }), 400
+
+
+def _parse_price(value):
+    """
+    Convert a price from a JSON body to a float.
+
+    Returns:
+        float: The price, or None if it is not a finite, non-negative number.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if math.isfinite(price) and price >= 0 else None
+
+@bp.route('/Admin/Board',methods=["GET"])
+@read_only
+@admin_required
+def admin_dashboard():
+    try:
+        # Count registered users
+        registered_users_count = Passenger.query.count()
+        # Count listed staterooms
+        listed_staterooms_count = StateroomPrice.query.count()
+        # Count total bookings
+        total_bookings_count = StateroomBooking.query.count()
+        # Count total trips
+        total_trips_count = Trip.query.count()
+        # Count total package sale
+        total_package_count = PackageSale.query.count()
+        # Prepare data for visualization
+        dashboard_data = {
+            "registered_users": registered_users_count,
+            "listed_staterooms": listed_staterooms_count,
+            "total_bookings": total_bookings_count,
+            "total_trips": total_trips_count,
+            "total_package":total_package_count,
+        }
+
+        return jsonify({"dashboard_data": dashboard_data}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+
+@bp.route('/Admin/CacheStats', methods=["GET"])
+@admin_required
+def admin_cache_stats():
+    return jsonify({
+        "catalog_cache": catalog_cache.stats(),
+        "identity_cache": identity_cache.stats(),
+        "availability_index": availability_index.stats(),
+    }), 200
+
+
+@bp.route('/Admin/UserManage', methods=['GET', 'DELETE'])
+@read_only
+@admin_required
+def admin_manage_users():
+    # Handle the DELETE request to remove a passenger
+    if request.method == 'DELETE':
+        data = request.json
+        passenger_id = sanitize_input(data.get('passenger_id'))
+        passenger = Passenger.query.get(passenger_id)
+
+        if not passenger:
+            return jsonify({"message": f"Passenger with ID {passenger_id} not found."}), 404
+
+        try:
+            db.session.delete(passenger)
+            db.session.commit()
+            return jsonify({"message": f"Passenger with ID {passenger_id} deleted successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+
+    # Handle the GET request to retrieve all passengers
+    if request.method == 'GET':
+        return list_response("passengers", Passenger.query, Passenger.passenger_id, lambda passenger: {
+            "id": passenger.passenger_id,
+            "first_name": passenger.passenger_fname,
+            "last_name": passenger.passenger_lname,
+            "phone": passenger.phone,
+            "gender": passenger.gender,
+            "nationality": passenger.nationality
+        })
+
+
+@bp.route('/Admin/RoomPriceManage', methods=['GET', 'PUT', 'POST', 'DELETE'])
+@read_only
+@admin_required
+def admin_manage_room_prices():
+    # Handle the PUT request to update the price of a stateroom
+    if request.method == 'PUT':
+        data = request.json
+        price_id = sanitize_input(data.get('price_id'))
+        new_price = sanitize_input(data.get('price_per_night'))
+        is_vacant = sanitize_input(data.get('is_vacant'))
+        if new_price is not None:
+            new_price = _parse_price(new_price)
+            if new_price is None:
+                return jsonify({"message": "price_per_night must be a non-negative number."}), 400
+
+        stateroom_price = StateroomPrice.query.get(price_id)
+
+        if not stateroom_price:
+            return jsonify({"message": f"Stateroom price with ID {price_id} not found."}), 404
+
+        try:
+            if new_price is not None:
+                stateroom_price.price_per_night = new_price
+                stateroom_price.base_price_per_night = new_price
+                stateroom_price.update_total_price(Trip.query.get(stateroom_price.trip_id).length_days)
+            if is_vacant is not None:
+                stateroom_price.is_vacant = is_vacant
+
+            db.session.commit()
+            return jsonify({"message": f"Stateroom price with ID {price_id} updated successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+
+    # Handle the GET request to retrieve all stateroom prices
+    if request.method == 'GET':
+        return list_response("stateroom_prices", StateroomPrice.query, StateroomPrice.price_id, lambda price: {
+            "price_id": price.price_id,
+            "stateroom_id": price.stateroom_id,
+            "price_per_night": price.price_per_night,
+            "trip_id": price.trip_id,
+            "is_vacant": price.is_vacant,
+            "total_price": price.total_price
+        })
+    
+    # Handle the POST request to create a new stateroom price
+    if request.method == 'POST':
+        data = request.json
+        stateroom_id = sanitize_input(data.get('stateroom_id'))
+        price_per_night = sanitize_input(data.get('price_per_night'))
+        trip_id = sanitize_input(data.get('trip_id'))
+        is_vacant = sanitize_input(data.get('is_vacant'))
+
+        if not all([stateroom_id, trip_id, is_vacant]) or price_per_night is None:
+            return jsonify({"message": "Missing required fields."}), 400
+        price_per_night = _parse_price(price_per_night)
+        if price_per_night is None:
+            return jsonify({"message": "price_per_night must be a non-negative number."}), 400
+
+        trip = Trip.query.get(trip_id)
+        if not trip:
+            return jsonify({"message": f"Trip with ID {trip_id} not found."}), 404
+
+        try:
+            new_stateroom_price = StateroomPrice(
+                stateroom_id=stateroom_id,
+                price_per_night=price_per_night,
+                base_price_per_night=price_per_night,
+                trip_id=trip_id,
+                is_vacant=is_vacant
+            )
+            new_stateroom_price.update_total_price(trip.length_days)
+            db.session.add(new_stateroom_price)
+            db.session.commit()
+            return jsonify({"message": "New stateroom price created successfully.", "price_id": new_stateroom_price.price_id}), 201
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+        
+    # Handle the DELETE request to delete a stateroom price
+    if request.method == 'DELETE':
+        data = request.json
+        price_id = sanitize_input(data.get('price_id'))
+
+        if not price_id:
+            return jsonify({"message": "price_id is required."}), 400
+
+        stateroom_price = StateroomPrice.query.get(price_id)
+
+        if not stateroom_price:
+            return jsonify({"message": f"Stateroom price with ID {price_id} not found."}), 404
+
+        try:
+            db.session.delete(stateroom_price)
+            db.session.commit()
+            return jsonify({"message": f"Stateroom price with ID {price_id} deleted successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+
+@bp.route('/Admin/PricingTemplate', methods=['POST'])
+@admin_required
+def admin_pricing_template():
+    """
+    Open a trip for sale: price every stateroom of the ship from a pricing template.
+
+    JSON body:
+        trip_id: The trip.
+        rules: The template, see pricing.PricingRules.
+        dry_run: true to preview the prices without writing them.
+        preview_limit: How many of the generated prices to return (default 50).
+
+    Staterooms already priced on the trip are skipped. The response summarizes the prices
+    per night by stateroom type and lists the first `preview_limit` of them.
+    """
+    data = request.get_json(silent=True) or {}
+    trip_id = sanitize_input(data.get('trip_id'))
+    dry_run = bool(data.get('dry_run'))
+    preview_limit = data.get('preview_limit', 50)
+    if not isinstance(preview_limit, int) or not 0 <= preview_limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"preview_limit must be between 0 and {MAX_PAGE_SIZE}."}), 400
+
+    trip = Trip.query.get(trip_id) if trip_id else None
+    if not trip:
+        return jsonify({"message": f"Trip with ID {trip_id} not found."}), 404
+
+    try:
+        rules = PricingRules.from_json(data.get('rules'))
+        rows, skipped, summary = generate_trip_prices(trip, rules, dry_run=dry_run)
+    except PricingError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+
+    return jsonify({
+        "message": (f"Would price {len(rows)} staterooms." if dry_run
+                    else f"Priced {len(rows)} staterooms on trip {trip.trip_id}."),
+        "dry_run": dry_run,
+        "trip_id": trip.trip_id,
+        "created": 0 if dry_run else len(rows),
+        "skipped": skipped,
+        "summary": summary,
+        "prices": rows[:preview_limit],
+    }), 200 if dry_run else 201
+
+@bp.route('/Admin/Reprice', methods=['POST'])
+@admin_required
+def admin_reprice():
+    """
+    Recompute the dynamic prices of the vacant cabins from occupancy, days to departure
+    and cabin size, see repricing.reprice().
+
+    JSON body:
+        trip_ids: The trips to reprice. Defaults to every trip that hasn't departed.
+        policy: Overrides of the RepricingPolicy fields.
+        dry_run: true to compute the prices without writing them.
+        preview_limit: How many of the changes to return (default 50).
+    """
+    data = request.get_json(silent=True) or {}
+    trip_ids = data.get('trip_ids')
+    if trip_ids is not None and (not isinstance(trip_ids, list)
+                                 or not all(isinstance(trip_id, int) for trip_id in trip_ids)):
+        return jsonify({"message": "trip_ids must be a list of trip IDs."}), 400
+    preview_limit = data.get('preview_limit', 50)
+    if not isinstance(preview_limit, int) or not 0 <= preview_limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"preview_limit must be between 0 and {MAX_PAGE_SIZE}."}), 400
+    dry_run = bool(data.get('dry_run'))
+
+    try:
+        policy = RepricingPolicy.from_json(data.get('policy'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        result = reprice(trip_ids, policy, dry_run=dry_run, preview_limit=preview_limit)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+    return jsonify({
+        "dry_run": dry_run,
+        "trips": result["trips"],
+        "rows": result["rows"],
+        "changed": result["changed"],
+        "changes": [
+            {"price_id": price_id, "old_price_per_night": old, "price_per_night": new}
+            for price_id, old, new in result["changes"]
+        ],
+    }), 200
+
+@bp.route('/Admin/ManageTrip', methods=['GET', 'PUT', 'POST','DELETE'])
+@read_only
+@admin_required
+def admin_manage_trip():
+     # Handle the POST request to add a new trip
+    if request.method == 'POST':
+        data = request.json
+
+        new_trip = Trip(
+            start_date=datetime_to_unix(sanitize_input(data.get('start_date'))),
+            end_date=datetime_to_unix(sanitize_input(data.get('end_date'))),
+            start_port_id=sanitize_input(data.get('start_port_id')),
+            end_port_id=sanitize_input(data.get('end_port_id'))
+        )
+        new_trip.update_length()
+
+        try:
+            db.session.add(new_trip)
+            db.session.commit()
+            return jsonify({"message": f"New trip added with ID {new_trip.trip_id}."}), 201
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+        
+    # Handle the DELETE request to delete a trip and its itineraries
+    if request.method == 'DELETE':
+        data = request.json
+        trip_id = sanitize_input(data.get('trip_id'))
+        trip = Trip.query.get(trip_id)
+        if not trip:
+            return jsonify({"message": f"Trip with ID {trip_id} not found."}), 404
+
+        try:
+            # Delete all itineraries associated with the trip
+            Itinerary.query.filter_by(trip_id=trip_id).delete()
+            # Delete the trip itself
+            db.session.delete(trip)
+            db.session.commit()
+            return jsonify({"message": f"Trip with ID {trip_id} and its itineraries deleted successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+        
+    # Handle the PUT request to update a trip's start and end dates
+    if request.method == 'PUT':
+        data = request.json
+        trip_id = sanitize_input(data.get('trip_id'))
+        new_start_date = sanitize_input(data.get('start_date'))
+        new_end_date = sanitize_input(data.get('end_date'))
+
+        trip = Trip.query.get(trip_id)
+
+        if not trip:
+            return jsonify({"message": f"Trip with ID {trip_id} not found."}), 404
+
+        try:
+            # assuming dates are in "YYYY-MM-DD" format
+            if new_start_date is not None:
+                trip.start_date = datetime_to_unix(new_start_date)
+            if new_end_date is not None:
+                trip.end_date = datetime_to_unix(new_end_date)
+            # Keep the stored trip length and the total prices of its staterooms in step
+            trip.update_length()
+            StateroomPrice.update_total_prices_for_trip(trip)
+
+            db.session.commit()
+            return jsonify({"message": f"Trip with ID {trip_id} updated successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+
+    # Handle the GET request to retrieve all trips
+    if request.method == 'GET':
+        return list_response("trips", Trip.query, Trip.trip_id, lambda trip: {
+            "trip_id": trip.trip_id,
+            "start_date": unix_to_datetime(trip.start_date),
+            "end_date": unix_to_datetime(trip.end_date),
+            "start_port_id": trip.start_port_id,
+            "end_port_id": trip.end_port_id,
+            "length_days": trip.length_days
+        })
+
+@bp.route('/Admin/ManageItinerary', methods=['GET','POST','PUT','DELETE'])
+@read_only
+@admin_required
+def admin_manage_itinerary():
+    if request.method == 'POST':
+        data = request.json
+        arrival_date_time = sanitize_input(data.get('arrival_date_time'))
+        leaving_date_time = sanitize_input(data.get('leaving_date_time'))
+        trip_id = sanitize_input(data.get('trip_id'))
+        port_id = sanitize_input(data.get('port_id'))
+
+        trip = Trip.query.get(trip_id)
+        if not trip:
+            return jsonify({"error": "Trip not found."}), 404
+
+        # check if time conflicts exist
+        arrival_time = datetime_to_unix(arrival_date_time)
+        leaving_time = datetime_to_unix(leaving_date_time)
+        existing_itin_times = db.session.query(Itinerary.arrival_date_time, Itinerary.leaving_date_time).filter_by(trip_id=trip_id).all()
+        conflict_response = _itinerary_conflict_response(arrival_time, leaving_time, trip, existing_itin_times)
+        if conflict_response:
+            return conflict_response
+        
+        # Create a new Itinerary instance
+        new_itinerary = Itinerary(
+            arrival_date_time=arrival_time,
+            leaving_date_time=leaving_time,
+            trip_id=trip_id,
+            port_id=port_id
+        )
+
+        try:
+            db.session.add(new_itinerary)
+            db.session.commit()
+            return jsonify({"message": "Itinerary added successfully."}), 201
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+    
+    if request.method == 'GET':
+        try:
+            # Format the itineraries into a list of dictionaries
+            return list_response("itineraries", Itinerary.query, Itinerary.itinerary_id, lambda itinerary: {
+                "itinerary_id": itinerary.itinerary_id,
+                "arrival_date_time": unix_to_datetime(itinerary.arrival_date_time,True),
+                "leaving_date_time": unix_to_datetime(itinerary.leaving_date_time,True),
+                "trip_id": itinerary.trip_id,
+                "port_id": itinerary.port_id
+            })
+        except Exception as e:
+            return jsonify({"message": f"Error: {e}"}), 500
+        
+    if request.method == 'PUT':
+        data = request.json
+        itinerary_id = sanitize_input(data.get('itinerary_id'))
+        arrival_date_time = sanitize_input(data.get('arrival_date_time'))
+        leaving_date_time = sanitize_input(data.get('leaving_date_time'))
+        trip_id = sanitize_input(data.get('trip_id'))
+        port_id = sanitize_input(data.get('port_id'))
+
+        # Find the itinerary to update
+        itinerary = Itinerary.query.get(itinerary_id)
+        if not itinerary:
+            return jsonify({"error": "Itinerary not found."}), 404
+
+        trip = Trip.query.get(trip_id)
+        if not trip:
+            return jsonify({"error": "Trip not found."}), 404
+
+        # Check for time conflicts
+        arrival_time = datetime_to_unix(arrival_date_time)
+        leaving_time = datetime_to_unix(leaving_date_time)
+        existing_itin_times = db.session.query(Itinerary.arrival_date_time, Itinerary.leaving_date_time).filter(
+            Itinerary.trip_id == trip_id, Itinerary.itinerary_id != itinerary_id).all()
+        conflict_response = _itinerary_conflict_response(arrival_time, leaving_time, trip, existing_itin_times)
+        if conflict_response:
+            return conflict_response
+
+        # Update the itinerary
+        itinerary.arrival_date_time = arrival_time
+        itinerary.leaving_date_time = leaving_time
+        itinerary.trip_id = trip_id
+        itinerary.port_id = port_id
+
+        try:
+            db.session.commit()
+            return jsonify({"message": "Itinerary updated successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+        
+    if request.method == 'DELETE':
+        data = request.json
+        itinerary_id = data.get('itinerary_id')
+
+        # Find the itinerary to delete
+        itinerary = Itinerary.query.get(itinerary_id)
+        if not itinerary:
+            return jsonify({"error": "Itinerary not found."}), 404
+
+        try:
+            db.session.delete(itinerary)
+            db.session.commit()
+            return jsonify({"message": "Itinerary deleted successfully."}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"message": f"Error: {e}"}), 500
+
+
+# Most per-row errors returned by /Admin/Import
+MAX_IMPORT_ERRORS = 1000
+
+@bp.route('/Admin/Import', methods=['POST'])
+@admin_required
+def admin_import_schedule():
+    """
+    Import a season of trips and itinerary stops at once.
+
+    Accepts either a JSON body, `{"trips": [...], "itineraries": [...]}` or a bare array of
+    itinerary rows, or a multipart upload with `trips` and/or `itineraries` CSV files with
+    header rows. See importer.TRIP_FIELDS and importer.ITINERARY_FIELDS for the columns.
+
+    All rows are validated first; if any is invalid nothing is imported and the response
+    lists the errors by section and 1-based row.
+    """
+    if request.files:
+        trip_rows = read_csv_rows(request.files['trips']) if 'trips' in request.files else []
+        itinerary_rows = read_csv_rows(request.files['itineraries']) if 'itineraries' in request.files else []
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, list):
+            data = {"itineraries": data}
+        if not isinstance(data, dict):
+            return jsonify({"message": "Send a JSON object or array, or CSV files named trips and itineraries."}), 400
+        trip_rows = data.get('trips') or []
+        itinerary_rows = data.get('itineraries') or []
+    if not all(isinstance(row, dict) for row in [*trip_rows, *itinerary_rows]):
+        return jsonify({"message": "Every row must be an object."}), 400
+
+    try:
+        errors, trip_ids = import_schedule(trip_rows, itinerary_rows)
+    except Exception as e:
+        return jsonify({"message": f"Error: {e}"}), 500
+    if errors:
+        return jsonify({
+            "message": "Nothing was imported: some rows are invalid.",
+            "error_count": len(errors),
+            "errors": errors[:MAX_IMPORT_ERRORS],
+        }), 400
+    return jsonify({
+        "message": f"Imported {len(trip_ids)} trips and {len(itinerary_rows)} itineraries.",
+        "trip_ids": trip_ids,
+    }), 201
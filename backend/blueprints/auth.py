@@ -0,0 +1,159 @@
+from flask import Blueprint, request, session, jsonify
+
+from extensions import db, password_hasher
+from identity import issue_token
+from passwords import HasherBusyError
+from models import *
+from utils import *
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/', methods=['GET'])
+def home():
+    return jsonify({"message": "Welcome to the Cruise Management System!"}), 200
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        data = request.json
+        # Retrieve the username from the form
+        username = sanitize_input(data.get('username'))
+        # Retrieve the password from the form
+        password = sanitize_input(data.get('password'))
+
+        # Query the database for the user by username (assumes username is unique)
+        user = User.query.filter_by(username=username).first()
+        # Validate the user and the hashed password
+        try:
+            valid = user is not None and password_hasher.verify(user.password, password)
+            if valid and password_hasher.needs_rehash(user.password):
+                # Upgrade the stored hash to the configured method and cost
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+        except HasherBusyError:
+            return jsonify({"message": "Server busy, please try again."}), 503
+        if valid:
+            # Generate the JWT, with the passenger and group as claims so that requests
+            # sending it as a bearer token need neither the session nor a passenger lookup
+            passenger = Passenger.query.filter_by(user_id=user.user_id).first() \
+                if user.user_type == 'passenger' else None
+            token = issue_token(user, passenger)
+            # Keep the session for clients that still rely on the cookie
+            session['user_id'] = user.user_id
+            session['user_type'] = user.user_type
+            return jsonify({
+                "message": "Login successful",
+                "token": token,
+                "user": {
+                    "user_id": int(user.user_id),
+                    "username": str(user.username),
+                    "user_type": str(user.user_type)
+                }
+            }), 200
+        else:
+            return jsonify({"message": "Invalid username or password"}), 401
+
+
+@bp.route('/register', methods=['POST'])
+def register():
+    data = request.json  # Parse JSON input from frontend
+
+    # Extract user inputs
+    username = sanitize_input(data.get('username'))
+    email = sanitize_input(data.get('email'))
+    password = sanitize_input(data.get('password'))
+    confirm_password = sanitize_input(data.get('confirm_password'))
+    user_type = "passenger"  # Default user_type set to 'passenger'
+
+    # Passenger-specific inputs
+    passenger_fname = sanitize_input(data.get('first_name'))
+    passenger_lname = sanitize_input(data.get('last_name'))
+    # Assume YYYY-MM-DD format
+    birth_date = sanitize_input(data.get('birth_date'))
+    gender = sanitize_input(data.get('gender'))
+    nationality = sanitize_input(data.get('nationality'))
+    phone = sanitize_input(data.get('phone'))
+    street = sanitize_input(data.get('street'))
+    addr_line_2 = sanitize_input(data.get('addr_line_2'))
+    neighborhood = sanitize_input(data.get('neighborhood'))
+    city = sanitize_input(data.get('city'))
+    state_province = sanitize_input(data.get('state_province'))
+    postal_code = sanitize_input(data.get('postal_code'))
+    country = sanitize_input(data.get('country'))
+    # Optional, can handle None
+    group_id = sanitize_input(data.get('group_id'))
+
+    # Validate inputs
+    if not all([username, email, password, confirm_password,
+                passenger_fname, passenger_lname, birth_date, gender,
+                nationality, phone, street, city, state_province, postal_code, country]):
+        return jsonify({"message": "All fields are required."}), 400
+
+    if password != confirm_password:
+        return jsonify({"message": "Passwords do not match."}), 400
+
+    # Hash the password
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HasherBusyError:
+        return jsonify({"message": "Server busy, please try again."}), 503
+
+    # Check for existing username or email
+    existing_user = User.query.filter(
+        (User.username == username) | (User.email == email)).first()
+    if existing_user:
+        return jsonify({"message": "Username or email already exists."}), 400
+
+    try:
+        # Create a new user instance
+        new_user = User(username=username, email=email,
+                        password=hashed_password, user_type=user_type)
+
+        # Add and commit the new user to the database
+        db.session.add(new_user)
+        db.session.flush()  # Flush to get the new user's user_id
+
+        # Create a new address instance
+        new_address = Address(street=street, addr_line_2=addr_line_2,
+                              neighborhood=neighborhood, city=city,
+                              state_province=state_province, postal_code=postal_code,
+                              country=country)
+        db.session.add(new_address)
+        db.session.flush()
+        # Get address id
+        address_id = new_address.addr_id
+        # Determine group_id if not provided
+        if not group_id:
+            max_group_id = db.session.query(
+                db.func.max(Passenger.group_id)).scalar()
+            group_id = (max_group_id + 1) if max_group_id is not None else 1
+
+        # Create a new passenger instance linked to the new user
+        new_passenger = Passenger(
+            birth_date=datetime_to_unix(datetime_str=birth_date),
+            gender=gender,
+            nationality=nationality,
+            phone=phone,
+            addr_id=int(address_id),
+            group_id=int(group_id),
+            passenger_fname=passenger_fname,
+            passenger_lname=passenger_lname,
+            user_id=new_user.user_id
+
+        )
+
+        # Add and commit the new passenger to the database
+        db.session.add(new_passenger)
+        db.session.commit()
+
+        return jsonify({"message": "Registration successful!"}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"An error occurred during registration: {e}"}), 500
+
+
+@bp.route('/logout', methods=['POST'])
+def logout():
+    session.clear()
+    return jsonify({"message": "Logged out successfully."}), 200
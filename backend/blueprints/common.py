@@ -0,0 +1,103 @@
+from flask import current_app, request, jsonify, stream_with_context
+from werkzeug.http import generate_etag
+
+from extensions import db, catalog_cache, table_changes
+from utils import keyset_paginate
+
+# Upper bound for the `limit` argument of paginated endpoints
+MAX_PAGE_SIZE = 500
+# Rows fetched per round trip when streaming a listing as NDJSON
+STREAM_BATCH_SIZE = 1000
+
+
+def cached_json(tables, builder):
+    """
+    Serve a JSON body from the catalog cache, keyed by endpoint and query arguments.
+
+    Entries built from tables that another worker has written to since are dropped first
+    (see cache.TableChangeLog), so every worker serves an admin's edit from its next request.
+
+    Args:
+        tables (tuple): Names of the tables the body is built from; writes to them invalidate it.
+        builder (callable): Returns the data to serialize, or None if there is nothing to cache.
+
+    Returns:
+        Response: The cached JSON response, or None if builder() returned None.
+    """
+    table_changes.sync(db.session)
+    key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+    cached = catalog_cache.get_or_set(
+        key, lambda: _serialize(builder()), tables)
+    if cached is None:
+        return None
+    body, etag = cached
+    response = current_app.response_class(body, mimetype='application/json')
+    # Cached bodies carry their ETag, so add_conditional_get() doesn't hash them again
+    response.set_etag(etag)
+    return response
+
+
+def _serialize(data):
+    if data is None:
+        return None
+    body = jsonify(data).get_data()
+    return body, generate_etag(body)
+
+
+def list_response(name, query, key_column, serialize):
+    """
+    Serve a table listing for the admin pages.
+
+    By default every row is returned as {name: [...]}. With `limit` (and `cursor`) the rows
+    are paged on key_column and the body also carries `next_cursor`. With `format=ndjson`
+    the rows are streamed one JSON object per line, read from the database in batches, so
+    memory stays flat no matter how large the table is.
+
+    Args:
+        name (str): The key holding the list in the JSON body.
+        query: The query selecting the model instances to list.
+        key_column: The unique column to order and page by (usually the primary key).
+        serialize (callable): Converts one model instance into a dict.
+
+    Returns:
+        The Flask response.
+    """
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    if request.args.get('format') == 'ndjson':
+        query = query.order_by(key_column)
+        if cursor is not None:
+            query = query.filter(key_column > cursor)
+        if limit:
+            query = query.limit(limit)
+
+        def generate():
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                yield current_app.json.dumps(serialize(row)) + '\n'
+
+        return current_app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    rows, next_cursor = keyset_paginate(query, key_column, cursor, limit)
+    data = {name: [serialize(row) for row in rows]}
+    if limit:
+        data["next_cursor"] = next_cursor
+    return jsonify(data), 200
+
+
+def add_conditional_get(response):
+    """
+    Tag successful JSON GET responses with a strong ETag of their body and answer
+    If-None-Match with 304 Not Modified, so unchanged data is not downloaded again.
+    """
+    if request.method != 'GET' or response.status_code != 200 \
+            or response.mimetype != 'application/json' or response.is_streamed:
+        return response
+
+    if 'ETag' not in response.headers:
+        response.add_etag()
+    # Responses depend on the login session: browsers may keep them but must revalidate
+    response.headers.setdefault('Cache-Control', 'private, no-cache')
+    return response.make_conditional(request)
@@ -0,0 +1,814 @@
+from datetime import datetime, timezone
+
+from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import selectinload, joinedload, contains_eager
+
+from extensions import db, availability_index, table_changes
+from booking import BookingError, book_stateroom
+from search import RoomSearch, FACET_COLUMNS, SORT_COLUMNS, parse_number
+from database import read_only
+from identity import current_identity, login_required
+from models import *
+from utils import *
+from logs import get_logger
+from blueprints.common import MAX_PAGE_SIZE, cached_json
+
+bp = Blueprint('passenger', __name__)
+logger = get_logger('passenger')
+
+# Default page size of /Passenger/RoomSearch
+ROOM_SEARCH_PAGE_SIZE = 50
+# Columns /Passenger/RoomDetail can be sorted by
+ROOM_SORT_KEYS = {
+    'total_price': StateroomPrice.total_price,
+    'price_per_night': StateroomPrice.price_per_night,
+    'room_number': Stateroom.room_number,
+    'size_sqft': Stateroom.size_sqft,
+}
+
+
+
+@bp.route('/Passenger/Self', methods=['GET', 'PUT'])
+@login_required
+def get_or_modify_passenger():
+    """
+    Fetch and display passenger's information (GET) or update it (POST) by ID.
+    """
+    identity = current_identity()
+    user_id = identity.user_id
+    # The passenger row itself, by the primary key the identity resolved
+    passenger_id = identity.passenger_id
+
+    if request.method == 'GET':
+        try:
+            # Query the database for the passenger
+            passenger = db.session.get(Passenger, passenger_id) if passenger_id is not None else None
+            if not passenger:
+                return jsonify({"message": "Passenger not found"}), 404
+
+            address = Address.query.get_or_404(passenger.addr_id)
+            if not address:
+                return jsonify({"message": "Address not found"}), 404
+
+            # Prepare the passenger data for the frontend
+            passenger_data = {
+                'id': passenger.passenger_id,
+                'first_name': passenger.passenger_fname,
+                'last_name': passenger.passenger_lname,
+                'birth_date': unix_to_datetime(passenger.birth_date, include_time=False),
+                'gender': passenger.gender,
+                'nationality': passenger.nationality,
+                'phone': passenger.phone,
+                'address': {
+                    'street': address.street,
+                    'addr_line_2': address.addr_line_2 or '',
+                    'neighborhood': address.neighborhood or '',
+                    'city': address.city,
+                    'state_province': address.state_province,
+                    'postal_code': address.postal_code,
+                    'country': address.country
+                }
+            }
+
+            return jsonify({"passenger": passenger_data}), 200
+        except Exception as e:
+            return jsonify({"message": f"An error occurred: {e}"}), 500
+
+    elif request.method == 'PUT':
+        try:
+            # Ensure the logged-in user is authorized to edit this passenger's information
+            logger.debug("User ID: %s", user_id)
+            passenger = db.session.get(Passenger, passenger_id) if passenger_id is not None else None
+            if not passenger:
+                return jsonify({"message": "Passenger not found"}), 404
+            old_address = Address.query.get_or_404(passenger.addr_id)
+            logger.debug("Passenger fetched: %s, old address: %s", passenger, old_address)
+
+            if user_id != passenger.user_id:
+                return jsonify({"message": "You are not authorized to edit this information."}), 403
+
+            # Retrieve updated information from the request body
+            data = request.json
+            logger.debug("Received update data: %s", data)
+            passenger.passenger_fname = sanitize_input(
+                data.get('first_name', passenger.passenger_fname))
+            passenger.passenger_lname = sanitize_input(
+                data.get('last_name', passenger.passenger_lname))
+            passenger.phone = sanitize_input(
+                data.get('phone', passenger.phone))
+
+            # Get new address details
+            new_address_data = {
+                'street': sanitize_input(data.get('street')),
+                'city': sanitize_input(data.get('city')),
+                'state_province': sanitize_input(data.get('state_province')),
+                'postal_code': sanitize_input(data.get('postal_code')),
+                'country': sanitize_input(data.get('country')),
+            }
+            logger.debug("New address data: %s", new_address_data)
+
+            # Search for an existing address with the same details
+            new_address = Address.query.filter_by(
+                street=new_address_data['street'],
+                addr_line_2=new_address_data.get('addr_line_2'),
+                neighborhood=new_address_data.get('neighborhood'),
+                city=new_address_data['city'],
+                state_province=new_address_data['state_province'],
+                postal_code=new_address_data['postal_code'],
+                country=new_address_data['country']
+            ).first()
+
+            if new_address:
+                # If the new address exists, update the passenger's address ID
+                logger.debug("Existing address found: %s", new_address)
+                passenger.addr_id = new_address.addr_id
+            else:
+                # If the new address does not exist, create it
+                new_address = Address(**new_address_data)
+                db.session.add(new_address)
+                db.session.commit()  # Commit to get the new address ID
+                passenger.addr_id = new_address.addr_id
+                logger.debug("New address created with ID: %s", new_address.addr_id)
+
+            # Check if the old address is used by other passengers
+            other_passengers = Passenger.query.filter_by(
+                addr_id=old_address.addr_id).count()
+            if other_passengers == 0:
+                logger.debug("Deleting unused old address: %s", old_address)
+                # If no other passengers use the old address, delete it
+                db.session.delete(old_address)
+
+            # Commit the changes to the database
+            db.session.commit()
+            return jsonify({"message": "Your information has been updated successfully!"}), 200
+
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Error during PUT /Passenger/Self")
+            return jsonify({"message": f"An error occurred while editing your information: {e}"}), 500
+
+
+@bp.route('/Passenger/MyTrip', methods=['GET'])
+@login_required
+def view_my_trip():
+    """
+    Fetch and return trip information for a given passenger as JSON, including multiple staterooms for a single trip.
+
+    The response is assembled from a fixed number of queries (trips with itineraries and
+    ports, bookings with staterooms) no matter how many trips the group has.
+    """
+    try:
+        # The passenger's group comes with the identity: from the token, or looked up once
+        group_id = current_identity().group_id
+        if group_id is None:
+            return jsonify({"message": "Passenger not found."}), 404
+
+        # Query trips associated with the passenger's group, loading the
+        # itinerary and its ports in one extra query for all trips
+        trips = Trip.query.join(Payment, Trip.trip_id == Payment.trip_id)\
+                          .filter(Payment.group_id == group_id)\
+                          .options(selectinload(Trip.itineraries).joinedload(Itinerary.port))\
+                          .distinct()\
+                          .all()
+
+        # Fetch the group's stateroom bookings for all those trips at once,
+        # together with their price rows and staterooms
+        stateroom_bookings = StateroomBooking.query.join(StateroomBooking.price)\
+            .filter(StateroomPrice.trip_id.in_([trip.trip_id for trip in trips]))\
+            .filter(StateroomBooking.group_id == group_id)\
+            .options(contains_eager(StateroomBooking.price).joinedload(StateroomPrice.stateroom))\
+            .all()
+
+        # Gather details for each stateroom, grouped by trip
+        staterooms_by_trip = {}
+        for booking in stateroom_bookings:
+            stateroom = booking.price.stateroom
+            if stateroom:
+                staterooms_by_trip.setdefault(booking.price.trip_id, []).append({
+                    "stateroom_type": stateroom.stateroom_type,
+                    "location": stateroom.location,
+                    "num_bed": stateroom.num_bed,
+                    "num_bathroom": stateroom.num_bathroom,
+                    "num_balcony": stateroom.num_balcony,
+                    "size_sqft": stateroom.size_sqft,
+                    "room_number": stateroom.room_number
+                })
+
+        trip_data = []
+        for trip in trips:
+            # Itinerary information is already loaded with the trip
+            ports_info = [
+                {
+                    "port_name": itinerary_item.port.port_name,
+                    "arrival_date_time": unix_to_datetime(itinerary_item.arrival_date_time, True),
+                    "leaving_date_time": unix_to_datetime(itinerary_item.leaving_date_time, True)
+                }
+                for itinerary_item in trip.itineraries
+            ] if trip.itineraries else [{"message": "No itinerary available for this port."}]
+
+            # Append trip data
+            trip_data.append({
+                "trip_id": trip.trip_id,
+                "start_date": unix_to_datetime(trip.start_date),
+                "end_date": unix_to_datetime(trip.end_date),
+                "stateroom_information": staterooms_by_trip.get(trip.trip_id, []),  # Now supports multiple rooms
+                "ports": ports_info
+            })
+
+        # Return the data structured for the front-end interface
+        return jsonify({"trips": trip_data}), 200
+
+    except Exception as e:
+        return jsonify({"message": f"An error occurred while retrieving trip information: {e}"}), 500
+
+
+@bp.route('/Passenger/Trip', methods=['GET'])
+@read_only
+@login_required
+def get_trips_by_date():
+    """
+    Fetch trips based on start and end dates.
+
+    Port names are joined into the trip query. Pass `limit` to page through large date
+    windows; the response then carries an `X-Next-Cursor` header to send back as `cursor`.
+    """
+    # Retrieve startDate and endDate
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    logger.debug("Trip search from %s to %s", start_date, end_date)
+
+    if not start_date or not end_date:
+        return jsonify({'error': 'startDate and endDate are required'}), 400
+
+    # convert the date from YYYY-MM-DD to int
+    start_date = datetime_to_unix(start_date)
+    end_date = datetime_to_unix(end_date)
+
+    # Optional pagination
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+    # Query trips within the date range together with both port names
+    # A trip ending by end_date also starts by then; saying so bounds the range on the
+    # (start_date, end_date) index, which SQLite otherwise skips for a scan in trip_id order
+    query = Trip.query.filter(
+        Trip.start_date >= start_date,
+        Trip.start_date <= end_date,
+        Trip.end_date <= end_date
+    ).options(joinedload(Trip.start_port), joinedload(Trip.end_port))
+    trips, next_cursor = keyset_paginate(query, Trip.trip_id, cursor, limit)
+
+    if not trips and cursor is None:
+        return jsonify({'error': 'No trips available for the given dates'}), 404
+
+    trip_data = [
+        {
+            'trip_id': trip.trip_id,
+            'start_date': unix_to_datetime(trip.start_date),
+            'end_date': unix_to_datetime(trip.end_date),
+            'start_port_name': trip.start_port.port_name if trip.start_port else None,
+            'end_port_name': trip.end_port.port_name if trip.end_port else None
+        }
+        for trip in trips
+    ]
+
+    response = jsonify(trip_data)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response, 200
+
+
+@bp.route('/Passenger/Package', methods=['GET'])
+@read_only
+@login_required
+def get_packages():
+    """
+    Fetch all package details.
+    """
+    def build_package_list():
+        packages = Package.query.all()
+        return [
+            {
+                "package_id": package.package_id,
+                "pkg_charge_type": package.pkg_charge_type,
+                "pkg_price": package.pkg_price,
+                "pkg_name": package.pkg_name,
+            }
+            for package in packages
+        ]
+
+    try:
+        return cached_json(('cyz_package',), build_package_list), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/Passenger/Entertainment', methods=['GET'])
+@read_only
+@login_required
+def get_entertainments():
+    """
+    Fetch all entertainment details.
+    """
+    def build_entertainment_list():
+        entertainments = Entertainment.query.all()
+        return [
+            {
+                "entertain_id": entertainment.entertain_id,
+                "entertain_name": entertainment.entertain_name,
+                "num_units": entertainment.num_units,
+                "at_floor": entertainment.at_floor,
+            }
+            for entertainment in entertainments
+        ]
+
+    try:
+        return cached_json(('cyz_entertainment',), build_entertainment_list), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/Passenger/Restaurant', methods=['GET'])
+@read_only
+@login_required
+def get_restaurants():
+    """
+    Fetch all restaurant details.
+    """
+    def build_restaurant_list():
+        restaurants = Restaurant.query.all()
+        return [
+            {
+                "restaurant_id": restaurant.restaurant_id,
+                "restaurant_name": restaurant.restaurant_name,
+                "serve_type": restaurant.serve_type,
+                "opening_time": restaurant.opening_time,
+                "closing_time": restaurant.closing_time,
+                "at_floor": restaurant.at_floor,
+            }
+            for restaurant in restaurants
+        ]
+
+    try:
+        return cached_json(('cyz_restaurant',), build_restaurant_list), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/Passenger/RoomDetail', methods=['GET'])
+@read_only
+@login_required
+def get_room_details_by_trip():
+    """
+    Fetch stateroom details and their prices for a specific trip ID.
+
+    Optional arguments filter and sort on the stored total price, in SQL:
+    `min_price`/`max_price` bound the total price of the trip and `sort` is one of
+    ROOM_SORT_KEYS, e.g. `total_price` or `-total_price` for descending.
+    """
+    # Get trip_id from the request arguments
+    trip_id = request.args.get('trip_id', type=int)
+    logger.debug("Received trip_id: %s", trip_id)
+    
+    if not trip_id:
+        return jsonify({"message": "Trip ID is required."}), 400
+
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    sort = request.args.get('sort')
+    if sort is not None and sort.lstrip('-') not in ROOM_SORT_KEYS:
+        return jsonify({"message": f"sort must be one of {', '.join(ROOM_SORT_KEYS)}, optionally prefixed with '-'."}), 400
+
+    try:
+        # Query the staterooms and their prices for the given trip ID
+        query = db.session.query(Stateroom, StateroomPrice).join(
+            StateroomPrice, Stateroom.stateroom_id == StateroomPrice.stateroom_id
+        ).filter(StateroomPrice.trip_id == trip_id)
+        if min_price is not None:
+            query = query.filter(StateroomPrice.total_price >= min_price)
+        if max_price is not None:
+            query = query.filter(StateroomPrice.total_price <= max_price)
+        if sort is not None:
+            column = ROOM_SORT_KEYS[sort.lstrip('-')]
+            query = query.order_by(column.desc() if sort.startswith('-') else column, StateroomPrice.price_id)
+        stateroom_prices = query.all()
+        
+        logger.debug("Query result: %s", stateroom_prices)
+        
+        if not stateroom_prices:
+            return jsonify({"message": f"No staterooms found for trip ID {trip_id}."}), 404
+
+        # Convert the results into a structured list
+        stateroom_list = [
+            {
+                "stateroom_id": stateroom.stateroom_id,
+                "stateroom_type": stateroom.stateroom_type,
+                "location": stateroom.location,
+                "num_bed": stateroom.num_bed,
+                "num_bathroom": stateroom.num_bathroom,
+                "num_balcony": stateroom.num_balcony,
+                "size_sqft": stateroom.size_sqft,
+                "room_number": stateroom.room_number,
+                "price_per_night": price.price_per_night,
+                "total_price": price.total_price,
+                "is_vacant": price.is_vacant,
+            }
+            for stateroom, price in stateroom_prices
+        ]
+
+        logger.debug("Formatted stateroom list: %s", stateroom_list)
+
+        # Return the room details as a JSON response
+        return jsonify(stateroom_list), 200
+    except Exception as e:
+        # Handle any errors during the process
+        logger.exception("Error in GET /Passenger/RoomDetail")
+        return jsonify({"error": str(e)}), 500
+
+
+
+@bp.route('/Passenger/RoomSearch', methods=['GET'])
+@read_only
+@login_required
+def search_rooms():
+    """
+    Search the staterooms of a trip, with filtering, sorting and pagination done in SQL.
+
+    Query arguments:
+        trip_id: Required.
+        stateroom_type, location, num_bed, num_bathroom, num_balcony: Accepted values,
+            each repeatable, e.g. `num_bed=2&num_bed=4`.
+        min_sqft, max_sqft, min_price, max_price: Bounds of the size and the total price.
+        vacant: `true` to only return vacant staterooms.
+        sort: A column of SORT_COLUMNS, prefixed with '-' for descending order.
+        limit, offset: The page.
+
+    The response carries the page, the total number of matches and the number of matches
+    for each value of each facet.
+    """
+    trip_id = request.args.get('trip_id', type=int)
+    if not trip_id:
+        return jsonify({"message": "Trip ID is required."}), 400
+
+    facets = {}
+    for name, column in FACET_COLUMNS.items():
+        values = request.args.getlist(name)
+        if isinstance(column.type, db.Integer):
+            try:
+                values = [parse_number(value) for value in values]
+            except ValueError:
+                return jsonify({"message": f"{name} must be a number."}), 400
+        facets[name] = values
+    ranges = {
+        'sqft': (request.args.get('min_sqft', type=float), request.args.get('max_sqft', type=float)),
+        'price': (request.args.get('min_price', type=float), request.args.get('max_price', type=float)),
+    }
+    vacant_only = request.args.get('vacant', '').lower() in ('1', 'true')
+
+    sort = request.args.get('sort')
+    if sort is not None and sort.lstrip('-') not in SORT_COLUMNS:
+        return jsonify({"message": f"sort must be one of {', '.join(SORT_COLUMNS)}, optionally prefixed with '-'."}), 400
+    limit = request.args.get('limit', ROOM_SEARCH_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if not 0 < limit <= MAX_PAGE_SIZE or offset < 0:
+        return jsonify({"message": f"limit must be between 1 and {MAX_PAGE_SIZE} and offset must not be negative."}), 400
+
+    try:
+        search = RoomSearch(trip_id, facets, ranges, vacant_only)
+        total, facet_counts = search.counts()
+        rows = search.page(sort, limit, offset) if offset < total else []
+        return jsonify({
+            "trip_id": trip_id,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "staterooms": [
+                {
+                    "stateroom_id": stateroom.stateroom_id,
+                    "stateroom_type": stateroom.stateroom_type,
+                    "location": stateroom.location,
+                    "num_bed": stateroom.num_bed,
+                    "num_bathroom": stateroom.num_bathroom,
+                    "num_balcony": stateroom.num_balcony,
+                    "size_sqft": stateroom.size_sqft,
+                    "room_number": stateroom.room_number,
+                    "price_id": price.price_id,
+                    "price_per_night": price.price_per_night,
+                    "total_price": price.total_price,
+                    "is_vacant": price.is_vacant,
+                }
+                for stateroom, price in rows
+            ],
+            "facets": facet_counts,
+        }), 200
+    except Exception as e:
+        logger.exception("Error in GET /Passenger/RoomSearch")
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/Passenger/Availability', methods=['GET'])
+@login_required
+def get_availability():
+    """
+    Count vacant staterooms, answered from the in-memory availability index.
+
+    `stateroom_type`, `location` and `num_bed` filter the rooms; each can be repeated to
+    match any of several values. With `trip_id` the vacant count of that trip is returned,
+    plus the matching stateroom ids when `list=true`. Without it, every trip that still has
+    a matching vacant room is returned with its count.
+    """
+    try:
+        num_bed = [int(value) for value in request.args.getlist('num_bed')]
+    except ValueError:
+        return jsonify({"message": "num_bed must be an integer."}), 400
+    filters = {
+        'stateroom_type': request.args.getlist('stateroom_type'),
+        'location': request.args.getlist('location'),
+        'num_bed': num_bed,
+    }
+    trip_id = request.args.get('trip_id', type=int)
+
+    try:
+        # Reload the trips another worker has booked or repriced since
+        table_changes.sync(db.session)
+        if trip_id is None:
+            trips = availability_index.trips_with_vacancy(**filters)
+            return jsonify({
+                "trips": [{"trip_id": trip_id, "vacant_count": count}
+                          for trip_id, count in sorted(trips.items())]
+            }), 200
+
+        count = availability_index.count(trip_id, **filters)
+        if count is None:
+            return jsonify({"message": f"No staterooms found for trip ID {trip_id}."}), 404
+        data = {"trip_id": trip_id, "vacant_count": count}
+        if request.args.get('list', '').lower() in ('1', 'true'):
+            data["stateroom_ids"] = availability_index.vacant_ids(trip_id, **filters)
+        return jsonify(data), 200
+    except Exception as e:
+        logger.exception("Error in GET /Passenger/Availability")
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/Passenger/PurchasePackage', methods=['GET', 'POST'])
+@login_required
+def purchase_package():
+    """
+    Handle the purchase of a package.
+    """
+    identity = current_identity()
+    if request.method == 'GET':
+        try:
+            if identity.passenger_id is None:
+                return jsonify({"message": "Passenger not found for the given user ID."}), 404
+            
+            package_id = request.args.get('package_id', None)
+            logger.debug("Received package_id: %s", package_id)
+
+
+            if package_id:
+                # Return the package information corresponding to the specified package_id
+                def build_package_info():
+                    pkg = Package.query.filter_by(package_id=package_id).first()
+                    if not pkg:
+                        return None
+
+                    package_info = {
+                            "package_id": pkg.package_id,
+                            "name": pkg.pkg_name,
+                            "charge_type": pkg.pkg_charge_type,
+                            "price": pkg.pkg_price,
+                    }
+
+                    return {
+                        "message": "Package retrieved successfully.",
+                        "package": package_info
+                    }
+
+                response = cached_json(('cyz_package',), build_package_info)
+                if response is None:
+                    return jsonify({"message": "Package not found."}), 404
+                return response, 200
+            else:
+                # Return the package information for all packages
+                def build_packages_info():
+                    available_packages = Package.query.all()
+                    packages_info = [
+                        {
+                            "package_id": pkg.package_id,
+                            "name": pkg.pkg_name,
+                            "charge_type": pkg.pkg_charge_type,
+                            "price": pkg.pkg_price,
+                        }
+                        for pkg in available_packages
+                    ]
+
+                    return {
+                        "message": "Available packages retrieved successfully.",
+                        "packages": packages_info
+                    }
+
+                return cached_json(('cyz_package',), build_packages_info), 200
+
+        except Exception as e:
+            # Log error with traceback for better debugging
+            logger.exception("Error occurred in GET /Passenger/PurchasePackage")
+            return jsonify({"error": "An unexpected error occurred.", "details": str(e)}), 500
+
+
+    if request.method == 'POST':
+        data = request.get_json()
+
+        # Validate input
+        required_fields = ["package_id"]
+        for field in required_fields:
+            if field not in data:
+                return jsonify({"message": f"Missing required field: {field}"}), 400
+
+        package_id = sanitize_input(data["package_id"])
+        payment_method = sanitize_input(data.get("payment_method", "Unknown"))
+        group_id = identity.group_id
+        if group_id is None:
+            return jsonify({"message": "Passenger not found for the given user ID."}), 404
+        # Packages are charged to the trip of the group's stateroom booking
+        trip_id = identity.active_trip_id
+        if trip_id is None:
+            return jsonify({"message": "Book a stateroom before purchasing packages."}), 400
+
+        try:
+            # Fetch package details
+            package = Package.query.filter_by(package_id=package_id).first()
+            if not package:
+                return jsonify({"message": "Package not found."}), 404
+
+            # Calculate the billing date and payment due
+            billing_date_time = int(datetime.now(timezone.utc).timestamp())
+            payment_due = package.pkg_price
+
+            # Create a new invoice
+            new_invoice = Invoice(
+                payment_due=payment_due,
+                billing_date_time=billing_date_time
+            )
+            db.session.add(new_invoice)
+            db.session.flush()  # Generate the invoice ID
+
+            # Create a new package sale entry
+            new_package_sale = PackageSale(
+                package_id=package_id,
+                group_id=group_id,
+                invoice_id=new_invoice.invoice_id
+            )
+            db.session.add(new_package_sale)
+
+            # Create a new payment
+            payment_date = billing_date_time
+            new_payment = Payment(
+                payment_date=payment_date,
+                pay_amount=payment_due,
+                payment_method=payment_method,
+                trip_id=trip_id,
+                group_id=group_id,
+                invoice_id=new_invoice.invoice_id
+            )
+            db.session.add(new_payment)
+
+            # Commit all changes to the database
+            db.session.commit()
+
+            return jsonify({"message": "Package purchased successfully.", "invoice_id": new_invoice.invoice_id}), 201
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 500
+
+@bp.route('/Passenger/RoomOrder', methods=['GET', 'POST'])
+@login_required
+def handle_room_order():
+    """
+    Handles fetching stateroom price details (GET) and booking a stateroom (POST).
+    """
+    if request.method == 'GET':
+        # Handle GET: Fetch stateroom price details
+        trip_id = sanitize_input(request.args.get('tripId', type=int))
+        stateroom_id = sanitize_input(request.args.get('stateroomId', type=int))
+
+        if not trip_id or not stateroom_id:
+            return jsonify({"message": "Both tripId and stateroomId are required."}), 400
+
+        try:
+            # Fetch trip details to calculate trip length
+            trip = Trip.query.get(trip_id)
+            if not trip:
+                return jsonify({"message": "Trip not found."}), 404
+
+            # Trip length (in days) is stored with the trip
+            trip_length = trip.length_days
+
+            # Fetch stateroom prices for the trip and stateroom
+            stateroom_prices = StateroomPrice.query.filter_by(trip_id=trip_id, stateroom_id=stateroom_id).all()
+
+            if not stateroom_prices:
+                return jsonify({"message": "No stateroom prices found for this trip or stateroom."}), 404
+
+            # Compile stateroom details
+            staterooms_data = []
+            for stateroom_price in stateroom_prices:
+                # Fetch stateroom details
+                stateroom = stateroom_price.stateroom
+                if not stateroom:
+                    continue  # Skip if stateroom details are missing
+
+                # Fetch bookings for this stateroom in the trip
+                bookings = StateroomBooking.query.filter_by(price_id=stateroom_price.price_id).all()
+
+                # Compile booking details
+                booking_details = [{
+                    "bookingId": booking.booking_id,
+                    "groupId": booking.group_id,
+                    "invoiceId": booking.invoice_id
+                } for booking in bookings]
+
+                # Compile stateroom details
+                staterooms_data.append({
+                    "stateroomId": stateroom.stateroom_id,
+                    "roomNumber": stateroom.room_number,
+                    "stateroomType": stateroom.stateroom_type,
+                    "location": stateroom.location,
+                    "numBed": stateroom.num_bed,
+                    "numBathroom": stateroom.num_bathroom,
+                    "numBalcony": stateroom.num_balcony,
+                    "sizeSqFt": stateroom.size_sqft,
+                    "isVacant": stateroom_price.is_vacant,
+                    "pricePerNight": stateroom_price.price_per_night,
+                    "actualPrice": stateroom_price.total_price,
+                    "bookings": booking_details
+                })
+
+            return jsonify({"code": 200, "tripLengthDays": trip_length, "staterooms": staterooms_data}), 200
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    elif request.method == 'POST':
+        # Handle POST: Book a stateroom
+        try:
+            data = request.get_json()  # JSON 
+            logger.debug("Room order data: %s", data)
+            stateroom_id = sanitize_input(data.get('stateroomId'))
+            trip_id = sanitize_input(data.get('tripId'))
+            pay_amount = sanitize_input(data.get('pay_amount'))
+            payment_method = sanitize_input(data.get('payment_method'))
+            
+            # Ensure required fields are provided
+            required_fields = {'stateroomId': stateroom_id, 'tripId': trip_id, 'pay_amount': pay_amount, 'payment_method': payment_method}
+            missing_fields = [key for key, value in required_fields.items() if not value]
+            if missing_fields:
+                return jsonify({"message": f"Missing required fields: {', '.join(missing_fields)}"}), 400
+
+            # Converpt numeric fields to appropriate tyes
+            try:
+                trip_id = int(trip_id)
+                pay_amount = float(pay_amount)
+            except ValueError:
+                return jsonify({"message": "Invalid data format for numeric fields."}), 400
+
+            # The passenger's group comes with the identity
+            group_id = current_identity().group_id
+            if not group_id:
+                return jsonify({"message": "Group ID for the user not found."}), 400
+
+            # Claim the stateroom and record invoice, booking and payment atomically
+            try:
+                new_invoice, new_payment, new_booking = book_stateroom(
+                    group_id, trip_id, stateroom_id, pay_amount, payment_method)
+            except BookingError as e:
+                return jsonify({"message": str(e)}), 400
+
+            # Return response with booking and payment details
+            return jsonify({
+                "code": 200,
+                "message": "Booking successful.",
+                "data": {
+                    "invoice": {
+                        "invoice_id": new_invoice.invoice_id,
+                        "billing_date_time": new_invoice.billing_date_time,
+                        "payment_due": new_invoice.payment_due,
+                    },
+                    "payment": {
+                        "payment_id": new_payment.payment_id,
+                        "payment_date": new_payment.payment_date,
+                        "pay_amount": new_payment.pay_amount,
+                        "payment_method": new_payment.payment_method,
+                    },
+                    "group": {
+                        "group_id": new_booking.group_id,
+                    }
+                }
+            }), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 500
@@ -0,0 +1,131 @@
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from availability import AVAILABILITY_TRACKED, record_vacancy_change
+from cache import TRIP_SCOPED
+from extensions import db
+from logs import get_logger
+from models import Invoice, Payment, StateroomBooking, StateroomPrice, Trip
+
+__all__ = ['BookingError', 'book_stateroom']
+
+logger = get_logger('booking')
+
+# How often a booking is retried when the database is busy, and the base backoff in seconds
+BOOKING_RETRIES = 5
+BOOKING_BACKOFF = 0.02
+
+
+class BookingError(Exception):
+    """A booking request that cannot be fulfilled, with the message to return to the client."""
+
+
+def book_stateroom(group_id, trip_id, stateroom_id, pay_amount, payment_method):
+    """
+    Book a stateroom on a trip for a group and record its invoice and payment.
+
+    The cabin is claimed with a single conditional `UPDATE ... SET is_vacant = 0 WHERE
+    is_vacant = 1`, so of several concurrent buyers exactly one sees its update hit a row;
+    the others get a BookingError. The claim and the booking rows are committed together.
+    If the database is locked by another writer the whole booking is retried with
+    exponential backoff and jitter.
+
+    Args:
+        group_id (int): The group booking the cabin.
+        trip_id (int): The trip.
+        stateroom_id (int): The stateroom.
+        pay_amount (float): The amount paid, which must match the price for the whole trip.
+        payment_method (str): The payment method.
+
+    Returns:
+        tuple: The new Invoice, Payment and StateroomBooking.
+
+    Raises:
+        BookingError: If the trip or cabin doesn't exist, the cabin is taken, or the amount is wrong.
+    """
+    for attempt in range(BOOKING_RETRIES + 1):
+        try:
+            return _book_once(group_id, trip_id, stateroom_id, pay_amount, payment_method)
+        except OperationalError as e:
+            db.session.rollback()
+            if not _is_busy(e) or attempt == BOOKING_RETRIES:
+                raise
+            delay = BOOKING_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.info("Database busy while booking stateroom %s, retrying in %.3fs", stateroom_id, delay)
+            time.sleep(delay)
+        except BookingError:
+            db.session.rollback()
+            raise
+
+
+def _is_busy(error):
+    message = str(error.orig).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _book_once(group_id, trip_id, stateroom_id, pay_amount, payment_method):
+    # Fetch trip details to calculate trip length
+    trip = Trip.query.filter_by(trip_id=trip_id).first()
+    if not trip:
+        raise BookingError("Trip not found.")
+
+    # Trip length (in days) is stored with the trip
+    trip_length = trip.length_days
+    if not trip_length or trip_length <= 0:
+        raise BookingError("Invalid trip dates.")
+
+    # Fetch stateroom price details
+    stateroom_price = StateroomPrice.query.filter_by(
+        stateroom_id=stateroom_id, trip_id=trip_id).first()
+    if not stateroom_price or not stateroom_price.is_vacant:
+        raise BookingError("Stateroom is not available for booking.")
+
+    # Total cost is stored with the price
+    calculated_cost = stateroom_price.total_price
+    logger.debug("Trip length %s days, calculated cost %s", trip_length, calculated_cost)
+    if abs(pay_amount - calculated_cost) > 1e-2:  # Allow minor rounding differences
+        raise BookingError(f"Payment amount mismatch. Expected: {calculated_cost}, Provided: {pay_amount}")
+
+    # Claim the cabin; only one concurrent buyer can flip is_vacant
+    claimed = db.session.execute(
+        update(StateroomPrice)
+        .where(StateroomPrice.price_id == stateroom_price.price_id, StateroomPrice.is_vacant.is_(True))
+        .values(is_vacant=False)
+        .execution_options(synchronize_session=False, **{AVAILABILITY_TRACKED: True, TRIP_SCOPED: True})
+    ).rowcount
+    if claimed != 1:
+        raise BookingError("Stateroom is not available for booking.")
+    # Applied to the availability index on commit, and reloaded by the other workers
+    record_vacancy_change(db.session, stateroom_price.trip_id, stateroom_price.stateroom_id, False)
+
+    now = int(datetime.now().timestamp())
+    # Create invoice
+    new_invoice = Invoice(payment_due=pay_amount, billing_date_time=now)
+    db.session.add(new_invoice)
+    db.session.flush()  # Generate invoice ID
+
+    # Create stateroom booking
+    new_booking = StateroomBooking(
+        group_id=group_id,
+        invoice_id=new_invoice.invoice_id,
+        price_id=stateroom_price.price_id,
+    )
+    db.session.add(new_booking)
+
+    # Create payment record
+    new_payment = Payment(
+        payment_date=now,
+        pay_amount=pay_amount,
+        payment_method=payment_method,
+        trip_id=trip_id,
+        group_id=group_id,
+        invoice_id=new_invoice.invoice_id
+    )
+    db.session.add(new_payment)
+    db.session.commit()
+
+    return new_invoice, new_payment, new_booking
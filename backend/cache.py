@@ -0,0 +1,454 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from flask import g, has_app_context
+from sqlalchemy import column, delete, event, inspect, insert, select, table
+from sqlalchemy.exc import SQLAlchemyError
+
+from logs import get_logger
+
+__all__ = ['TTLCache', 'TableChangeLog', 'track_table_writes', 'on_tables_committed', 'record_trip_write',
+           'TRIP_SCOPED', 'DATA_CHANGE_TABLE']
+
+logger = get_logger('cache')
+
+# Log of committed writes shared by every process on the database (models.DataChange)
+DATA_CHANGE_TABLE = 'cyz_data_change'
+_data_changes = table(DATA_CHANGE_TABLE, column('change_id'), column('changed_at'), column('table_name'),
+                      column('trip_id'))
+
+# Execution option for bulk statements whose trips are reported with record_trip_write()
+TRIP_SCOPED = 'trip_scoped'
+
+# A row is logged just before its transaction commits, so a check can run in between and
+# miss it: every check reads the rows of this many seconds before the previous one again
+_LOOKBACK = 5
+
+# Above this many trips of a table, a commit logs the whole table: reloading that many
+# trips one by one costs more than rebuilding from scratch
+_MAX_TRIPS = 100
+
+
+class TTLCache:
+    """
+    Thread-safe, bounded LRU cache whose entries also expire after a fixed time-to-live.
+
+    Every entry remembers which database tables it was built from, so a commit that writes
+    to one of those tables can drop exactly the entries that went stale.
+    """
+
+    def __init__(self, max_size=256, ttl=300):
+        """
+        Args:
+            max_size (int): The maximum number of entries before the least recently used is evicted.
+            ttl (float): The number of seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tables)
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app, prefix):
+        """
+        Read the size and TTL from the app config, e.g. CATALOG_CACHE_SIZE and CATALOG_CACHE_TTL.
+
+        Args:
+            app: The Flask application.
+            prefix (str): The config key prefix, e.g. 'CATALOG_CACHE'.
+        """
+        self.max_size = app.config.get(f'{prefix}_SIZE', self.max_size)
+        self.ttl = app.config.get(f'{prefix}_TTL', self.ttl)
+        self.clear()
+
+    def get(self, key):
+        """
+        Returns:
+            The cached value, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tables=()):
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key: Any hashable key.
+            value: The value to cache.
+            tables (iterable): Names of the tables the value was built from.
+        """
+        with self._lock:
+            self._store(key, value, tables)
+
+    def _store(self, key, value, tables):
+        self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tables))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_set(self, key, builder, tables=()):
+        """
+        Return the cached value for key, calling builder() to produce it on a miss.
+
+        A value is not stored if builder() returns None, or if any invalidation happened
+        while it was being built (it may already be stale).
+
+        Args:
+            key: Any hashable key.
+            builder (callable): Builds the value on a miss.
+            tables (iterable): Names of the tables the value is built from.
+
+        Returns:
+            The cached or freshly built value.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            generation = self._invalidations
+        value = builder()
+        if value is not None:
+            with self._lock:
+                if generation == self._invalidations:
+                    self._store(key, value, tables)
+        return value
+
+    def invalidate_tables(self, tables):
+        """
+        Drop every entry that was built from any of the given tables.
+
+        Args:
+            tables (iterable): Names of the tables that were written to.
+        """
+        tables = set(tables)
+        with self._lock:
+            self._invalidations += 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss/eviction counters and current size, for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+
+# Callbacks notified with the set of table names written by each committed transaction
+_commit_listeners = []
+
+
+def on_tables_committed(callback):
+    """
+    Register a callback that receives the set of table names written by each commit.
+
+    Args:
+        callback (callable): Called as callback(tables) after every successful commit.
+    """
+    _commit_listeners.append(callback)
+    return callback
+
+
+def _record_tables(session, tables):
+    session.info.setdefault('written_tables', set()).update(tables)
+
+
+def track_table_writes(session):
+    """
+    Record which tables a session writes to and notify the commit listeners on commit.
+
+    Covers ORM flushes as well as bulk insert/update/delete statements run through the session.
+
+    Args:
+        session: The session, session class or scoped session to listen on (e.g. db.session).
+    """
+    @event.listens_for(session, 'after_flush')
+    def _after_flush(session, flush_context):
+        _record_tables(session, {
+            obj.__table__.name
+            for obj in chain(session.new, session.dirty, session.deleted)
+        })
+
+    @event.listens_for(session, 'do_orm_execute')
+    def _do_orm_execute(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            table = getattr(orm_execute_state.statement, 'table', None)
+            if table is not None:
+                _record_tables(orm_execute_state.session, {table.name})
+
+    @event.listens_for(session, 'after_commit')
+    def _after_commit(session):
+        tables = session.info.pop('written_tables', None)
+        if tables:
+            for callback in _commit_listeners:
+                callback(tables)
+
+    @event.listens_for(session, 'after_rollback')
+    def _after_rollback(session):
+        session.info.pop('written_tables', None)
+
+
+
+
+def _record_trips(session, table_name, trip_ids):
+    # table name -> set of trip ids written, or None when the writes aren't scoped to trips
+    written = session.info.setdefault('written_trips', {})
+    if trip_ids is None:
+        written[table_name] = None
+    else:
+        known = written.setdefault(table_name, set())
+        if known is not None:
+            known.update(trip_ids)
+
+
+def record_trip_write(session, table_name, trip_id):
+    """
+    Report a trip written by a bulk statement run with the TRIP_SCOPED execution option, so
+    other processes only drop what they cached about that trip when the session commits.
+
+    Args:
+        session: The session running the statement.
+        table_name (str): The table written to.
+        trip_id (int): The trip.
+    """
+    _record_trips(session, table_name, {trip_id})
+
+
+def _trips_of(obj):
+    """The trip ids of an ORM object before and after a flush, or None if it has no trip."""
+    state = inspect(obj)
+    if 'trip_id' not in state.mapper.attrs:
+        return None
+    history = state.attrs.trip_id.history
+    trip_ids = {trip_id for trip_id in chain(history.sum(), [state.dict.get('trip_id')]) if trip_id is not None}
+    return trip_ids or None
+
+
+class TableChangeLog:
+    """
+    Cross-process invalidation of the in-memory caches through a log of committed writes
+    kept in the database (the cyz_data_change table).
+
+    Every commit appends a row per table it wrote to, in the same transaction, or a row per
+    trip when the trips are known: ORM objects with a trip_id, and bulk statements run with
+    the TRIP_SCOPED option that report their trips with record_trip_write(). Writers only
+    ever insert, so they never wait on each other's rows.
+
+    Before a cache is read, sync() reads the rows logged since its last check and passes
+    what other processes wrote to the on_change() callbacks, as a dict of table name -> set
+    of trip ids, or None when any row of the table may have changed. Iterating the dict
+    gives the table names, so TTLCache.invalidate_tables() takes it as is. The process's own
+    commits are already handled in place by the on_tables_committed() listeners and are
+    skipped.
+
+    sync() costs one small indexed query, at most once per request and per `check_interval`
+    seconds. Writers delete the rows older than `retention` seconds now and then, so the
+    retention must stay well above the caches' TTLs. Without the table (a database not
+    upgraded yet) nothing is logged, and the caches fall back to their TTLs.
+    """
+
+    def __init__(self, check_interval=0, retention=3600):
+        """
+        Args:
+            check_interval (float): Seconds between two reads of the log in a process.
+                0 reads it on every request that reads a cache.
+            retention (float): Seconds the rows are kept in the log.
+        """
+        self.check_interval = check_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._checked_at = None  # wall-clock time of the last check
+        self._seen = {}          # change_id -> changed_at, of the rows the next check reads again
+        self._pruned_at = 0
+        self._available = None   # whether the table exists, once known
+        self._callbacks = []
+        self.changes = 0
+
+    def init_app(self, app):
+        """
+        Read the DATA_CHANGE_CHECK_INTERVAL and DATA_CHANGE_RETENTION config.
+
+        Args:
+            app: The Flask application.
+        """
+        self.check_interval = app.config.get('DATA_CHANGE_CHECK_INTERVAL', self.check_interval)
+        self.retention = app.config.get('DATA_CHANGE_RETENTION', self.retention)
+        with self._lock:
+            self._checked_at = None
+            self._seen = {}
+            self._available = None
+
+    def on_change(self, callback):
+        """
+        Register a callback that receives what another process wrote.
+
+        Args:
+            callback (callable): Called as callback(changes) from sync(), where changes maps
+                each table written to the set of trip ids written, or None for the whole table.
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def _table_exists(self, connection):
+        if self._available is None:
+            self._available = inspect(connection).has_table(DATA_CHANGE_TABLE)
+            if not self._available:
+                logger.warning("No %s table: caches are not invalidated across processes "
+                               "(run `flask db upgrade`)", DATA_CHANGE_TABLE)
+        return self._available
+
+    def sync(self, session):
+        """
+        Invalidate what other processes have written since the last check.
+
+        Args:
+            session: The session to read the log with, e.g. db.session.
+        """
+        if has_app_context():
+            if g.get('table_changes_synced'):
+                return
+            g.table_changes_synced = True
+        now = time.time()
+        checked_at = self._checked_at
+        if self._available is False or (checked_at is not None and now - checked_at < self.check_interval):
+            return
+
+        since = (now if checked_at is None else checked_at) - _LOOKBACK
+        try:
+            connection = session.connection()
+            if not self._table_exists(connection):
+                return
+            rows = session.execute(
+                select(_data_changes.c.change_id, _data_changes.c.changed_at,
+                       _data_changes.c.table_name, _data_changes.c.trip_id)
+                .where(_data_changes.c.changed_at >= since)).all()
+        except SQLAlchemyError:
+            logger.exception("Could not read the data change log")
+            return
+
+        changes = {}
+        with self._lock:
+            first = self._checked_at is None
+            self._checked_at = max(now, self._checked_at or now)
+            for change_id, changed_at, table_name, trip_id in rows:
+                if change_id in self._seen:
+                    continue
+                self._seen[change_id] = changed_at
+                if first:
+                    continue  # the first check only sets the baseline
+                if trip_id is None:
+                    changes[table_name] = None
+                elif changes.setdefault(table_name, set()) is not None:
+                    changes[table_name].add(trip_id)
+            horizon = self._checked_at - _LOOKBACK
+            self._seen = {change_id: changed_at for change_id, changed_at in self._seen.items()
+                          if changed_at >= horizon}
+        if changes:
+            self.changes += 1
+            logger.debug("Tables written by another process: %s", ', '.join(sorted(changes)))
+            for callback in self._callbacks:
+                callback(changes)
+
+    def _log(self, session):
+        written = session.info.get('written_trips')
+        if not written:
+            return
+        now = time.time()
+        rows = []
+        for table_name, trip_ids in sorted(written.items()):
+            if trip_ids is None or len(trip_ids) > _MAX_TRIPS:
+                rows.append({"changed_at": now, "table_name": table_name, "trip_id": None})
+            else:
+                rows.extend({"changed_at": now, "table_name": table_name, "trip_id": trip_id}
+                            for trip_id in sorted(trip_ids))
+        if not rows:
+            return
+
+        append = insert(_data_changes).returning(_data_changes.c.change_id)
+        # Writes always go to the primary (see database.RoutingSession)
+        connection = session.connection(bind_arguments={'clause': append})
+        if not self._table_exists(connection):
+            return
+        session.info['logged_changes'] = [(change_id, now) for change_id in connection.scalars(append, rows)]
+
+        with self._lock:
+            prune = now - self._pruned_at >= self.retention / 10
+            if prune:
+                self._pruned_at = now
+        if prune:
+            connection.execute(delete(_data_changes).where(_data_changes.c.changed_at < now - self.retention))
+
+    def _committed(self, logged):
+        # Our own rows are handled already; the next check must not pass them on
+        with self._lock:
+            self._seen.update(logged)
+
+    def track(self, session):
+        """
+        Log the tables, and trips, that each commit of a session writes to.
+
+        Args:
+            session: The session, session class or scoped session to listen on (e.g. db.session).
+        """
+        @event.listens_for(session, 'after_flush')
+        def _after_flush(session, flush_context):
+            for obj in chain(session.new, session.dirty, session.deleted):
+                _record_trips(session, obj.__table__.name, _trips_of(obj))
+
+        @event.listens_for(session, 'do_orm_execute')
+        def _do_orm_execute(orm_execute_state):
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                table = getattr(orm_execute_state.statement, 'table', None)
+                if table is not None:
+                    scoped = orm_execute_state.execution_options.get(TRIP_SCOPED)
+                    _record_trips(orm_execute_state.session, table.name, set() if scoped else None)
+
+        @event.listens_for(session, 'before_commit')
+        def _before_commit(session):
+            # Flush first, so the writes of pending objects are recorded too
+            session.flush()
+            self._log(session)
+
+        @event.listens_for(session, 'after_commit')
+        def _after_commit(session):
+            session.info.pop('written_trips', None)
+            logged = session.info.pop('logged_changes', None)
+            if logged:
+                self._committed(logged)
+
+        @event.listens_for(session, 'after_rollback')
+        def _after_rollback(session):
+            session.info.pop('written_trips', None)
+            session.info.pop('logged_changes', None)
@@ -0,0 +1,115 @@
+from functools import wraps
+
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from logs import get_logger
+
+__all__ = ['apply_sqlite_pragmas', 'install_sqlite_pragmas', 'init_database', 'RoutingSession',
+           'read_only', 'dispose_engines', 'REPLICA_BIND']
+
+logger = get_logger('database')
+
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """
+    Run `PRAGMA name = value` for each pragma on a raw sqlite3 connection.
+
+    Args:
+        dbapi_connection: The sqlite3 connection.
+        pragmas (dict): Pragma names and values, applied in order.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """
+    Apply the pragmas to every connection the engine opens. Engines for other databases are
+    left alone.
+
+    Args:
+        engine: The SQLAlchemy engine.
+        pragmas (dict): Pragma names and values, applied in order.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+def init_database(app, db):
+    """
+    Install the SQLITE_PRAGMAS config on all of the app's engines. Must run before the
+    first connection is opened.
+
+    Args:
+        app: The Flask application, after db.init_app(app).
+        db: The Flask-SQLAlchemy extension.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_pragmas(engine, pragmas)
+            logger.info("Engine %s: pool %s", engine.url, engine.pool.status())
+
+
+def dispose_engines(app, db):
+    """
+    Drop the pooled connections inherited from the parent process. Call this in every
+    worker right after it is forked, so workers never share a database connection; the
+    parent's connections are left open for the parent.
+
+    Args:
+        app: The Flask application.
+        db: The Flask-SQLAlchemy extension.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the queries of read-only requests to the replica engine.
+
+    A request is read-only when its view is decorated with @read_only. Everything else goes
+    to the primary: writes, flushes, and all queries when no replica is configured.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reading_from_replica() \
+                and not getattr(clause, 'is_dml', False):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _reading_from_replica():
+    return has_app_context() and g.get('db_read_only', False)
+
+
+def read_only(view):
+    """
+    Mark the GET requests of a view as read-only, so their queries can be served by the
+    replica. Other methods of the same view still use the primary.
+
+    Replicas can lag behind the primary, so only use this on views that may return slightly
+    stale data, not on ones that must see the user's own writes (e.g. right after booking).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = request.method in ('GET', 'HEAD')
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,3 +1,36 @@
 from flask_sqlalchemy import SQLAlchemy
+from availability import AvailabilityIndex
+from cache import TTLCache, TableChangeLog, track_table_writes, on_tables_committed
+from database import RoutingSession
+from metrics import RequestMetrics
+from profiler import RequestProfiler
+from passwords import PasswordHasher
 
-db = SQLAlchemy()
+# Queries of @read_only views go to the 'replica' bind when one is configured
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+# Serialized responses of the read-mostly catalog endpoints
+catalog_cache = TTLCache()
+# user -> passenger and group, and group -> active trip, for requests that don't carry token claims
+identity_cache = TTLCache(max_size=4096, ttl=30)
+password_hasher = PasswordHasher()
+# Vacant staterooms per trip, as bitsets
+availability_index = AvailabilityIndex()
+# Per-endpoint latency, database time and statement counts, served at /metrics
+request_metrics = RequestMetrics()
+# Opt-in cProfile and stack sampling of live requests
+request_profiler = RequestProfiler()
+# Log of committed writes in the database, to drop the caches of every worker on a commit
+table_changes = TableChangeLog()
+
+# Drop cached catalog responses whenever a commit writes to the tables they came from
+track_table_writes(db.session)
+on_tables_committed(catalog_cache.invalidate_tables)
+# ... and cached identities on passenger (profile) and booking writes
+on_tables_committed(identity_cache.invalidate_tables)
+# Apply committed bookings to the availability index, and drop it on other stateroom/price/trip writes
+availability_index.track_writes(db.session)
+# Log the tables and trips each commit writes, and drop what other workers' commits made stale
+table_changes.track(db.session)
+table_changes.on_change(availability_index.apply_changes)
+table_changes.on_change(catalog_cache.invalidate_tables)
+table_changes.on_change(identity_cache.invalidate_tables)
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings, overridable through the environment:
+
+    GUNICORN_BIND       address to listen on (default 127.0.0.1:8000)
+    WEB_CONCURRENCY     number of worker processes (default 2 * CPUs + 1)
+    GUNICORN_THREADS    threads per worker (default 1)
+
+Run from backend/ with `gunicorn -c gunicorn.conf.py wsgi:app`.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = 30
+# Import the app once in the master and fork it, so workers start fast and share memory
+preload_app = True
+accesslog = None
+
+
+def post_fork(server, worker):
+    # A forked worker must not reuse the database connections the master opened while
+    # loading the app; give it its own pool.
+    from database import dispose_engines
+    from extensions import db
+    from wsgi import app
+
+    dispose_engines(app, db)
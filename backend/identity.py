@@ -0,0 +1,170 @@
+from functools import wraps
+
+from flask import g, jsonify, session
+from flask_jwt_extended import create_access_token, get_jwt, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import select
+
+from extensions import db, identity_cache, table_changes
+from logs import get_logger
+from models import Passenger, StateroomBooking, StateroomPrice
+
+__all__ = ['Identity', 'issue_token', 'current_identity', 'login_required', 'admin_required']
+
+logger = get_logger('identity')
+
+
+class Identity:
+    """
+    The user a request is made by, with the passenger and group it acts for.
+
+    Requests with a valid `Authorization: Bearer` token are resolved from the token's
+    claims alone, without touching the database or a server-side session. Requests that
+    only carry the login session cookie look the passenger up on first use of
+    passenger_id or group_id, through identity_cache.
+
+    Each mapping is resolved at most once per Identity, and there is one Identity per
+    request (see current_identity()).
+    """
+
+    def __init__(self, user_id, role, passenger_id=None, group_id=None, from_token=False):
+        """
+        Args:
+            user_id (int): The user.
+            role (str): The user_type, 'admin' or 'passenger'.
+            passenger_id (int): The user's passenger, if known.
+            group_id (int): The passenger's group, if known.
+            from_token (bool): Whether this came from verified token claims.
+        """
+        self.user_id = user_id
+        self.role = role
+        self.from_token = from_token
+        # Token claims are complete; a session only knows the user
+        self._passenger = (passenger_id, group_id) if from_token else None
+        self._trip = ()
+
+    def _load_passenger(self):
+        row = db.session.execute(
+            select(Passenger.passenger_id, Passenger.group_id).filter_by(user_id=self.user_id)
+        ).first()
+        return tuple(row) if row else None
+
+    def _resolve(self):
+        if self._passenger is None:
+            # Drop mappings that another worker's commits made stale
+            table_changes.sync(db.session)
+            self._passenger = identity_cache.get_or_set(
+                ('passenger', self.user_id), self._load_passenger, (Passenger.__tablename__,)
+            ) or (None, None)
+        return self._passenger
+
+    @property
+    def passenger_id(self):
+        return self._resolve()[0]
+
+    @property
+    def group_id(self):
+        return self._resolve()[1]
+
+    @property
+    def active_trip_id(self):
+        """
+        The trip of the group's first stateroom booking, which package purchases are
+        charged to, or None if the group has not booked a stateroom.
+        """
+        if self._trip == ():
+            group_id = self.group_id
+            table_changes.sync(db.session)
+            self._trip = None if group_id is None else identity_cache.get_or_set(
+                ('trip', group_id), lambda: _first_booked_trip(group_id),
+                (StateroomBooking.__tablename__, StateroomPrice.__tablename__))
+        return self._trip
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+
+def _first_booked_trip(group_id):
+    return db.session.scalar(
+        select(StateroomPrice.trip_id)
+        .join(StateroomBooking, StateroomBooking.price_id == StateroomPrice.price_id)
+        .where(StateroomBooking.group_id == group_id)
+        .order_by(StateroomBooking.booking_id)
+        .limit(1)
+    )
+
+
+def issue_token(user, passenger=None):
+    """
+    Create the access token of a user, carrying everything the protected routes need as
+    claims: `sub` is the user id, plus the role, username, passenger_id and group_id.
+
+    Claims are fixed for the lifetime of the token (JWT_ACCESS_TOKEN_EXPIRES), so a
+    changed role or group takes effect at the next login.
+
+    Args:
+        user (User): The user logging in.
+        passenger (Passenger): The user's passenger, if any.
+
+    Returns:
+        str: The encoded token.
+    """
+    return create_access_token(identity=str(user.user_id), additional_claims={
+        "role": user.user_type,
+        "username": user.username,
+        "passenger_id": passenger.passenger_id if passenger else None,
+        "group_id": passenger.group_id if passenger else None,
+    })
+
+
+def _token_identity():
+    try:
+        if verify_jwt_in_request(optional=True) is None:
+            return None
+        claims = get_jwt()
+        return Identity(int(claims['sub']), claims.get('role'), claims.get('passenger_id'),
+                        claims.get('group_id'), from_token=True)
+    except (JWTExtendedException, PyJWTError, KeyError, ValueError) as e:
+        # Expired, tampered with or issued before claims were added: fall back to the session
+        logger.debug("Ignoring bearer token: %s", e)
+        return None
+
+
+def current_identity():
+    """
+    Resolve who is making the current request, once per request.
+
+    A valid bearer token wins over the session cookie; either is enough on its own.
+
+    Returns:
+        Identity: The identity, or None if the request is not authenticated.
+    """
+    if 'identity' not in g:
+        identity = _token_identity()
+        if identity is None and 'user_id' in session:
+            identity = Identity(session['user_id'], session.get('user_type'))
+        g.identity = identity
+    return g.identity
+
+
+def login_required(view):
+    """Respond 401 to requests without a valid token or login session."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_identity() is None:
+            return jsonify({"message": "You need to log in first."}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def admin_required(view):
+    """Respond 403 to requests that are not made by an admin."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        identity = current_identity()
+        if identity is None or not identity.is_admin:
+            return jsonify({"message": "Access denied. Admins only."}), 403
+        return view(*args, **kwargs)
+    return wrapper
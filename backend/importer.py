@@ -0,0 +1,222 @@
+import csv
+import io
+from collections import defaultdict
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from itinerary import ItinerarySchedule, find_schedule_conflicts
+from logs import get_logger
+from models import DAY_SECONDS, Itinerary, Port, Trip
+from utils import datetime_to_unix, unix_to_datetime
+
+__all__ = ['import_schedule', 'read_csv_rows', 'TRIP_FIELDS', 'ITINERARY_FIELDS']
+
+logger = get_logger('importer')
+
+# Columns of the trip and itinerary rows. Trips may carry a `ref` label, which
+# itinerary rows use as `trip_ref` to attach to a trip created by the same import.
+TRIP_FIELDS = ('ref', 'start_date', 'end_date', 'start_port_id', 'end_port_id')
+ITINERARY_FIELDS = ('trip_id', 'trip_ref', 'port_id', 'arrival_date_time', 'leaving_date_time')
+# Ids per `IN (...)` when loading the existing trips and stops
+LOOKUP_CHUNK_SIZE = 500
+
+
+def read_csv_rows(file):
+    """
+    Read an uploaded CSV file with a header row into a list of dicts.
+
+    Args:
+        file: The uploaded file (a werkzeug FileStorage or any binary file object).
+
+    Returns:
+        list: One dict per row, keyed by the header; empty cells are None.
+    """
+    text = io.TextIOWrapper(file.stream if hasattr(file, 'stream') else file, encoding='utf-8-sig')
+    return [{key: value or None for key, value in row.items()} for row in csv.DictReader(text)]
+
+
+def _int(value, name):
+    if value is None or value == '':
+        raise ValueError(f"{name} is required")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def _time(value, name):
+    if value is None or value == '':
+        raise ValueError(f"{name} is required")
+    if isinstance(value, int):
+        return value
+    try:
+        return datetime_to_unix(str(value))
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS") from None
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class _Errors(list):
+    def add(self, section, index, message):
+        # Rows are reported 1-based, in the order they were given
+        self.append({"section": section, "row": index + 1, "message": message})
+
+
+def _parse_trips(rows, ports, errors):
+    """Returns the insert parameters of the valid trips by row index, and the row index of each ref."""
+    trips, refs = {}, {}
+    for index, row in enumerate(rows):
+        # Register the ref even if the row is invalid, so its stops report the trip row
+        ref = row.get('ref')
+        if ref is not None:
+            ref = str(ref)
+            if ref in refs:
+                errors.add('trips', index, f"Duplicate ref {ref!r}")
+                continue
+            refs[ref] = index
+        try:
+            start = _time(row.get('start_date'), 'start_date')
+            end = _time(row.get('end_date'), 'end_date')
+            start_port_id = _int(row.get('start_port_id'), 'start_port_id')
+            end_port_id = _int(row.get('end_port_id'), 'end_port_id')
+        except ValueError as e:
+            errors.add('trips', index, str(e))
+            continue
+        if end <= start:
+            errors.add('trips', index, "Trip ends before it starts")
+        elif start_port_id not in ports or end_port_id not in ports:
+            errors.add('trips', index, "Port not found")
+        else:
+            trips[index] = {"start_date": start, "end_date": end, "start_port_id": start_port_id,
+                            "end_port_id": end_port_id, "length_days": (end - start) // DAY_SECONDS}
+    return trips, refs
+
+
+def _parse_itineraries(rows, ports, trip_refs, errors):
+    """Returns the trip key, (arrival, leaving) and port of each valid row, by row index."""
+    stops = {}
+    for index, row in enumerate(rows):
+        try:
+            arrival = _time(row.get('arrival_date_time'), 'arrival_date_time')
+            leaving = _time(row.get('leaving_date_time'), 'leaving_date_time')
+            port_id = _int(row.get('port_id'), 'port_id')
+            if row.get('trip_ref') is not None:
+                ref = str(row['trip_ref'])
+                if ref not in trip_refs:
+                    raise ValueError(f"Unknown trip_ref {ref!r}")
+                trip = ('new', trip_refs[ref])
+            else:
+                trip = ('existing', _int(row.get('trip_id'), 'trip_id or trip_ref'))
+        except ValueError as e:
+            errors.add('itineraries', index, str(e))
+            continue
+        if port_id not in ports:
+            errors.add('itineraries', index, "Port not found")
+            continue
+        stops[index] = (trip, (arrival, leaving), port_id)
+    return stops
+
+
+def _existing_trips(trip_ids):
+    """Load the (start, end) and the stops of existing trips in a few chunked queries."""
+    bounds, schedules = {}, defaultdict(list)
+    for chunk in _chunks(trip_ids):
+        for trip_id, start, end in db.session.execute(
+                select(Trip.trip_id, Trip.start_date, Trip.end_date).where(Trip.trip_id.in_(chunk))):
+            bounds[trip_id] = (start, end)
+        for trip_id, arrival, leaving in db.session.execute(
+                select(Itinerary.trip_id, Itinerary.arrival_date_time, Itinerary.leaving_date_time)
+                .where(Itinerary.trip_id.in_(chunk))):
+            schedules[trip_id].append((arrival, leaving))
+    return bounds, schedules
+
+
+def import_schedule(trip_rows=(), itinerary_rows=()):
+    """
+    Validate and import a batch of trips and itinerary stops in a single transaction.
+
+    Every row is validated before anything is written: dates, ports, trip references, and
+    each trip's stops against the trip, against each other and against the trip's existing
+    stops (see find_schedule_conflicts()). If any row is invalid nothing is imported.
+    Otherwise the trips and then the stops are written with one bulk INSERT each and a
+    single commit, instead of one round trip and commit per row.
+
+    Args:
+        trip_rows: Dicts with the TRIP_FIELDS; dates are YYYY-MM-DD strings or Unix times.
+        itinerary_rows: Dicts with the ITINERARY_FIELDS; each names an existing trip by
+            `trip_id` or a trip of this import by `trip_ref`.
+
+    Returns:
+        tuple: The list of errors, each {"section", "row", "message"} with `row` 1-based
+        within its section, and the ids of the created trips in row order (None if there
+        were errors).
+    """
+    errors = _Errors()
+    ports = set(db.session.scalars(select(Port.port_id)))
+
+    trips, trip_refs = _parse_trips(trip_rows, ports, errors)
+    stops = _parse_itineraries(itinerary_rows, ports, trip_refs, errors)
+
+    existing_ids = {trip[1] for trip, _, _ in stops.values() if trip[0] == 'existing'}
+    bounds, schedules = _existing_trips(existing_ids)
+
+    # Validate each trip's new stops as a whole schedule
+    by_trip = defaultdict(list)
+    for index, (trip, _, _) in stops.items():
+        by_trip[trip].append(index)
+    for (kind, key), indexes in by_trip.items():
+        if kind == 'new':
+            if key not in trips:
+                for index in indexes:
+                    errors.add('itineraries', index, f"Trip row {key + 1} is invalid")
+                continue
+            trip_start, trip_end = trips[key]['start_date'], trips[key]['end_date']
+            existing = None
+        else:
+            if key not in bounds:
+                for index in indexes:
+                    errors.add('itineraries', index, f"Trip with ID {key} not found")
+                continue
+            trip_start, trip_end = bounds[key]
+            existing = ItinerarySchedule(schedules[key])
+        for problem in find_schedule_conflicts([stops[i][1] for i in indexes], trip_start, trip_end, existing):
+            index = indexes[problem["index"]]
+            if "error" in problem:
+                message = problem["error"]
+            elif "existing" in problem:
+                arrival, leaving = problem["existing"]
+                message = (f"Conflicts with the existing itinerary from {unix_to_datetime(arrival, True)} "
+                           f"to {unix_to_datetime(leaving, True)}")
+            else:
+                message = f"Conflicts with itinerary row {indexes[problem['conflicts_with']] + 1}"
+            errors.add('itineraries', index, message)
+
+    if errors:
+        errors.sort(key=lambda error: (error["section"] != 'trips', error["row"]))
+        return errors, None
+
+    try:
+        trip_ids = []
+        if trips:
+            trip_ids = list(db.session.scalars(
+                insert(Trip).returning(Trip.trip_id, sort_by_parameter_order=True),
+                [trips[index] for index in sorted(trips)]))
+        new_ids = dict(zip(sorted(trips), trip_ids))
+        if stops:
+            db.session.execute(insert(Itinerary), [
+                {"trip_id": new_ids[key] if kind == 'new' else key, "port_id": port_id,
+                 "arrival_date_time": arrival, "leaving_date_time": leaving}
+                for (kind, key), (arrival, leaving), port_id in (stops[index] for index in sorted(stops))
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info("Imported %s trips and %s itineraries", len(trip_ids), len(stops))
+    return [], trip_ids
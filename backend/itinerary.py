@@ -0,0 +1,148 @@
+import heapq
+from bisect import bisect_left
+
+__all__ = ['ItinerarySchedule', 'check_itinerary_times', 'find_schedule_conflicts']
+
+
+def _overlaps(start, end, other_start, other_end):
+    # Stops are half-open [arrival, leaving): leaving a port at the time the next stop
+    # arrives is not a conflict
+    return start < other_end and other_start < end
+
+
+class ItinerarySchedule:
+    """
+    The stops of a trip as a static interval tree, for overlap queries in O(log n + k).
+
+    The (start, end) intervals are sorted by start, and an implicit balanced tree over the
+    sorted list keeps the latest end of every subtree. A query only descends into subtrees
+    that start before the new stop ends and still run past its start, so it finds every
+    overlapping stop - including ones the new stop fully encloses - without scanning the
+    whole itinerary.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        Args:
+            intervals: (start, end) pairs of Unix times, e.g. the arrival and leaving times
+                of the existing stops. They may overlap each other.
+        """
+        self._intervals = sorted(intervals)
+        self._starts = [start for start, _ in self._intervals]
+        self._max_end = [None] * len(self._intervals)
+        self._build(0, len(self._intervals))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def _build(self, lo, hi):
+        """Fill in the latest end of the subtree over intervals[lo:hi], rooted at its middle."""
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        latest = self._intervals[mid][1]
+        for end in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if end is not None and end > latest:
+                latest = end
+        self._max_end[mid] = latest
+        return latest
+
+    def _collect(self, start, end, lo, hi, limit, found):
+        if lo >= min(hi, limit):
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return  # nothing in this subtree runs past the start
+        self._collect(start, end, lo, mid, limit, found)
+        if mid < limit and _overlaps(start, end, *self._intervals[mid]):
+            found.append(self._intervals[mid])
+        self._collect(start, end, mid + 1, hi, limit, found)
+
+    def conflicts(self, start, end):
+        """
+        Find the intervals that overlap [start, end).
+
+        Args:
+            start (int): The start of the new interval.
+            end (int): The end of the new interval.
+
+        Returns:
+            list: The overlapping (start, end) intervals, ordered by start.
+        """
+        found = []
+        # Only intervals starting before the new one ends can overlap it
+        limit = bisect_left(self._starts, end)
+        self._collect(start, end, 0, len(self._intervals), limit, found)
+        return found
+
+    def has_conflict(self, start, end):
+        """
+        Returns:
+            bool: Whether any interval overlaps [start, end).
+        """
+        return bool(self.conflicts(start, end))
+
+
+def check_itinerary_times(start, end, trip_start_time, trip_end_time):
+    """
+    Check that a stop lies within its trip and ends after it starts.
+
+    Args:
+        start (int): The arrival time.
+        end (int): The leaving time.
+        trip_start_time (int): The start of the trip.
+        trip_end_time (int): The end of the trip.
+
+    Returns:
+        str: What is wrong with the times, or None if they are valid.
+    """
+    if start < trip_start_time:
+        return "Itinerary starts before the trip"
+    if end > trip_end_time:
+        return "Itinerary ends after the trip"
+    if end <= start:
+        return "Itinerary ends before it starts"
+    return None
+
+
+def find_schedule_conflicts(itineraries, trip_start_time, trip_end_time, existing=None):
+    """
+    Validate a whole itinerary schedule at once: every stop against the trip, against the
+    other new stops, and against the stops the trip already has.
+
+    The new stops are swept in order of arrival with a heap of the ones still in port, so
+    each stop is compared only with the stops it actually overlaps.
+
+    Args:
+        itineraries: (start, end) pairs of Unix times of the new stops.
+        trip_start_time (int): The start of the trip.
+        trip_end_time (int): The end of the trip.
+        existing (ItinerarySchedule): The existing stops of the trip. Defaults to None (none).
+
+    Returns:
+        list: One dict per problem, each with the "index" of the new stop and either an
+        "error" message, a "conflicts_with" index of another new stop, or an "existing"
+        (start, end) stop it overlaps. Empty if the schedule is valid.
+    """
+    problems = []
+    valid = []
+    for index, (start, end) in enumerate(itineraries):
+        error = check_itinerary_times(start, end, trip_start_time, trip_end_time)
+        if error:
+            problems.append({"index": index, "error": error})
+            continue
+        valid.append((start, end, index))
+        if existing is not None:
+            for interval in existing.conflicts(start, end):
+                problems.append({"index": index, "existing": interval})
+
+    in_port = []  # (end, index) of the stops that started before the current one
+    for start, end, index in sorted(valid):
+        while in_port and in_port[0][0] <= start:
+            heapq.heappop(in_port)
+        for _, other in sorted(in_port, key=lambda item: item[1]):
+            problems.append({"index": max(index, other), "conflicts_with": min(index, other)})
+        heapq.heappush(in_port, (end, index))
+
+    problems.sort(key=lambda problem: problem["index"])
+    return problems
@@ -0,0 +1,77 @@
+import logging
+import re
+import uuid
+
+from flask import g, has_request_context, request
+
+__all__ = ['configure_logging', 'get_logger']
+
+# All application loggers live under this namespace, e.g. 'cruise.app'
+ROOT_LOGGER = 'cruise'
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# Request ids accepted from the X-Request-ID header; anything else gets a generated one
+_REQUEST_ID = re.compile(r'[A-Za-z0-9-]{1,64}\Z')
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Attach the id of the current request to every record, or '-' outside of a request.
+    """
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+def get_logger(name):
+    """
+    Get an application logger. Its level can be set per module with the LOG_LEVELS config.
+
+    Args:
+        name (str): The module name, e.g. 'app'.
+
+    Returns:
+        logging.Logger: The 'cruise.<name>' logger.
+    """
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def configure_logging(app):
+    """
+    Set up the application loggers from the app config.
+
+    Config keys:
+        LOG_LEVEL (str): Level of the 'cruise' logger, e.g. 'WARNING' in production.
+        LOG_LEVELS (dict): Per-module overrides, e.g. {'app': 'DEBUG'}.
+
+    Each request gets an id (taken from the X-Request-ID header when the client sends a
+    valid one: up to 64 letters, digits and dashes) that is included in every log line and
+    echoed back in the response.
+
+    Args:
+        app: The Flask application.
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(app.config.get('LOG_LEVEL', 'WARNING'))
+    for name, level in app.config.get('LOG_LEVELS', {}).items():
+        get_logger(name).setLevel(level)
+
+    if not any(isinstance(f, RequestIdFilter) for h in root.handlers for f in h.filters):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(RequestIdFilter())
+        root.addHandler(handler)
+        root.propagate = False
+
+    @app.before_request
+    def assign_request_id():
+        request_id = request.headers.get('X-Request-ID', '')
+        g.request_id = request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex[:12]
+
+    @app.after_request
+    def echo_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
@@ -0,0 +1,223 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from logs import get_logger
+
+__all__ = ['Histogram', 'RequestMetrics', 'DURATION_BUCKETS', 'STATEMENT_BUCKETS']
+
+logger = get_logger('metrics')
+
+# Upper bounds of the histogram buckets, in seconds and in statements per request
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """
+    Observation counts in fixed buckets, plus their sum, as a Prometheus histogram.
+
+    Not thread-safe on its own; RequestMetrics guards every histogram with its lock.
+    """
+
+    def __init__(self, buckets):
+        """
+        Args:
+            buckets (tuple): The upper bounds of the buckets, ascending. A final +Inf
+                bucket is implied.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """Yield (le, cumulative count) pairs, ending with '+Inf'."""
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            yield _format_number(bound), seen
+        yield '+Inf', self.count
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request instrumentation: wall time, database time and SQL statement count
+    of every request, kept in histograms by endpoint and served in the Prometheus text
+    format at /metrics.
+
+    Database time and statements are measured with the before/after_cursor_execute events
+    of every engine of the app, so they include the replica and Core statements. Requests
+    over the latency or statement budget are logged as warnings with their request id.
+
+    The numbers are per process: with several gunicorn workers each one serves its own,
+    which Prometheus adds up across scrape targets.
+
+    /metrics reveals the app's endpoints and load, so it only answers a scraper sending
+    METRICS_TOKEN as a bearer token, or a logged-in admin; anyone else gets a 403.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._duration = {}    # endpoint -> Histogram of wall time
+        self._db_time = {}     # endpoint -> Histogram of time in the database
+        self._statements = {}  # endpoint -> Histogram of statements per request
+        self._requests = {}    # (endpoint, method, status) -> count
+        self.slow_request_ms = None
+        self.max_queries = None
+        self.token = None
+
+    def init_app(self, app, db):
+        """
+        Install the request hooks, the engine listeners and the /metrics route.
+
+        Config keys:
+            METRICS_ENABLED (bool): Whether to instrument requests at all.
+            METRICS_SLOW_REQUEST_MS (float): Log requests slower than this. None to disable.
+            METRICS_MAX_QUERIES (int): Log requests issuing more statements. None to disable.
+            METRICS_TOKEN (str): The bearer token scrapers authenticate with. None to only
+                serve /metrics to admins.
+
+        Args:
+            app: The Flask application, after db.init_app(app).
+            db: The Flask-SQLAlchemy extension.
+        """
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        self.slow_request_ms = app.config.get('METRICS_SLOW_REQUEST_MS')
+        self.max_queries = app.config.get('METRICS_MAX_QUERIES')
+        self.token = app.config.get('METRICS_TOKEN')
+
+        with app.app_context():
+            for engine in db.engines.values():
+                self._instrument_engine(engine)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view, methods=['GET'])
+
+    @staticmethod
+    def _instrument_engine(engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and 'metrics_started' in g:
+                conn.info['metrics_query_started'] = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # A statement that failed never gets here; the next one overwrites its start
+            started = conn.info.pop('metrics_query_started', None)
+            if started is not None and has_request_context() and 'metrics_started' in g:
+                g.metrics_db_time += time.perf_counter() - started
+                g.metrics_statements += 1
+
+    @staticmethod
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_time = 0.0
+        g.metrics_statements = 0
+
+    def _finish_request(self, response):
+        if 'metrics_started' not in g or request.endpoint == 'metrics':
+            return response
+        elapsed = time.perf_counter() - g.metrics_started
+        endpoint = request.endpoint or '<unmatched>'
+        self.record(endpoint, request.method, response.status_code, elapsed,
+                    g.metrics_db_time, g.metrics_statements)
+
+        over_time = self.slow_request_ms is not None and elapsed * 1000 > self.slow_request_ms
+        over_queries = self.max_queries is not None and g.metrics_statements > self.max_queries
+        if over_time or over_queries:
+            logger.warning("Over budget: %s %s (%s) took %.1f ms with %d statements, %.1f ms in the database",
+                           request.method, request.path, endpoint, elapsed * 1000,
+                           g.metrics_statements, g.metrics_db_time * 1000)
+        return response
+
+    def record(self, endpoint, method, status, duration, db_time, statements):
+        """
+        Record one request.
+
+        Args:
+            endpoint (str): The Flask endpoint, e.g. 'passenger.view_my_trip'.
+            method (str): The HTTP method.
+            status (int): The response status code.
+            duration (float): The wall time, in seconds.
+            db_time (float): The time spent executing statements, in seconds.
+            statements (int): The number of statements executed.
+        """
+        with self._lock:
+            if endpoint not in self._duration:
+                self._duration[endpoint] = Histogram(DURATION_BUCKETS)
+                self._db_time[endpoint] = Histogram(DURATION_BUCKETS)
+                self._statements[endpoint] = Histogram(STATEMENT_BUCKETS)
+            self._duration[endpoint].observe(duration)
+            self._db_time[endpoint].observe(db_time)
+            self._statements[endpoint].observe(statements)
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._duration.clear()
+            self._db_time.clear()
+            self._statements.clear()
+            self._requests.clear()
+
+    def render(self):
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = [
+            '# HELP cruise_requests_total Requests handled, by endpoint, method and status.',
+            '# TYPE cruise_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'cruise_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+            for name, description, histograms in (
+                    ('cruise_request_duration_seconds', 'Wall time of requests, by endpoint.', self._duration),
+                    ('cruise_request_db_seconds', 'Time requests spent executing SQL, by endpoint.', self._db_time),
+                    ('cruise_request_db_statements', 'SQL statements per request, by endpoint.', self._statements)):
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for endpoint, histogram in sorted(histograms.items()):
+                    for le, count in histogram.samples():
+                        lines.append(f'{name}_bucket{_labels(endpoint=endpoint, le=le)} {count}')
+                    lines.append(f'{name}_sum{_labels(endpoint=endpoint)} {_format_number(histogram.sum)}')
+                    lines.append(f'{name}_count{_labels(endpoint=endpoint)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _authorized(self):
+        if self.token:
+            scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), self.token.encode()):
+                return True
+        # Imported here: the identity module needs the models, which need the extensions
+        from identity import current_identity
+        identity = current_identity()
+        return identity is not None and identity.is_admin
+
+    def _metrics_view(self):
+        if not self._authorized():
+            return jsonify({"message": "Access denied."}), 403
+        return current_app.response_class(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
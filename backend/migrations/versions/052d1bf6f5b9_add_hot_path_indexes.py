@@ -0,0 +1,57 @@
+"""add hot path indexes
+
+Revision ID: 052d1bf6f5b9
+Revises: 
+Create Date: 2026-10-18 10:55:56.804552
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '052d1bf6f5b9'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cyz_itinerary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cyz_itinerary_trip_id'), ['trip_id'], unique=False)
+
+    with op.batch_alter_table('cyz_passenger', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cyz_passenger_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('cyz_payment', schema=None) as batch_op:
+        batch_op.create_index('ix_cyz_payment_group_id_trip_id', ['group_id', 'trip_id'], unique=False)
+
+    with op.batch_alter_table('cyz_stateroom_booking', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cyz_stateroom_booking_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_cyz_stateroom_booking_price_id'), ['price_id'], unique=False)
+
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.create_index('ix_cyz_stateroom_price_trip_id_stateroom_id', ['trip_id', 'stateroom_id'], unique=False)
+
+    with op.batch_alter_table('cyz_trip', schema=None) as batch_op:
+        batch_op.create_index('ix_cyz_trip_start_date_end_date', ['start_date', 'end_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cyz_trip', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_trip_start_date_end_date')
+
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_stateroom_price_trip_id_stateroom_id')
+
+    with op.batch_alter_table('cyz_stateroom_booking', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cyz_stateroom_booking_price_id'))
+        batch_op.drop_index(batch_op.f('ix_cyz_stateroom_booking_group_id'))
+
+    with op.batch_alter_table('cyz_payment', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_payment_group_id_trip_id')
+
+    with op.batch_alter_table('cyz_passenger', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cyz_passenger_user_id'))
+
+    with op.batch_alter_table('cyz_itinerary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cyz_itinerary_trip_id'))
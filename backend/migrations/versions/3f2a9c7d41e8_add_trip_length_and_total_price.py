@@ -0,0 +1,41 @@
+"""add trip length and total price
+
+Revision ID: 3f2a9c7d41e8
+Revises: 052d1bf6f5b9
+Create Date: 2026-10-18 11:32:10.418223
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c7d41e8'
+down_revision = '052d1bf6f5b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cyz_trip', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('length_days', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_price', sa.Float(), nullable=True))
+        batch_op.create_index('ix_cyz_stateroom_price_trip_id_total_price', ['trip_id', 'total_price'], unique=False)
+
+    # Backfill the existing rows
+    op.execute("UPDATE cyz_trip SET length_days = (end_date - start_date) / 86400")
+    op.execute(
+        "UPDATE cyz_stateroom_price SET total_price = price_per_night * "
+        "(SELECT length_days FROM cyz_trip WHERE cyz_trip.trip_id = cyz_stateroom_price.trip_id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_stateroom_price_trip_id_total_price')
+        batch_op.drop_column('total_price')
+
+    with op.batch_alter_table('cyz_trip', schema=None) as batch_op:
+        batch_op.drop_column('length_days')
@@ -0,0 +1,37 @@
+"""room search indexes
+
+Revision ID: 8b41d6e0c2f7
+Revises: 3f2a9c7d41e8
+Create Date: 2026-10-18 15:04:37.912655
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d6e0c2f7'
+down_revision = '3f2a9c7d41e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cyz_stateroom', schema=None) as batch_op:
+        batch_op.create_index('ix_cyz_stateroom_facets', ['stateroom_type', 'location', 'num_bed', 'num_bathroom', 'num_balcony'], unique=False)
+
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_stateroom_price_trip_id_stateroom_id')
+        batch_op.create_index('ix_cyz_stateroom_price_search', ['trip_id', 'stateroom_id', 'is_vacant', 'total_price'], unique=False)
+
+    # Without statistics SQLite joins from the prices and sorts the groups in a temp b-tree
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("ANALYZE")
+
+
+def downgrade():
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_stateroom_price_search')
+        batch_op.create_index('ix_cyz_stateroom_price_trip_id_stateroom_id', ['trip_id', 'stateroom_id'], unique=False)
+
+    with op.batch_alter_table('cyz_stateroom', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_stateroom_facets')
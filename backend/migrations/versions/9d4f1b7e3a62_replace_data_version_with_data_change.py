@@ -0,0 +1,46 @@
+"""replace data version with data change
+
+Revision ID: 9d4f1b7e3a62
+Revises: e2a7c4915b3d
+Create Date: 2026-10-18 23:12:47.905126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f1b7e3a62'
+down_revision = 'e2a7c4915b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cyz_data_change',
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.Float(), nullable=False),
+    sa.Column('table_name', sa.Text(), nullable=False),
+    sa.Column('trip_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('change_id')
+    )
+    with op.batch_alter_table('cyz_data_change', schema=None) as batch_op:
+        batch_op.create_index('ix_cyz_data_change_changed_at', ['changed_at'], unique=False)
+
+    op.drop_table('cyz_data_version')
+
+
+def downgrade():
+    data_version = op.create_table('cyz_data_version',
+    sa.Column('table_name', sa.Text(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    tables = sorted(name for name in sa.inspect(op.get_bind()).get_table_names()
+                    if name.startswith('cyz_') and name not in ('cyz_data_change', 'cyz_data_version'))
+    op.bulk_insert(data_version, [{'table_name': name, 'version': 0} for name in tables])
+
+    with op.batch_alter_table('cyz_data_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_cyz_data_change_changed_at')
+
+    op.drop_table('cyz_data_change')
@@ -0,0 +1,29 @@
+"""add base price per night
+
+Revision ID: c5e93a17b2d4
+Revises: 8b41d6e0c2f7
+Create Date: 2026-10-18 17:21:08.530114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e93a17b2d4'
+down_revision = '8b41d6e0c2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('base_price_per_night', sa.Float(), nullable=True))
+
+    # The current prices become the base prices
+    op.execute("UPDATE cyz_stateroom_price SET base_price_per_night = price_per_night")
+
+
+def downgrade():
+    with op.batch_alter_table('cyz_stateroom_price', schema=None) as batch_op:
+        batch_op.drop_column('base_price_per_night')
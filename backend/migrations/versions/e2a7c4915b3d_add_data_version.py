@@ -0,0 +1,32 @@
+"""add data version
+
+Revision ID: e2a7c4915b3d
+Revises: c5e93a17b2d4
+Create Date: 2026-10-18 21:40:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4915b3d'
+down_revision = 'c5e93a17b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table('cyz_data_version',
+    sa.Column('table_name', sa.Text(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # One counter per existing table, so commits only ever update them
+    tables = sorted(name for name in sa.inspect(op.get_bind()).get_table_names()
+                    if name.startswith('cyz_') and name != 'cyz_data_version')
+    op.bulk_insert(data_version, [{'table_name': name, 'version': 0} for name in tables])
+
+
+def downgrade():
+    op.drop_table('cyz_data_version')
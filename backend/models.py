@@ -1,5 +1,8 @@
 from extensions import db
 
+# Seconds per day, for trip lengths stored as Unix time differences
+DAY_SECONDS = 24 * 60 * 60
+
 # Address Model
 class Address(db.Model):
     __tablename__ = 'cyz_address'
@@ -21,6 +24,16 @@ class Admin(db.Model):
     admin_fname = db.Column(db.Text, nullable=False)
     admin_lname = db.Column(db.Text, nullable=False)
 
+# DataChange Model
+class DataChange(db.Model):
+    # Log of committed writes (table, and trip when known) that tells every process which
+    # cached data went stale, maintained by cache.TableChangeLog
+    __tablename__ = 'cyz_data_change'
+    change_id = db.Column(db.Integer, primary_key=True)
+    changed_at = db.Column(db.Float, nullable=False, index=True)
+    table_name = db.Column(db.Text, nullable=False)
+    trip_id = db.Column(db.Integer)
+
 # Entertainment Model
 class Entertainment(db.Model):
     __tablename__ = 'cyz_entertainment'
@@ -53,9 +66,11 @@ class Itinerary(db.Model):
     itinerary_id = db.Column(db.Integer, primary_key=True)
     arrival_date_time = db.Column(db.Integer)
     leaving_date_time = db.Column(db.Integer)
-    trip_id = db.Column(db.Integer, db.ForeignKey('cyz_trip.trip_id'))
+    trip_id = db.Column(db.Integer, db.ForeignKey('cyz_trip.trip_id'), index=True)
     port_id = db.Column(db.Integer, db.ForeignKey('cyz_port.port_id'))
 
+    port = db.relationship('Port')
+
 # Package Model
 class Package(db.Model):
     __tablename__ = 'cyz_package'
@@ -84,11 +99,15 @@ class Passenger(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey('cyz_group.group_id'), nullable=False)
     passenger_fname = db.Column(db.Text, nullable=False)
     passenger_lname = db.Column(db.Text, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('cyz_user.user_id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('cyz_user.user_id'), nullable=False, index=True)
 
 # Payment Model
 class Payment(db.Model):
     __tablename__ = 'cyz_payment'
+    # Trips of a group are looked up through their payments
+    __table_args__ = (
+        db.Index('ix_cyz_payment_group_id_trip_id', 'group_id', 'trip_id'),
+    )
     payment_id = db.Column(db.Integer, primary_key=True)
     payment_date = db.Column(db.Integer, nullable=False)
     pay_amount = db.Column(db.Float, nullable=False)
@@ -125,6 +144,10 @@ class RestaurantTrip(db.Model):
 # Stateroom Model
 class Stateroom(db.Model):
     __tablename__ = 'cyz_stateroom'
+    __table_args__ = (
+        # Room search facet counts scan this in order, so grouping by the facets needs no sort
+        db.Index('ix_cyz_stateroom_facets', 'stateroom_type', 'location', 'num_bed', 'num_bathroom', 'num_balcony'),
+    )
     stateroom_id = db.Column(db.Integer, primary_key=True)
     stateroom_type = db.Column(db.Text, nullable=False)
     location = db.Column(db.Text, db.CheckConstraint("location IN ('forward', 'aft', 'left', 'right')"), nullable=False)
@@ -138,27 +161,71 @@ class Stateroom(db.Model):
 class StateroomBooking(db.Model):
     __tablename__ = 'cyz_stateroom_booking'
     booking_id = db.Column(db.Integer, primary_key=True)
-    group_id = db.Column(db.Integer, db.ForeignKey('cyz_group.group_id'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('cyz_group.group_id'), nullable=False, index=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('cyz_invoice.invoice_id'), nullable=False)
-    price_id = db.Column(db.Integer, db.ForeignKey('cyz_stateroom_price.price_id'), nullable=False)
+    price_id = db.Column(db.Integer, db.ForeignKey('cyz_stateroom_price.price_id'), nullable=False, index=True)
+
+    price = db.relationship('StateroomPrice')
 
 # StateroomPrice Model
 class StateroomPrice(db.Model):
     __tablename__ = 'cyz_stateroom_price'
+    __table_args__ = (
+        # Price of a stateroom on a trip; also covers the room search filters, so the search
+        # reads no table rows while joining from the staterooms
+        db.Index('ix_cyz_stateroom_price_search', 'trip_id', 'stateroom_id', 'is_vacant', 'total_price'),
+        # Room listings of a trip sorted or range-filtered by total price
+        db.Index('ix_cyz_stateroom_price_trip_id_total_price', 'trip_id', 'total_price'),
+    )
     price_id = db.Column(db.Integer, primary_key=True)
     stateroom_id = db.Column(db.Integer, db.ForeignKey('cyz_stateroom.stateroom_id'), nullable=False)
     price_per_night = db.Column(db.Float, nullable=False)
     trip_id = db.Column(db.Integer, db.ForeignKey('cyz_trip.trip_id'), nullable=False)
     is_vacant = db.Column(db.Boolean, nullable=False)
+    # price_per_night * Trip.length_days, kept up to date by the admin routes
+    total_price = db.Column(db.Float)
+    # The price set by an admin or a pricing template; dynamic repricing moves
+    # price_per_night around it. NULL means price_per_night is the base price.
+    base_price_per_night = db.Column(db.Float)
+
+    stateroom = db.relationship('Stateroom')
+
+    def update_total_price(self, length_days):
+        """Recompute the total price from the price per night and the trip length."""
+        self.total_price = float(self.price_per_night) * length_days
+
+    @staticmethod
+    def update_total_prices_for_trip(trip):
+        """Recompute the total price of every stateroom on a trip in one UPDATE."""
+        StateroomPrice.query.filter_by(trip_id=trip.trip_id).update(
+            {StateroomPrice.total_price: StateroomPrice.price_per_night * trip.length_days},
+            synchronize_session=False)
 
 # Trip Model
 class Trip(db.Model):
     __tablename__ = 'cyz_trip'
+    # Date range search on /Passenger/Trip
+    __table_args__ = (
+        db.Index('ix_cyz_trip_start_date_end_date', 'start_date', 'end_date'),
+    )
     trip_id = db.Column(db.Integer, primary_key=True)
     start_date = db.Column(db.Integer, nullable=False)
     end_date = db.Column(db.Integer, nullable=False)
     start_port_id = db.Column(db.Integer, db.ForeignKey('cyz_port.port_id'), nullable=False)
     end_port_id = db.Column(db.Integer, db.ForeignKey('cyz_port.port_id'), nullable=False)
+    # Whole days between start_date and end_date, kept up to date by the admin routes
+    length_days = db.Column(db.Integer)
+
+    start_port = db.relationship('Port', foreign_keys=[start_port_id])
+    end_port = db.relationship('Port', foreign_keys=[end_port_id])
+    # Itineraries are removed explicitly by the admin routes, so don't let the
+    # ORM load them just to null out trip_id when a trip is deleted
+    itineraries = db.relationship('Itinerary', order_by='Itinerary.arrival_date_time',
+                                  passive_deletes=True)
+
+    def update_length(self):
+        """Recompute length_days from the start and end dates."""
+        self.length_days = (self.end_date - self.start_date) // DAY_SECONDS
 
 # User Model
 class User(db.Model):
@@ -171,7 +238,7 @@ class User(db.Model):
 
 
 __all__ = [
-    'Address', 'Admin', 'Entertainment', 'EntertainmentTrip', 'Group',
+    'Address', 'Admin', 'DataChange', 'Entertainment', 'EntertainmentTrip', 'Group',
     'Invoice', 'Itinerary', 'Package', 'PackageSale', 'Passenger', 'Payment',
     'Port', 'Restaurant', 'RestaurantTrip', 'Stateroom', 'StateroomBooking',
     'StateroomPrice', 'Trip', 'User'
@@ -0,0 +1,105 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+__all__ = ['PasswordHasher', 'HasherBusyError', 'normalize_method']
+
+
+class HasherBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+def normalize_method(method):
+    """
+    Expand a werkzeug hash method to the full form stored in the hash, with all cost
+    parameters filled in, e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000'.
+
+    Args:
+        method (str): A werkzeug method string such as 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'.
+
+    Returns:
+        str: The normalized method string.
+    """
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{int(iterations)}'
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    raise ValueError(f"Unsupported password hash method: {method}")
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords with a configurable method and cost.
+
+    Hashing runs on a bounded pool of worker threads (hashlib releases the GIL while
+    hashing), so expensive hashes use at most PASSWORD_HASH_WORKERS cores and cannot
+    starve the threads serving other requests. When more than PASSWORD_HASH_QUEUE
+    hashes are pending, new ones are refused with HasherBusyError instead of piling up.
+
+    Config keys:
+        PASSWORD_HASH_METHOD (str): werkzeug method, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'.
+        PASSWORD_HASH_WORKERS (int): Number of hashing threads. Defaults to the CPU count.
+        PASSWORD_HASH_QUEUE (int): Maximum number of hashes running or waiting.
+    """
+
+    def __init__(self, method='pbkdf2:sha256', workers=None, queue_size=None):
+        self._configure(method, workers, queue_size)
+
+    def init_app(self, app):
+        """
+        Args:
+            app: The Flask application.
+        """
+        self._configure(app.config.get('PASSWORD_HASH_METHOD', self.method),
+                        app.config.get('PASSWORD_HASH_WORKERS'),
+                        app.config.get('PASSWORD_HASH_QUEUE'))
+
+    def _configure(self, method, workers, queue_size):
+        self.method = normalize_method(method)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.workers * 8
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("Too many password hashes in progress.")
+        try:
+            if self._executor is None:
+                with self._executor_lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """
+        Returns:
+            str: The hash of password with the configured method.
+        """
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """
+        Returns:
+            bool: Whether password matches stored_hash, whatever method it was made with.
+        """
+        return self._submit(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """
+        Returns:
+            bool: Whether stored_hash was made with a different method or cost than configured.
+        """
+        return stored_hash.split('$', 1)[0] != self.method
@@ -0,0 +1,172 @@
+import math
+from collections import defaultdict
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from logs import get_logger
+from models import DAY_SECONDS, Stateroom, StateroomPrice
+
+__all__ = ['PricingError', 'PricingRules', 'generate_trip_prices']
+
+logger = get_logger('pricing')
+
+
+class PricingError(Exception):
+    """A rule set or trip that prices cannot be generated for, with the message to return to the client."""
+
+
+def _number(value, name):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise PricingError(f"{name} must be a number.") from None
+    # float() also accepts "nan" and "inf"
+    if not math.isfinite(number):
+        raise PricingError(f"{name} must be a finite number.")
+    if number < 0:
+        raise PricingError(f"{name} must not be negative.")
+    return number
+
+
+class PricingRules:
+    """
+    A pricing template: the price per night of a stateroom is the base price of its type,
+    times the multipliers of its location, its number of balconies and its size tier.
+
+    As JSON:
+        {
+            "base_prices": {"Inside": 120, "Family Balcony": 260, ...},
+            "location_multipliers": {"forward": 0.95, "aft": 1.05},
+            "balcony_multipliers": {"0": 1, "1": 1.1, "2": 1.2},
+            "sqft_tiers": [[0, 1], [400, 1.1], [800, 1.25]]
+        }
+    Only base_prices is required; missing multipliers are 1. A stateroom gets the
+    multiplier of the largest sqft tier it reaches.
+    """
+
+    def __init__(self, base_prices, location_multipliers=None, balcony_multipliers=None, sqft_tiers=None):
+        """
+        Args:
+            base_prices (dict): stateroom_type -> base price per night.
+            location_multipliers (dict): location -> multiplier.
+            balcony_multipliers (dict): num_balcony -> multiplier.
+            sqft_tiers (list): (minimum sqft, multiplier) pairs.
+        """
+        self.base_prices = base_prices
+        self.location_multipliers = location_multipliers or {}
+        self.balcony_multipliers = balcony_multipliers or {}
+        self.sqft_tiers = sorted(sqft_tiers or [])
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Build the rules from a JSON object, checking every value.
+
+        Raises:
+            PricingError: If the rules are malformed.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get('base_prices'), dict) or not data['base_prices']:
+            raise PricingError("rules.base_prices is required, as an object of stateroom_type -> price.")
+        for name in ('location_multipliers', 'balcony_multipliers'):
+            if not isinstance(data.get(name) or {}, dict):
+                raise PricingError(f"rules.{name} must be an object.")
+        tiers = data.get('sqft_tiers') or []
+        if not isinstance(tiers, list) or not all(isinstance(tier, list) and len(tier) == 2 for tier in tiers):
+            raise PricingError("rules.sqft_tiers must be a list of [minimum sqft, multiplier] pairs.")
+
+        try:
+            balcony_multipliers = {
+                int(balconies): _number(multiplier, f"rules.balcony_multipliers.{balconies}")
+                for balconies, multiplier in (data.get('balcony_multipliers') or {}).items()
+            }
+        except ValueError:
+            raise PricingError("rules.balcony_multipliers must be keyed by number of balconies.") from None
+        return cls(
+            base_prices={stateroom_type: _number(price, f"rules.base_prices.{stateroom_type}")
+                         for stateroom_type, price in data['base_prices'].items()},
+            location_multipliers={location: _number(multiplier, f"rules.location_multipliers.{location}")
+                                  for location, multiplier in (data.get('location_multipliers') or {}).items()},
+            balcony_multipliers=balcony_multipliers,
+            sqft_tiers=[(_number(minimum, "rules.sqft_tiers minimum"), _number(multiplier, "rules.sqft_tiers multiplier"))
+                        for minimum, multiplier in tiers],
+        )
+
+    def price_per_night(self, stateroom_type, location, num_balcony, size_sqft):
+        """
+        Returns:
+            float: The price per night, rounded to cents, or None if the type has no base price.
+        """
+        base = self.base_prices.get(stateroom_type)
+        if base is None:
+            return None
+        multiplier = self.location_multipliers.get(location, 1) * self.balcony_multipliers.get(num_balcony, 1)
+        for minimum, tier_multiplier in reversed(self.sqft_tiers):
+            if size_sqft >= minimum:
+                multiplier *= tier_multiplier
+                break
+        return round(base * multiplier, 2)
+
+
+def generate_trip_prices(trip, rules, dry_run=False):
+    """
+    Price every stateroom of the ship on a trip from a pricing template.
+
+    The staterooms are read with one query and all the new StateroomPrice rows are
+    written with one bulk INSERT and one commit. Staterooms that already have a price on
+    the trip are left alone. With dry_run nothing is written.
+
+    Args:
+        trip (Trip): The trip to open.
+        rules (PricingRules): The pricing template.
+        dry_run (bool): Whether to only compute the prices.
+
+    Returns:
+        tuple: The new price rows (dicts of StateroomPrice columns, in stateroom order),
+        the number of staterooms skipped because they were already priced, and the
+        count, min, max and average price per night of the new rows by stateroom type.
+
+    Raises:
+        PricingError: If some stateroom types have no base price.
+    """
+    length_days = trip.length_days
+    if length_days is None and dry_run:
+        # A preview must not change the trip
+        length_days = (trip.end_date - trip.start_date) // DAY_SECONDS
+    elif length_days is None:
+        trip.update_length()
+        length_days = trip.length_days
+    priced = set(db.session.scalars(select(StateroomPrice.stateroom_id).filter_by(trip_id=trip.trip_id)))
+
+    rows, unpriced, by_type = [], defaultdict(int), defaultdict(list)
+    for stateroom_id, stateroom_type, location, num_balcony, size_sqft in db.session.execute(
+            select(Stateroom.stateroom_id, Stateroom.stateroom_type, Stateroom.location,
+                   Stateroom.num_balcony, Stateroom.size_sqft).order_by(Stateroom.stateroom_id)):
+        if stateroom_id in priced:
+            continue
+        price = rules.price_per_night(stateroom_type, location, num_balcony, size_sqft)
+        if price is None:
+            unpriced[stateroom_type] += 1
+            continue
+        rows.append({"stateroom_id": stateroom_id, "trip_id": trip.trip_id, "price_per_night": price,
+                     "base_price_per_night": price, "total_price": price * length_days, "is_vacant": True})
+        by_type[stateroom_type].append(price)
+    if unpriced:
+        raise PricingError("No base price for stateroom types: " + ", ".join(
+            f"{stateroom_type} ({count} staterooms)" for stateroom_type, count in sorted(unpriced.items())))
+
+    if rows and not dry_run:
+        try:
+            db.session.execute(insert(StateroomPrice), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.info("Priced %s staterooms on trip %s", len(rows), trip.trip_id)
+
+    summary = {
+        stateroom_type: {"count": len(prices), "min": min(prices), "max": max(prices),
+                         "average": round(sum(prices) / len(prices), 2)}
+        for stateroom_type, prices in sorted(by_type.items())
+    }
+    return rows, len(priced), summary
@@ -0,0 +1,171 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+
+from logs import get_logger
+
+__all__ = ['RequestProfiler', 'StackSampler']
+
+logger = get_logger('profiler')
+
+# Characters allowed in the per-endpoint directory and profile names
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]')
+# Longest request id kept in a profile name
+_MAX_ID_LENGTH = 64
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the Python stack of another thread at a fixed interval and counts the
+    distinct stacks, in the "collapsed" format flame graph tools read
+    (`outer;inner;innermost count` per line).
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        """
+        Args:
+            thread_id (int): The threading.get_ident() of the thread to sample.
+            interval (float): Seconds between samples.
+        """
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        """
+        Returns:
+            str: One `stack count` line per distinct stack.
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """
+    Opt-in profiling of live requests.
+
+    A profiled request runs under cProfile, while a StackSampler thread samples its stack.
+    Both outputs are written per endpoint, as PROFILER_DIR/<endpoint>/<time>-<request id>:
+    - `.pstats` can be opened with pstats or snakeviz;
+    - `.collapsed` can be fed to flamegraph.pl or speedscope.
+    Only the newest PROFILER_KEEP profiles of each endpoint are kept.
+
+    Nothing is profiled unless PROFILER_ENABLED is set; then a PROFILER_SAMPLE_RATE fraction
+    of the requests is, and an admin can also profile any single request by sending the
+    PROFILER_HEADER header, e.g. `X-Profile: 1`; its response carries the profile name in
+    X-Profile-Id. Set the rate to 0 to only profile on request. When not enabled, no hook
+    is installed, so there is no overhead at all.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.header = None
+        self.directory = None
+        self.keep = 20
+        self.interval = 0.005
+
+    def init_app(self, app):
+        """
+        Read the PROFILER_* config and install the request hooks if profiling can happen.
+
+        Args:
+            app: The Flask application.
+        """
+        self.enabled = app.config.get('PROFILER_ENABLED', False)
+        self.sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0.01)
+        self.header = app.config.get('PROFILER_HEADER')
+        self.directory = app.config.get('PROFILER_DIR') or os.path.join(app.root_path, 'profiles')
+        self.keep = app.config.get('PROFILER_KEEP', self.keep)
+        self.interval = app.config.get('PROFILER_INTERVAL', self.interval)
+        if not self.enabled or not (self.sample_rate > 0 or self.header):
+            return
+        app.before_request(self._start)
+        app.after_request(self._tag_response)
+        app.teardown_request(self._finish)
+
+    def _wanted(self):
+        if self.header and request.headers.get(self.header):
+            # Imported here: the identity module needs the models, which need the extensions
+            from identity import current_identity
+            identity = current_identity()
+            if identity is not None and identity.is_admin:
+                return True
+        return self.enabled and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._wanted():
+            return
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) already runs on this thread
+            logger.warning("Not profiling %s: a profiler is already active", request.path)
+            return
+        sampler.start()
+        g.profiler = (profile, sampler, time.time())
+
+    def _tag_response(self, response):
+        if 'profiler' in g:
+            response.headers['X-Profile-Id'] = self._name(g.profiler[2])
+        return response
+
+    def _name(self, started):
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(started)) + f"{started % 1:.3f}"[1:]
+        # The request id can come from a client header: keep it to a short, safe file name part
+        request_id = _UNSAFE.sub('_', str(g.get('request_id', os.getpid())))[:_MAX_ID_LENGTH]
+        return f"{stamp}-{request_id}"
+
+    def _finish(self, exc=None):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        profile, sampler, started = profiler
+        profile.disable()
+        sampler.stop()
+        try:
+            self._write(request.endpoint or '_unmatched', self._name(started), profile, sampler)
+        except OSError:
+            logger.exception("Could not write the profile of %s", request.path)
+
+    def _write(self, endpoint, name, profile, sampler):
+        directory = os.path.join(self.directory, _UNSAFE.sub('_', endpoint))
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(os.path.join(directory, name + '.pstats'))
+        with open(os.path.join(directory, name + '.collapsed'), 'w') as f:
+            f.write(sampler.collapsed())
+        logger.info("Profiled %s into %s", endpoint, os.path.join(directory, name))
+
+        # Rotate: names start with the time, so the oldest sort first
+        for suffix in ('.pstats', '.collapsed'):
+            files = sorted(f for f in os.listdir(directory) if f.endswith(suffix))
+            for stale in files[:-self.keep] if self.keep else []:
+                try:
+                    os.remove(os.path.join(directory, stale))
+                except FileNotFoundError:
+                    pass  # removed by another worker
@@ -0,0 +1,233 @@
+import time
+
+from sqlalchemy import bindparam, func, select, update
+
+from availability import AVAILABILITY_TRACKED
+from cache import TRIP_SCOPED, record_trip_write
+from extensions import db
+from logs import get_logger
+from models import DAY_SECONDS, Stateroom, StateroomPrice, Trip
+
+__all__ = ['RepricingPolicy', 'reprice']
+
+logger = get_logger('repricing')
+
+# Rows per UPDATE executemany when writing the new prices back
+WRITE_BATCH_SIZE = 50000
+
+
+class RepricingPolicy:
+    """
+    How dynamic prices move around the base price of each vacant cabin:
+
+        price = base * demand * lead_time * size, clamped to [min_ratio, max_ratio] * base
+
+    - demand: 1 + occupancy_weight * (occupancy - target_occupancy), where occupancy is the
+      booked share of the cabins of the same stateroom type on the same trip.
+    - lead_time: within late_window_days of departure, ramps linearly up to
+      1 + late_premium for categories at or above the target occupancy, or down to
+      1 - late_discount for the ones below it.
+    - size: (size_sqft / average size of the type) ** size_elasticity, spreading the
+      prices within a type by cabin size (0 turns it off).
+    """
+
+    FIELDS = ('target_occupancy', 'occupancy_weight', 'late_window_days', 'late_premium',
+              'late_discount', 'size_elasticity', 'min_ratio', 'max_ratio')
+
+    def __init__(self, target_occupancy=0.6, occupancy_weight=0.5, late_window_days=30,
+                 late_premium=0.1, late_discount=0.2, size_elasticity=0.0, min_ratio=0.7, max_ratio=1.5):
+        self.target_occupancy = target_occupancy
+        self.occupancy_weight = occupancy_weight
+        self.late_window_days = late_window_days
+        self.late_premium = late_premium
+        self.late_discount = late_discount
+        self.size_elasticity = size_elasticity
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Build a policy from a JSON object of FIELDS overrides.
+
+        Raises:
+            ValueError: On unknown fields or values that are not non-negative numbers.
+        """
+        data = data or {}
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown policy fields: {', '.join(sorted(unknown))}")
+        values = {}
+        for name, value in data.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"policy.{name} must be a non-negative number")
+            values[name] = value
+        policy = cls(**values)
+        if policy.min_ratio > policy.max_ratio or policy.late_window_days <= 0:
+            raise ValueError("policy.min_ratio must not exceed max_ratio, and late_window_days must be positive")
+        return policy
+
+    def prices(self, base, occupancy, days_left, size_ratio):
+        """
+        Compute the new prices per night, element-wise over NumPy arrays.
+
+        Args:
+            base: Base prices per night.
+            occupancy: Booked share of each cabin's category on its trip.
+            days_left: Days until each cabin's trip departs.
+            size_ratio: Each cabin's size over the average size of its category.
+
+        Returns:
+            The prices, rounded to cents.
+        """
+        import numpy as np
+
+        demand = 1 + self.occupancy_weight * (occupancy - self.target_occupancy)
+        ramp = np.clip(1 - days_left / self.late_window_days, 0, 1)
+        lead_time = 1 + ramp * np.where(occupancy >= self.target_occupancy, self.late_premium, -self.late_discount)
+        price = base * demand * lead_time
+        if self.size_elasticity:
+            price *= size_ratio ** self.size_elasticity
+        return np.round(np.clip(price, base * self.min_ratio, base * self.max_ratio), 2)
+
+
+def _by_id(rows, dtype):
+    """Dense arrays of the columns of (id, value, ...) rows, indexed by id, for lookups by id array."""
+    import numpy as np
+
+    size = max((row[0] for row in rows), default=0) + 1
+    columns = [np.zeros(size, dtype=dtype) for _ in range(len(rows[0]) - 1)] if rows else []
+    for row in rows:
+        for column, value in zip(columns, row[1:]):
+            column[row[0]] = value or 0
+    return columns
+
+
+def _load(trip_ids, now):
+    """
+    Load every price row of the trips (or of all trips departing after `now`) as NumPy
+    arrays, with the trip and stateroom columns each row needs.
+    """
+    import numpy as np
+
+    query = select(StateroomPrice.price_id, StateroomPrice.trip_id, StateroomPrice.stateroom_id,
+                   func.coalesce(StateroomPrice.base_price_per_night, StateroomPrice.price_per_night),
+                   StateroomPrice.price_per_night, StateroomPrice.is_vacant)
+    if trip_ids is None:
+        query = query.join(Trip, Trip.trip_id == StateroomPrice.trip_id).where(Trip.start_date > now)
+    else:
+        query = query.where(StateroomPrice.trip_id.in_(trip_ids))
+    # All columns are numbers, so the driver's rows go straight into one float array;
+    # building a Row object per price first would cost more than the whole computation
+    rows = db.session.connection().execute(query).cursor.fetchall()
+    if not rows:
+        return None
+    prices = np.array(rows, dtype=np.float64)
+    trip_id = prices[:, 1].astype(np.int64)
+    stateroom_id = prices[:, 2].astype(np.int64)
+
+    # Trip and stateroom columns, looked up by id: there are far fewer of them than prices
+    start_date, length_days = _by_id(db.session.execute(
+        select(Trip.trip_id, Trip.start_date, Trip.length_days)
+        .where(Trip.trip_id.in_(np.unique(trip_id).tolist()))).all(), np.int64)
+    types = {}
+    room_type, room_size = _by_id([
+        (room_id, types.setdefault(stateroom_type, len(types)), size_sqft)
+        for room_id, stateroom_type, size_sqft in db.session.execute(
+            select(Stateroom.stateroom_id, Stateroom.stateroom_type, Stateroom.size_sqft))
+    ], np.float64)
+
+    return {
+        "price_id": prices[:, 0].astype(np.int64),
+        "trip_id": trip_id,
+        "base": prices[:, 3],
+        "current": prices[:, 4],
+        "vacant": prices[:, 5].astype(bool),
+        "stateroom_type": room_type[stateroom_id].astype(np.int64),
+        "size_sqft": room_size[stateroom_id],
+        "start_date": start_date[trip_id],
+        "length_days": length_days[trip_id],
+    }
+
+
+def reprice(trip_ids=None, policy=None, dry_run=False, now=None, preview_limit=50):
+    """
+    Recompute the price per night of every vacant cabin on some trips from its base
+    price, the occupancy of its category, the days left to departure and its size.
+
+    The price rows are loaded once into NumPy arrays, the per-(trip, stateroom type)
+    occupancy and average size are computed with bincount, and the prices of all rows
+    are computed at once. Only rows whose price changes are written back, with bulk
+    UPDATEs by primary key, in one transaction. Booked cabins keep their price.
+
+    NumPy is imported on first use, so it is only needed where repricing runs.
+
+    Args:
+        trip_ids (list): The trips to reprice. Defaults to None (every trip that hasn't departed).
+        policy (RepricingPolicy): The policy. Defaults to RepricingPolicy().
+        dry_run (bool): Whether to only compute the prices.
+        now (float): The current Unix time. Defaults to time.time().
+        preview_limit (int): How many of the changes to return.
+
+    Returns:
+        dict: The number of "trips", of price "rows" considered and of rows "changed", and
+        the first `preview_limit` "changes" as (price_id, old price, new price).
+    """
+    import numpy as np
+
+    policy = policy or RepricingPolicy()
+    now = time.time() if now is None else now
+    data = _load(trip_ids, now)
+    if data is None:
+        return {"trips": 0, "rows": 0, "changed": 0, "changes": []}
+
+    # One group per (trip, stateroom type)
+    trips, trip_index = np.unique(data["trip_id"], return_inverse=True)
+    type_index = data["stateroom_type"]
+    group = trip_index * (type_index.max() + 1) + type_index
+    # Every group that occurs has at least one cabin; the others are never indexed
+    cabins = np.maximum(np.bincount(group), 1)
+    booked = np.bincount(group, weights=(~data["vacant"]).astype(np.float64))
+    sizes = np.bincount(group, weights=data["size_sqft"])
+
+    occupancy = (booked / cabins)[group]
+    size_ratio = data["size_sqft"] / np.maximum(sizes / cabins, 1)[group]
+    days_left = (data["start_date"] - now) / DAY_SECONDS
+    new = policy.prices(data["base"], occupancy, days_left, size_ratio)
+
+    changed = data["vacant"] & (days_left > 0) & (np.abs(new - data["current"]) >= 0.005)
+    price_ids = data["price_id"][changed]
+    new_prices = new[changed]
+    totals = new_prices * data["length_days"][changed]
+
+    if len(price_ids) and not dry_run:
+        try:
+            # A plain table UPDATE run as executemany: the ORM's bulk update by primary key
+            # does the same with twice the overhead per row. Prices don't change vacancy,
+            # so it doesn't make the availability index rebuild either, and the other
+            # workers only drop what they cached about the repriced trips.
+            table = StateroomPrice.__table__
+            statement = (
+                update(table).where(table.c.price_id == bindparam('b_price_id'))
+                .values(price_per_night=bindparam('b_price'), total_price=bindparam('b_total'))
+                .execution_options(**{AVAILABILITY_TRACKED: True, TRIP_SCOPED: True})
+            )
+            for trip_id in np.unique(data["trip_id"][changed]).tolist():
+                record_trip_write(db.session, table.name, trip_id)
+            rows = [{"b_price_id": price_id, "b_price": price, "b_total": total}
+                    for price_id, price, total in zip(price_ids.tolist(), new_prices.tolist(), totals.tolist())]
+            for start in range(0, len(rows), WRITE_BATCH_SIZE):
+                db.session.execute(statement, rows[start:start + WRITE_BATCH_SIZE])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.info("Repriced %s of %s stateroom prices", len(price_ids), len(data["price_id"]))
+
+    return {
+        "trips": len(trips),
+        "rows": int(len(data["price_id"])),
+        "changed": int(len(price_ids)),
+        "changes": list(zip(price_ids[:preview_limit].tolist(), data["current"][changed][:preview_limit].tolist(),
+                            new_prices[:preview_limit].tolist())),
+    }
@@ -0,0 +1,143 @@
+from sqlalchemy import func, select
+
+from extensions import db
+from models import Stateroom, StateroomPrice
+
+__all__ = ['RoomSearch', 'FACET_COLUMNS', 'SORT_COLUMNS', 'parse_number']
+
+# Stateroom attributes that can be filtered on by value, with counts returned for each value
+FACET_COLUMNS = {
+    'stateroom_type': Stateroom.stateroom_type,
+    'location': Stateroom.location,
+    'num_bed': Stateroom.num_bed,
+    'num_bathroom': Stateroom.num_bathroom,
+    'num_balcony': Stateroom.num_balcony,
+}
+# Range filters, as (minimum, maximum) keyed by column
+RANGE_COLUMNS = {
+    'sqft': Stateroom.size_sqft,
+    'price': StateroomPrice.total_price,
+}
+# Columns the results can be sorted by
+SORT_COLUMNS = {
+    'total_price': StateroomPrice.total_price,
+    'price_per_night': StateroomPrice.price_per_night,
+    'room_number': Stateroom.room_number,
+    'size_sqft': Stateroom.size_sqft,
+    'num_bed': Stateroom.num_bed,
+    'num_bathroom': Stateroom.num_bathroom,
+    'num_balcony': Stateroom.num_balcony,
+}
+
+
+def parse_number(value):
+    """
+    Parse a numeric facet value, keeping whole numbers as ints (bathroom counts can be 1.5).
+
+    Raises:
+        ValueError: If value is not a number.
+    """
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+class RoomSearch:
+    """
+    A filtered, sorted and paginated search over the staterooms of one trip.
+
+    Facet counts are "disjunctive": the counts of a facet apply every filter except the
+    facet's own, so a client that selected one stateroom type still sees how many rooms
+    the other types would give it.
+    """
+
+    def __init__(self, trip_id, facets=None, ranges=None, vacant_only=False):
+        """
+        Args:
+            trip_id (int): The trip.
+            facets (dict): Facet name -> list of accepted values, e.g. {'num_bed': [2, 4]}.
+            ranges (dict): Range name -> (minimum, maximum), either of which may be None.
+            vacant_only (bool): Whether to only match vacant staterooms.
+        """
+        self.trip_id = trip_id
+        self.facets = {name: values for name, values in (facets or {}).items() if values}
+        self.ranges = ranges or {}
+        self.vacant_only = vacant_only
+
+    def _conditions(self, facets=True):
+        conditions = [StateroomPrice.trip_id == self.trip_id]
+        if self.vacant_only:
+            conditions.append(StateroomPrice.is_vacant.is_(True))
+        if facets:
+            for name, values in self.facets.items():
+                conditions.append(FACET_COLUMNS[name].in_(values))
+        for name, (minimum, maximum) in self.ranges.items():
+            if minimum is not None:
+                conditions.append(RANGE_COLUMNS[name] >= minimum)
+            if maximum is not None:
+                conditions.append(RANGE_COLUMNS[name] <= maximum)
+        return conditions
+
+    def page(self, sort=None, limit=50, offset=0):
+        """
+        Fetch one page of results.
+
+        Args:
+            sort (str): One of SORT_COLUMNS, prefixed with '-' for descending order.
+            limit (int): The page size.
+            offset (int): The number of results to skip.
+
+        Returns:
+            list: The (Stateroom, StateroomPrice) pairs of the page.
+        """
+        query = db.session.query(Stateroom, StateroomPrice).join(
+            StateroomPrice, Stateroom.stateroom_id == StateroomPrice.stateroom_id
+        ).filter(*self._conditions())
+        order = []
+        if sort:
+            column = SORT_COLUMNS[sort.lstrip('-')]
+            order.append(column.desc() if sort.startswith('-') else column)
+        # Tie-break on the price id so pages are stable
+        return query.order_by(*order, StateroomPrice.price_id).limit(limit).offset(offset).all()
+
+    def counts(self):
+        """
+        Count the matches, in total and per value of every facet.
+
+        A single query groups the rooms that pass the trip, vacancy and range filters by all
+        facet columns at once; the facet filters are then applied to those few groups here,
+        once per facet with the facet's own filter left out.
+
+        Returns:
+            tuple: The total number of matches, and a dict of facet name -> list of
+            {"value", "count"} ordered by value.
+        """
+        names = list(FACET_COLUMNS)
+        columns = [FACET_COLUMNS[name] for name in names]
+        query = (
+            select(*columns, func.count())
+            .select_from(StateroomPrice.__table__.join(
+                Stateroom.__table__, Stateroom.stateroom_id == StateroomPrice.stateroom_id))
+            .where(*self._conditions(facets=False))
+            .group_by(*columns)
+        )
+        # (position, accepted values) of the facets that are filtered on
+        active = [(i, set(self.facets[name])) for i, name in enumerate(names) if name in self.facets]
+
+        total = 0
+        counts = [{} for _ in names]
+        # Plain Core rows: the ORM result machinery costs more than the grouping itself here
+        for *values, count in db.session.connection().execute(query).all():
+            failed = [i for i, accepted in active if values[i] not in accepted]
+            if not failed:
+                total += count
+                for facet_counts, value in zip(counts, values):
+                    facet_counts[value] = facet_counts.get(value, 0) + count
+            elif len(failed) == 1:
+                # Only the facet's own filter rejects the group, so it counts towards that facet
+                i = failed[0]
+                counts[i][values[i]] = counts[i].get(values[i], 0) + count
+
+        return total, {
+            name: [{"value": value, "count": count} for value, count in sorted(counts[i].items())]
+            for i, name in enumerate(names)
+        }
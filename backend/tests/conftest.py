@@ -0,0 +1,83 @@
+"""
+Fixtures shared by the tests: an app on a scratch SQLite file with the schema created from
+the models, a test client, and a counter of the SQL statements a block of code executes.
+
+Run from backend/:
+    python -m pytest
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import TestingConfig
+from extensions import db
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Create apps on the scratch database, with config overrides, e.g. make_app(PROFILER_ENABLED=True)."""
+    apps = []
+
+    def make(**overrides):
+        config = type('TestConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'cruise.db'}",
+            'SQLALCHEMY_BINDS': {},
+            'JWT_SECRET_KEY': 'test-jwt-secret-key-' + 'x' * 32,
+            # A single iteration keeps the tests that log in fast
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1',
+            'PROFILER_ENABLED': False,
+            **overrides,
+        })
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_statements(app):
+    """
+    Capture the statements executed on the app's engines inside a `with` block, as
+    (SQL, parameters) pairs:
+
+        with count_statements() as statements:
+            client.get(...)
+        assert len(statements) == 3
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, None if executemany else parameters))
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
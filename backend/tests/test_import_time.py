@@ -0,0 +1,27 @@
+"""
+Start-up cost of the app: each scenario of benchmarks/bench_import_time.py runs in fresh
+interpreters, must stay within its wall-time budget and must not import the deferred
+modules. The budget can be raised on slow CI machines with IMPORT_BUDGET_MS.
+"""
+import os
+import statistics
+
+import pytest
+
+from benchmarks.bench_import_time import DEFERRED, SCENARIOS, measure
+
+BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 1500))
+RUNS = 3
+
+pytestmark = pytest.mark.slow
+
+
+@pytest.mark.parametrize("label", SCENARIOS)
+def test_start_up_within_budget(label):
+    runs = [measure(SCENARIOS[label]) for _ in range(RUNS)]
+    wall = statistics.median(elapsed for elapsed, _ in runs) * 1000
+    assert wall <= BUDGET_MS, f"{label} took {wall:.0f} ms, over the {BUDGET_MS:.0f} ms budget"
+
+    modules = runs[-1][1]
+    eager = [name for name in DEFERRED[label] if name in modules]
+    assert not eager, f"{label} imported deferred modules eagerly: {', '.join(eager)}"
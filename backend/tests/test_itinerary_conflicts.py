@@ -0,0 +1,80 @@
+"""
+ItinerarySchedule and find_schedule_conflicts() against a pairwise brute-force oracle, on
+random schedules with overlapping, touching, enclosing, enclosed, empty and reversed stops.
+"""
+import random
+
+import pytest
+
+from itinerary import ItinerarySchedule, check_itinerary_times, find_schedule_conflicts
+
+HOUR = 60 * 60
+
+
+def random_interval(rng, horizon):
+    start = rng.randrange(horizon)
+    # Mostly short port calls, some long enough to enclose others, some empty or reversed
+    return start, start + rng.choice([rng.randint(1, 12), rng.randint(12, 120), rng.randint(-2, 0)]) * HOUR
+
+
+def brute_conflicts(intervals, start, end):
+    return sorted(interval for interval in intervals if start < interval[1] and interval[0] < end)
+
+
+def brute_schedule(itineraries, trip_start, trip_end, existing):
+    problems = []
+    for index, (start, end) in enumerate(itineraries):
+        error = check_itinerary_times(start, end, trip_start, trip_end)
+        if error:
+            problems.append((index, 'error', error))
+            continue
+        problems += [(index, 'existing', interval) for interval in brute_conflicts(existing, start, end)]
+        problems += [(index, 'conflicts_with', other) for other in range(index)
+                     if check_itinerary_times(*itineraries[other], trip_start, trip_end) is None
+                     and start < itineraries[other][1] and itineraries[other][0] < end]
+    return sorted(problems, key=repr)
+
+
+def as_tuples(problems):
+    return sorted(((p['index'], key, p[key]) for p in problems
+                   for key in ('error', 'existing', 'conflicts_with') if key in p), key=repr)
+
+
+def random_schedule(rng):
+    horizon = rng.choice([24, 240, 2400]) * HOUR
+    existing = [random_interval(rng, horizon) for _ in range(rng.randint(0, 30))]
+    return horizon, [(start, end) for start, end in existing if end > start]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_conflicts_match_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        horizon, existing = random_schedule(rng)
+        schedule = ItinerarySchedule(existing)
+        assert len(schedule) == len(existing)
+        for _ in range(10):
+            start, end = random_interval(rng, horizon)
+            expected = brute_conflicts(existing, start, end)
+            assert schedule.conflicts(start, end) == expected, (existing, start, end)
+            assert schedule.has_conflict(start, end) == bool(expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_schedule_conflicts_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        horizon, existing = random_schedule(rng)
+        new = [random_interval(rng, horizon) for _ in range(rng.randint(0, 15))]
+        trip_start, trip_end = horizon // 10, horizon
+        got = find_schedule_conflicts(new, trip_start, trip_end, ItinerarySchedule(existing))
+        assert as_tuples(got) == brute_schedule(new, trip_start, trip_end, existing), (new, existing)
+
+
+def test_touching_stops_do_not_conflict():
+    schedule = ItinerarySchedule([(0, 10), (20, 30)])
+    assert schedule.conflicts(10, 20) == []
+    assert schedule.conflicts(5, 25) == [(0, 10), (20, 30)]
+    # A stop enclosing an existing one, and one enclosed by it
+    assert schedule.conflicts(-5, 40) == [(0, 10), (20, 30)]
+    assert schedule.conflicts(2, 3) == [(0, 10)]
@@ -0,0 +1,36 @@
+"""
+/metrics is only served to admins and to scrapers sending METRICS_TOKEN.
+"""
+import pytest
+
+from extensions import db, request_metrics
+from identity import issue_token
+from models import User
+
+
+@pytest.fixture
+def tokens(app):
+    with app.app_context():
+        admin = User(user_id=1, username="admin1", password="-", email="a1@example.com", user_type="admin")
+        passenger = User(user_id=2, username="passenger1", password="-", email="p1@example.com",
+                         user_type="passenger")
+        db.session.add_all([admin, passenger])
+        db.session.commit()
+        return {"admin": issue_token(admin), "passenger": issue_token(passenger)}
+
+
+def _status(client, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return client.get('/metrics', headers=headers).status_code
+
+
+def test_metrics_need_an_admin(client, tokens):
+    assert _status(client) == 403
+    assert _status(client, tokens["passenger"]) == 403
+    assert _status(client, tokens["admin"]) == 200
+
+
+def test_metrics_accept_the_scrape_token(client, tokens, monkeypatch):
+    monkeypatch.setattr(request_metrics, 'token', 'scrape-secret')
+    assert _status(client, 'scrape-secret') == 200
+    assert _status(client, 'wrong-secret') == 403
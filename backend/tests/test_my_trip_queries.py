@@ -0,0 +1,72 @@
+"""
+/Passenger/MyTrip must load from a fixed number of statements, however many trips the
+passenger's group has booked and however many stops those trips make.
+"""
+import pytest
+
+from extensions import db
+from identity import issue_token
+from models import (Address, Group, Invoice, Itinerary, Passenger, Payment, Port, Stateroom, StateroomBooking,
+                    StateroomPrice, Trip, User)
+
+DAY = 24 * 60 * 60
+EPOCH = 1767225600  # 2026-01-01
+
+
+def _seed(app, trips, stops):
+    """
+    Create one passenger whose group booked a stateroom on each of `trips` trips of
+    `stops` itinerary stops, and return a bearer token for them.
+    """
+    with app.app_context():
+        db.session.add(Address(addr_id=1, street="1 Harbour Rd", city="Miami", state_province="FL",
+                               postal_code="33101", country="USA"))
+        db.session.add_all(Port(port_id=p, port_name=f"Port {p}", num_parking_spots=100, addr_id=1)
+                           for p in range(1, stops + 2))
+        user = User(user_id=1, username="passenger1", password="-", email="p1@example.com", user_type="passenger")
+        passenger = Passenger(passenger_id=1, user_id=1, group_id=1, passenger_fname="First", passenger_lname="Last",
+                              birth_date=0, gender="other", nationality="USA", phone="555-0100", addr_id=1)
+        db.session.add_all([user, Group(group_id=1), passenger])
+        for t in range(1, trips + 1):
+            start = EPOCH + t * 30 * DAY
+            db.session.add(Trip(trip_id=t, start_date=start, end_date=start + (stops + 2) * DAY,
+                                start_port_id=1, end_port_id=1, length_days=stops + 2))
+            db.session.add_all(Itinerary(trip_id=t, port_id=s + 1, arrival_date_time=start + s * DAY,
+                                         leaving_date_time=start + s * DAY + 3600)
+                               for s in range(1, stops + 1))
+            db.session.add(Stateroom(stateroom_id=t, stateroom_type="suite", location="aft", num_bed=2,
+                                     num_bathroom=1, num_balcony=1, size_sqft=300, room_number=t))
+            db.session.add(StateroomPrice(price_id=t, stateroom_id=t, trip_id=t, price_per_night=100,
+                                          total_price=100 * (stops + 2), is_vacant=False))
+            db.session.add(Invoice(invoice_id=t, payment_due=100, billing_date_time=EPOCH))
+            db.session.add(StateroomBooking(group_id=1, invoice_id=t, price_id=t))
+            db.session.add(Payment(payment_date=EPOCH, pay_amount=100, payment_method="card",
+                                   trip_id=t, group_id=1, invoice_id=t))
+        db.session.commit()
+        return issue_token(user, passenger)
+
+
+def _my_trip_statements(app, client, count_statements, trips, stops):
+    token = _seed(app, trips, stops)
+    with count_statements() as statements:
+        response = client.get('/Passenger/MyTrip', headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["trips"]) == trips
+    assert all(len(trip["ports"]) == stops and len(trip["stateroom_information"]) == 1 for trip in body["trips"])
+    return len(statements)
+
+
+@pytest.mark.parametrize("trips, stops", [(1, 1), (3, 2), (12, 6)])
+def test_my_trip_statement_count_is_constant(app, client, count_statements, trips, stops):
+    # Trips, their itineraries with the ports, and the bookings with their staterooms
+    assert _my_trip_statements(app, client, count_statements, trips, stops) == 3
+
+
+def test_my_trip_statement_count_does_not_grow(app, client, count_statements):
+    small = _my_trip_statements(app, client, count_statements, 1, 1)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    large = _my_trip_statements(app, client, count_statements, 20, 8)
+    assert large == small
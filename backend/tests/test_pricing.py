@@ -0,0 +1,45 @@
+"""
+Pricing templates: rule validation, and dry runs that leave the database untouched.
+"""
+import pytest
+
+from extensions import db
+from models import DAY_SECONDS, Address, Port, Stateroom, StateroomPrice, Trip
+from pricing import PricingError, PricingRules, generate_trip_prices
+
+EPOCH = 1767225600  # 2026-01-01
+
+
+@pytest.mark.parametrize("price", ["nan", "inf", "-inf", float("nan"), float("inf")])
+def test_rules_reject_non_finite_numbers(price):
+    with pytest.raises(PricingError, match="finite"):
+        PricingRules.from_json({"base_prices": {"Inside": price}})
+    with pytest.raises(PricingError, match="finite"):
+        PricingRules.from_json({"base_prices": {"Inside": 100}, "location_multipliers": {"aft": price}})
+
+
+def test_rules_reject_negative_numbers():
+    with pytest.raises(PricingError, match="negative"):
+        PricingRules.from_json({"base_prices": {"Inside": -1}})
+
+
+def test_dry_run_leaves_the_trip_alone(app):
+    with app.app_context():
+        db.session.add(Address(addr_id=1, street="1 Harbour Rd", city="Miami", state_province="FL",
+                               postal_code="33101", country="USA"))
+        db.session.add(Port(port_id=1, port_name="Miami", num_parking_spots=100, addr_id=1))
+        db.session.add(Trip(trip_id=1, start_date=EPOCH, end_date=EPOCH + 7 * DAY_SECONDS,
+                            start_port_id=1, end_port_id=1, length_days=None))
+        db.session.add(Stateroom(stateroom_id=1, stateroom_type="Inside", location="aft", num_bed=2,
+                                 num_bathroom=1, num_balcony=0, size_sqft=200, room_number=1))
+        db.session.commit()
+
+        trip = db.session.get(Trip, 1)
+        rows, skipped, _ = generate_trip_prices(trip, PricingRules.from_json({"base_prices": {"Inside": 100}}),
+                                                dry_run=True)
+        assert rows[0]["total_price"] == 700
+        assert trip.length_days is None and not db.session.dirty
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(Trip, 1).length_days is None
+        assert StateroomPrice.query.count() == 0
@@ -0,0 +1,46 @@
+"""
+The profiler installs no hooks unless enabled, and then profiles the requests admins ask for.
+"""
+import os
+
+from flask import g
+
+from extensions import db, request_profiler
+from identity import issue_token
+from models import User
+
+
+def _admin_token(app):
+    with app.app_context():
+        admin = User(user_id=1, username="admin1", password="-", email="a1@example.com", user_type="admin")
+        db.session.add(admin)
+        db.session.commit()
+        return issue_token(admin)
+
+
+def test_disabled_profiler_installs_no_hooks(app):
+    assert request_profiler._start not in app.before_request_funcs.get(None, [])
+    token = _admin_token(app)
+    response = app.test_client().get('/', headers={"Authorization": f"Bearer {token}", "X-Profile": "1"})
+    assert 'X-Profile-Id' not in response.headers
+
+
+def test_enabled_profiler_profiles_admin_requests(make_app, tmp_path):
+    app = make_app(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0, PROFILER_DIR=str(tmp_path / 'profiles'))
+    token = _admin_token(app)
+    client = app.test_client()
+
+    assert 'X-Profile-Id' not in client.get('/', headers={"Authorization": f"Bearer {token}"}).headers
+    response = client.get('/', headers={"Authorization": f"Bearer {token}", "X-Profile": "1"})
+    name = response.headers['X-Profile-Id']
+    files = os.listdir(tmp_path / 'profiles' / 'auth.home')
+    assert sorted(files) == [name + '.collapsed', name + '.pstats']
+
+
+def test_profile_names_stay_inside_the_directory(make_app, tmp_path):
+    app = make_app(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0, PROFILER_DIR=str(tmp_path / 'profiles'))
+    with app.test_request_context():
+        g.request_id = '../../' + 'x' * 200
+        stamp, request_id = request_profiler._name(0).split('-', 1)
+    assert os.sep not in request_id and '/' not in request_id
+    assert len(request_id) == 64
@@ -0,0 +1,90 @@
+"""
+The hot lookups must be answered through an index: the statements the routes actually
+send are captured and run through EXPLAIN QUERY PLAN, which may not report a full SCAN
+of any table they read.
+"""
+import pytest
+from sqlalchemy import text
+
+from extensions import db
+from models import (Address, Group, Invoice, Itinerary, Package, Passenger, Payment, Port, Stateroom,
+                    StateroomBooking, StateroomPrice, Trip, User)
+
+DAY = 24 * 60 * 60
+EPOCH = 1767225600  # 2026-01-01
+
+HOT_REQUESTS = {
+    "my trip": ('GET', '/Passenger/MyTrip', None),
+    "trips by dates": ('GET', '/Passenger/Trip?start_date=2026-01-01&end_date=2026-12-31&limit=10', None),
+    "room details": ('GET', '/Passenger/RoomDetail?trip_id=1&sort=-total_price&min_price=100', None),
+    "room order": ('GET', '/Passenger/RoomOrder?tripId=1&stateroomId=1', None),
+    "package": ('GET', '/Passenger/PurchasePackage?package_id=1', None),
+    "buy package": ('POST', '/Passenger/PurchasePackage', {"package_id": 1, "payment_method": "card"}),
+}
+
+
+@pytest.fixture
+def client(app):
+    """A client logged in through the session cookie, so the passenger lookups run too."""
+    with app.app_context():
+        db.session.add(Address(addr_id=1, street="1 Harbour Rd", city="Miami", state_province="FL",
+                               postal_code="33101", country="USA"))
+        db.session.add_all(Port(port_id=p, port_name=f"Port {p}", num_parking_spots=100, addr_id=1) for p in (1, 2))
+        db.session.add_all([
+            User(user_id=1, username="passenger1", password="-", email="p1@example.com", user_type="passenger"),
+            Group(group_id=1),
+            Passenger(passenger_id=1, user_id=1, group_id=1, passenger_fname="First", passenger_lname="Last",
+                      birth_date=0, gender="other", nationality="USA", phone="555-0100", addr_id=1),
+            Trip(trip_id=1, start_date=EPOCH + 10 * DAY, end_date=EPOCH + 17 * DAY,
+                 start_port_id=1, end_port_id=2, length_days=7),
+            Itinerary(trip_id=1, port_id=2, arrival_date_time=EPOCH + 12 * DAY, leaving_date_time=EPOCH + 13 * DAY),
+            Stateroom(stateroom_id=1, stateroom_type="suite", location="aft", num_bed=2, num_bathroom=1,
+                      num_balcony=1, size_sqft=300, room_number=1),
+            StateroomPrice(price_id=1, stateroom_id=1, trip_id=1, price_per_night=100, total_price=700,
+                           is_vacant=False),
+            Invoice(invoice_id=1, payment_due=700, billing_date_time=EPOCH),
+            StateroomBooking(group_id=1, invoice_id=1, price_id=1),
+            Payment(payment_date=EPOCH, pay_amount=700, payment_method="card", trip_id=1, group_id=1, invoice_id=1),
+            Package(package_id=1, pkg_name="Spa", pkg_price=100, pkg_charge_type="per trip"),
+        ])
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'], session['user_type'] = 1, 'passenger'
+    return client
+
+
+def _query_plan(statement, parameters):
+    # Run on a raw DB-API cursor with the parameters as the route sent them
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("name", HOT_REQUESTS)
+def test_hot_lookups_use_an_index(app, client, count_statements, name):
+    method, path, body = HOT_REQUESTS[name]
+    with count_statements() as statements:
+        response = client.open(path, method=method, json=body)
+    assert response.status_code < 300, response.get_json()
+
+    with app.app_context():
+        selects = [(statement, parameters) for statement, parameters in statements
+                   if statement.lstrip().upper().startswith('SELECT')]
+        assert selects
+        for statement, parameters in selects:
+            plan = _query_plan(statement, parameters)
+            scans = [step for step in plan if step.startswith('SCAN')]
+            assert not scans, f"{name} scans instead of searching an index:\n{statement}\n{plan}"
+
+
+def test_passenger_lookup_uses_an_index(app):
+    # Also checked through the routes above, but only on a cold identity cache
+    with app.app_context():
+        plan = [row[3] for row in db.session.execute(
+            text("EXPLAIN QUERY PLAN SELECT passenger_id, group_id FROM cyz_passenger WHERE user_id = 1"))]
+    assert not [step for step in plan if step.startswith('SCAN')], plan
@@ -0,0 +1,15 @@
+"""
+Only well-formed X-Request-ID headers are reused; anything else gets a generated id.
+"""
+import pytest
+
+
+def test_valid_request_id_is_echoed(client):
+    assert client.get('/', headers={"X-Request-ID": "abc-123"}).headers['X-Request-ID'] == "abc-123"
+
+
+@pytest.mark.parametrize("header", ["../../x", "a" * 65, "id with spaces", "xé"])
+def test_invalid_request_id_is_replaced(client, header):
+    request_id = client.get('/', headers={"X-Request-ID": header}).headers['X-Request-ID']
+    assert request_id != header
+    assert len(request_id) == 12 and request_id.isalnum()
@@ -0,0 +1,173 @@
+"""
+Caches stay consistent with commits made by other processes (other gunicorn workers):
+their writes are logged in cyz_data_change, and the next read drops what they made stale.
+Another process is played by a plain sqlite3 connection to the same file.
+"""
+import sqlite3
+import time
+
+import pytest
+from flask import session
+from sqlalchemy import update
+
+from availability import AVAILABILITY_TRACKED, record_vacancy_change
+from cache import TRIP_SCOPED
+from extensions import availability_index, db, table_changes
+from identity import current_identity, issue_token
+from models import Address, DataChange, Group, Package, Passenger, Port, Stateroom, StateroomPrice, Trip, User
+
+EPOCH = 1767225600  # 2026-01-01
+
+
+@pytest.fixture
+def token(app):
+    with app.app_context():
+        db.session.add(Address(addr_id=1, street="1 Harbour Rd", city="Miami", state_province="FL",
+                               postal_code="33101", country="USA"))
+        db.session.add(Port(port_id=1, port_name="Miami", num_parking_spots=100, addr_id=1))
+        db.session.add(Trip(trip_id=1, start_date=EPOCH, end_date=EPOCH + 7 * 86400,
+                            start_port_id=1, end_port_id=1, length_days=7))
+        for room in (1, 2, 3):
+            db.session.add(Stateroom(stateroom_id=room, stateroom_type="suite", location="aft", num_bed=2,
+                                     num_bathroom=1, num_balcony=1, size_sqft=300, room_number=room))
+            db.session.add(StateroomPrice(price_id=room, stateroom_id=room, trip_id=1, price_per_night=100,
+                                          total_price=700, is_vacant=True))
+        user = User(user_id=1, username="passenger1", password="-", email="p1@example.com", user_type="passenger")
+        passenger = Passenger(passenger_id=1, user_id=1, group_id=1, passenger_fname="First", passenger_lname="Last",
+                              birth_date=0, gender="other", nationality="USA", phone="555-0100", addr_id=1)
+        db.session.add_all([user, Group(group_id=1), passenger])
+        db.session.commit()
+        return issue_token(user, passenger)
+
+
+def _other_process(app, *statements):
+    path = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    other = sqlite3.connect(path)
+    with other:
+        for statement in statements:
+            other.execute(statement)
+    other.close()
+
+
+def _logged(table_name, trip_id=None):
+    return f"INSERT INTO cyz_data_change (changed_at, table_name, trip_id) " \
+           f"VALUES ({time.time()}, '{table_name}', {'NULL' if trip_id is None else trip_id})"
+
+
+def _vacant(client, token):
+    response = client.get('/Passenger/Availability?trip_id=1', headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    return response.get_json()["vacant_count"]
+
+
+def _log(app, after=0):
+    with app.app_context():
+        return [(row.table_name, row.trip_id)
+                for row in DataChange.query.filter(DataChange.change_id > after).order_by(DataChange.change_id)]
+
+
+def _last_change_id(app):
+    with app.app_context():
+        return db.session.query(db.func.max(DataChange.change_id)).scalar() or 0
+
+
+def test_commits_log_the_tables_and_trips_they_write(app, token):
+    last = _last_change_id(app)
+    with app.app_context():
+        db.session.get(Stateroom, 1).size_sqft = 320
+        db.session.get(StateroomPrice, 2).price_per_night = 120
+        db.session.commit()
+    assert _log(app, last) == [("cyz_stateroom", None), ("cyz_stateroom_price", 1)]
+
+
+def test_bookings_log_their_trip(app, token):
+    last = _last_change_id(app)
+    with app.app_context():
+        db.session.execute(
+            update(StateroomPrice).where(StateroomPrice.price_id == 2).values(is_vacant=False)
+            .execution_options(synchronize_session=False, **{AVAILABILITY_TRACKED: True, TRIP_SCOPED: True}))
+        record_vacancy_change(db.session, 1, 2, False)
+        db.session.commit()
+    assert _log(app, last) == [("cyz_stateroom_price", 1)]
+
+
+def test_unscoped_bulk_writes_log_the_whole_table(app, token):
+    last = _last_change_id(app)
+    with app.app_context():
+        db.session.execute(update(StateroomPrice).values(price_per_night=110))
+        db.session.commit()
+    assert _log(app, last) == [("cyz_stateroom_price", None)]
+
+
+def test_availability_reloads_the_trip_another_process_booked(app, client, token):
+    assert _vacant(client, token) == 3
+    builds, reloads = availability_index.builds, availability_index.reloads
+
+    _other_process(app, "UPDATE cyz_stateroom_price SET is_vacant = 0 WHERE price_id = 2",
+                   _logged("cyz_stateroom_price", 1))
+
+    assert _vacant(client, token) == 2
+    # Only the trip is reloaded, the index is not rebuilt
+    assert availability_index.builds == builds
+    assert availability_index.reloads == reloads + 1
+
+
+def test_availability_rebuilds_on_another_process_stateroom_change(app, client, token):
+    assert _vacant(client, token) == 3
+    builds = availability_index.builds
+
+    _other_process(app, "DELETE FROM cyz_stateroom_price WHERE stateroom_id = 3",
+                   "DELETE FROM cyz_stateroom WHERE stateroom_id = 3",
+                   _logged("cyz_stateroom"), _logged("cyz_stateroom_price"))
+
+    assert _vacant(client, token) == 2
+    assert availability_index.builds == builds + 1
+
+
+def test_own_commits_are_not_applied_twice(app, client, token):
+    assert _vacant(client, token) == 3
+    changes = table_changes.changes
+    with app.app_context():
+        db.session.get(Stateroom, 1).size_sqft = 320
+        db.session.commit()
+    assert _vacant(client, token) == 3
+    # The local commit already dropped the index itself; the log brings no news
+    assert table_changes.changes == changes
+
+
+def test_old_rows_are_pruned(app, token):
+    retention = table_changes.retention
+    _other_process(app, "INSERT INTO cyz_data_change (changed_at, table_name) "
+                        f"VALUES ({time.time() - retention - 1}, 'cyz_trip')")
+    table_changes._pruned_at = 0
+    with app.app_context():
+        db.session.get(Trip, 1).length_days = 8
+        db.session.commit()
+    assert ("cyz_trip", None) not in _log(app)
+
+
+def test_catalog_sees_another_process_edit(app, client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    with app.app_context():
+        db.session.add(Package(package_id=1, pkg_name="Spa", pkg_price=100, pkg_charge_type="per trip"))
+        db.session.commit()
+    assert [p["pkg_name"] for p in client.get('/Passenger/Package', headers=headers).get_json()] == ["Spa"]
+
+    _other_process(app, "UPDATE cyz_package SET pkg_name = 'Spa and sauna' WHERE package_id = 1",
+                   _logged("cyz_package"))
+
+    packages = client.get('/Passenger/Package', headers=headers).get_json()
+    assert [p["pkg_name"] for p in packages] == ["Spa and sauna"]
+
+
+def test_session_identity_sees_another_process_group_change(app, token):
+    def group_id():
+        with app.test_request_context():
+            session['user_id'], session['user_type'] = 1, 'passenger'
+            return current_identity().group_id
+
+    assert group_id() == 1
+    _other_process(app, "INSERT INTO cyz_group (group_id) VALUES (2)",
+                   "UPDATE cyz_passenger SET group_id = 2 WHERE passenger_id = 1",
+                   _logged("cyz_group"), _logged("cyz_passenger"))
+    assert group_id() == 2
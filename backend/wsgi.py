@@ -0,0 +1,17 @@
+"""
+WSGI entry point for multi-worker servers, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The environment is picked with CRUISE_ENV (production by default here). TLS is expected to
+be terminated by a reverse proxy, whose X-Forwarded-For/-Proto headers are trusted so that
+Talisman and url building see the original scheme and client address.
+"""
+import os
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app import create_app
+
+app = create_app(os.environ.get('CRUISE_ENV', 'production'))
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1)
@@ -168,7 +168,9 @@ CREATE TABLE cyz_stateroom_price (
     cyz_stateroom_stateroom_id INT NOT NULL,
     price_per_night            DECIMAL(7, 2) NOT NULL,
     trip_id                    INT NOT NULL,
-    is_vacant                  DECIMAL NOT NULL
+    is_vacant                  DECIMAL NOT NULL,
+    total_price                DECIMAL(9, 2),
+    base_price_per_night       DECIMAL(7, 2)
 );
 
 ALTER TABLE cyz_stateroom_price ADD CONSTRAINT cyz_stateroom_price_pk PRIMARY KEY ( price_id );
@@ -178,7 +180,8 @@ CREATE TABLE cyz_trip (
     start_date    DATETIME NOT NULL,
     end_date      DATETIME NOT NULL,
     start_port_id INT NOT NULL,
-    end_port_id   INT NOT NULL
+    end_port_id   INT NOT NULL,
+    length_days   INT
 );
 
 ALTER TABLE cyz_trip ADD CONSTRAINT trip_pk PRIMARY KEY ( trip_id );
@@ -202,6 +205,83 @@ ALTER TABLE cyz_user
 
 ALTER TABLE cyz_user ADD CONSTRAINT user_pk PRIMARY KEY ( user_id );
 
+-- Log of committed writes, maintained by the application
+CREATE TABLE cyz_data_change (
+    change_id  INT NOT NULL AUTO_INCREMENT,
+    changed_at DOUBLE NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    trip_id    INT,
+    CONSTRAINT data_change_pk PRIMARY KEY ( change_id )
+);
+
+CREATE INDEX ix_cyz_data_change_changed_at ON
+    cyz_data_change (
+        changed_at
+    ASC );
+
+CREATE INDEX ix_cyz_passenger_user_id ON
+    cyz_passenger (
+        user_id
+    ASC );
+
+CREATE INDEX ix_cyz_stateroom_price_search ON
+    cyz_stateroom_price (
+        trip_id
+    ASC,
+        cyz_stateroom_stateroom_id
+    ASC,
+        is_vacant
+    ASC,
+        total_price
+    ASC );
+
+CREATE INDEX ix_cyz_stateroom_facets ON
+    cyz_stateroom (
+        location
+    ASC,
+        num_bed
+    ASC,
+        num_bathroom
+    ASC,
+        num_balcony
+    ASC );
+
+CREATE INDEX ix_cyz_stateroom_booking_group_id ON
+    cyz_stateroom_booking (
+        group_id
+    ASC );
+
+CREATE INDEX ix_cyz_stateroom_booking_price_id ON
+    cyz_stateroom_booking (
+        price_id
+    ASC );
+
+CREATE INDEX ix_cyz_stateroom_price_trip_id_total_price ON
+    cyz_stateroom_price (
+        trip_id
+    ASC,
+        total_price
+    ASC );
+
+CREATE INDEX ix_cyz_itinerary_trip_id ON
+    cyz_itinerary (
+        trip_id
+    ASC );
+
+CREATE INDEX ix_cyz_payment_group_id_trip_id ON
+    cyz_payment (
+        cyz_group_group_id
+    ASC,
+        trip_id
+    ASC );
+
+CREATE INDEX ix_cyz_trip_start_date_end_date ON
+    cyz_trip (
+        start_date
+    ASC,
+        end_date
+    ASC );
+
 ALTER TABLE cyz_admin
     ADD CONSTRAINT cyz_admin_cyz_user_fk FOREIGN KEY ( user_id )
         REFERENCES cyz_user ( user_id );
@@ -152,6 +152,8 @@ CREATE TABLE cyz_stateroom_price (
     price_per_night            REAL NOT NULL,
     trip_id                    INTEGER NOT NULL,
     is_vacant                  BOOLEAN NOT NULL,
+    total_price                REAL,
+    base_price_per_night       REAL,
     FOREIGN KEY (stateroom_id) REFERENCES cyz_stateroom (stateroom_id),
     FOREIGN KEY (trip_id) REFERENCES cyz_trip (trip_id)
 );
@@ -162,10 +164,19 @@ CREATE TABLE cyz_trip (
     end_date      INTEGER NOT NULL,
     start_port_id INTEGER NOT NULL,
     end_port_id   INTEGER NOT NULL,
+    length_days   INTEGER,
     FOREIGN KEY (start_port_id) REFERENCES cyz_port (port_id),
     FOREIGN KEY (end_port_id) REFERENCES cyz_port (port_id)
 );
 
+-- Log of committed writes, maintained by the application
+CREATE TABLE cyz_data_change (
+    change_id  INTEGER PRIMARY KEY,
+    changed_at REAL NOT NULL,
+    table_name TEXT NOT NULL,
+    trip_id    INTEGER
+);
+
 CREATE TABLE cyz_user (
     user_id   INTEGER PRIMARY KEY,
     username  TEXT NOT NULL UNIQUE,
@@ -174,6 +185,17 @@ CREATE TABLE cyz_user (
     user_type TEXT CHECK ( user_type IN ( 'admin', 'passenger' ) ) NOT NULL
 );
 
+CREATE INDEX ix_cyz_passenger_user_id ON cyz_passenger (user_id);
+CREATE INDEX ix_cyz_stateroom_price_search ON cyz_stateroom_price (trip_id, stateroom_id, is_vacant, total_price);
+CREATE INDEX ix_cyz_stateroom_facets ON cyz_stateroom (stateroom_type, location, num_bed, num_bathroom, num_balcony);
+CREATE INDEX ix_cyz_stateroom_price_trip_id_total_price ON cyz_stateroom_price (trip_id, total_price);
+CREATE INDEX ix_cyz_stateroom_booking_group_id ON cyz_stateroom_booking (group_id);
+CREATE INDEX ix_cyz_stateroom_booking_price_id ON cyz_stateroom_booking (price_id);
+CREATE INDEX ix_cyz_itinerary_trip_id ON cyz_itinerary (trip_id);
+CREATE INDEX ix_cyz_payment_group_id_trip_id ON cyz_payment (group_id, trip_id);
+CREATE INDEX ix_cyz_trip_start_date_end_date ON cyz_trip (start_date, end_date);
+CREATE INDEX ix_cyz_data_change_changed_at ON cyz_data_change (changed_at);
+
 INSERT INTO cyz_restaurant (restaurant_id, restaurant_name, serve_type, opening_time, closing_time, at_floor)
 VALUES 
 (1, 'Common Buffett', 'Breakfast, Lunch, Dinner', '07:00', '21:00', 6),
@@ -463,3 +485,8 @@ VALUES
 (8, 2),
 (9, 2);
 
+-- Derived columns maintained by the application
+UPDATE cyz_trip SET length_days = (end_date - start_date) / 86400;
+UPDATE cyz_stateroom_price SET total_price = price_per_night *
+    (SELECT length_days FROM cyz_trip WHERE cyz_trip.trip_id = cyz_stateroom_price.trip_id);
+UPDATE cyz_stateroom_price SET base_price_per_night = price_per_night;